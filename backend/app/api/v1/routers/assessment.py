@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Header
 from typing import Optional
 from app.models.Assessment import AssessmentQuestion, AssessmentSubmission, AssessmentResult
 from app.services.assessment import assessment_service
+from app.services.sse import sse_response
 
 
 
@@ -9,6 +10,37 @@ from app.services.assessment import assessment_service
 router = APIRouter(prefix="/assessment", tags=["assessment"])
 
 
+def _validate_submission(submission: AssessmentSubmission, x_user_id: Optional[str]) -> None:
+    """Reject requests without a user id, with unknown question IDs or out-of-range scores."""
+    if not x_user_id:
+        raise HTTPException(
+            status_code=400,
+            detail="X-User-ID header is required"
+        )
+    
+    # Validate that all question IDs are in range
+    questions = assessment_service.load_questions()
+    question_ids = {q.id for q in questions}
+    
+    invalid_ids = [qid for qid in submission.answers.keys() if qid not in question_ids]
+    if invalid_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid question IDs: {invalid_ids}. Valid IDs are 1-40."
+        )
+    
+    # Validate scores are in range (1-5)
+    invalid_scores = [
+        qid for qid, score in submission.answers.items()
+        if not (1 <= score <= 5)
+    ]
+    if invalid_scores:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid scores for question IDs: {invalid_scores}. Scores must be between 1 and 5."
+        )
+
+
 @router.get("/questions", response_model=list[AssessmentQuestion])
 async def get_assessment_questions():
     """
@@ -62,35 +94,11 @@ async def submit_assessment(
     - **answers**: Map of QuestionID (1-40) to Score (1-5)
     - **X-User-ID**: Header containing the user identifier
     
-    Returns the calculated scores for each skill category, AI summary, top strengths, and growth recommendation.
+    Returns the calculated scores for each skill category right away. The AI summary, strengths
+    and growth recommendation are generated in the background (`analysis_status` is "pending"
+    until they are ready); poll `/assessment/results` for them.
     """
-    if not x_user_id:
-        raise HTTPException(
-            status_code=400,
-            detail="X-User-ID header is required"
-        )
-    
-    # Validate that all question IDs are in range
-    questions = assessment_service.load_questions()
-    question_ids = {q.id for q in questions}
-    
-    invalid_ids = [qid for qid in submission.answers.keys() if qid not in question_ids]
-    if invalid_ids:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid question IDs: {invalid_ids}. Valid IDs are 1-40."
-        )
-    
-    # Validate scores are in range (1-5)
-    invalid_scores = [
-        qid for qid, score in submission.answers.items()
-        if not (1 <= score <= 5)
-    ]
-    if invalid_scores:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid scores for question IDs: {invalid_scores}. Scores must be between 1 and 5."
-        )
+    _validate_submission(submission, x_user_id)
     
     try:
         result = assessment_service.save_results(x_user_id, submission.answers)
@@ -99,6 +107,29 @@ async def submit_assessment(
         raise HTTPException(status_code=500, detail=f"Error processing assessment: {str(e)}")
 
 
+@router.post("/submit/stream")
+async def submit_assessment_stream(
+    submission: AssessmentSubmission,
+    x_user_id: Optional[str] = Header(None, alias="X-User-ID")
+):
+    """
+    Streaming variant of `/assessment/submit` (Server-Sent Events).
+    
+    Events, in order:
+    - **result**: the scored AssessmentResult (`analysis_status` "pending"), sent right away
+    - **summary**: `{"text": ...}` chunks of the AI summary as the model writes them
+    - **result**: the final AssessmentResult with the stored AI analysis
+    - **error**: `{"detail": ...}` if processing fails after the stream started
+    """
+    _validate_submission(submission, x_user_id)
+    
+    async def events():
+        async for kind, payload in assessment_service.stream_results(x_user_id, submission.answers):
+            yield kind, {"text": payload} if kind == "summary" else payload
+    
+    return sse_response(events())
+
+
 @router.post("/submit/test", response_model=AssessmentResult, status_code=201)
 async def submit_test_assessment(
     submission: AssessmentSubmission,
@@ -140,6 +171,7 @@ async def get_assessment_results(
 ):
     """
     Returns the calculated category scores and AI analysis for the current user.
+    `analysis_status` is "pending" while the AI analysis is still being generated.
     
     Requires the X-User-ID header to identify the user.
     """
@@ -1,18 +1,19 @@
 """Employees API router."""
 
+import copy
 import json
-from pathlib import Path
 from typing import List, Optional, Literal
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Header, Query, Response
 from pydantic import BaseModel
+from app.core.config import settings
 from app.models.Employee import Employee as Employee
-from app.services.supabase_client import get_supabase_client
+from app.services.cache import invalidate_candidate
+from app.services.concurrency import fan_out
+from app.services.static_assets import static_assets
+from app.services.supabase_client import get_async_supabase_client, execute
+from app.services.table_pages import EMPLOYEES, list_rows
 
 router = APIRouter(prefix="/employees", tags=["employees"])
-supabase = get_supabase_client()
-
-# Data directory
-DATA_DIR = Path(__file__).parent.parent.parent.parent.parent / "data"
 
 # Hardcoded mock employee ID
 MOCK_EMPLOYEE_NUMBER = 1001
@@ -190,12 +191,13 @@ class EmployeePositionsUpdate(BaseModel):
 
 
 def load_json_file(filename: str) -> dict:
-    """Load JSON data from file."""
-    filepath = DATA_DIR / filename
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail=f"Data file not found: {filename}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load JSON data from file (parsed once; returns a private copy)."""
+    try:
+        data = static_assets.asset(filename).value()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    # The cached value is shared; callers enrich the profile in place
+    return copy.deepcopy(data)
 
 
 def ensure_mapping(data: dict | None, context: str) -> dict:
@@ -205,9 +207,9 @@ def ensure_mapping(data: dict | None, context: str) -> dict:
     raise HTTPException(status_code=500, detail=f"{context} is unavailable (empty response)")
 
 
-def enrich_profile_from_supabase(profile: dict, user_id: str) -> dict:
+async def enrich_profile_from_supabase(profile: dict, user_id: str) -> dict:
     """Overlay Supabase employees row onto the mock profile."""
-    client = supabase
+    client = await get_async_supabase_client()
     if not client:
         return profile
 
@@ -215,7 +217,7 @@ def enrich_profile_from_supabase(profile: dict, user_id: str) -> dict:
 
     # Try user_id match first (string/uuid)
     try:
-        resp = client.table("employees").select("*").eq("user_id", user_id).single().execute()
+        resp = await execute(client.table("employees").select("*").eq("user_id", user_id).single())
         row = resp.data
     except Exception:
         row = None
@@ -223,7 +225,7 @@ def enrich_profile_from_supabase(profile: dict, user_id: str) -> dict:
     # If not found and user_id looks numeric, try employee_number
     if not row and user_id.isdigit():
         try:
-            resp = client.table("employees").select("*").eq("employee_number", int(user_id)).single().execute()
+            resp = await execute(client.table("employees").select("*").eq("employee_number", int(user_id)).single())
             row = resp.data
         except Exception:
             row = None
@@ -231,7 +233,7 @@ def enrich_profile_from_supabase(profile: dict, user_id: str) -> dict:
     # Fallback: if still not found, take the first employee row
     if not row:
         try:
-            resp = client.table("employees").select("*").limit(1).single().execute()
+            resp = await execute(client.table("employees").select("*").limit(1).single())
             row = resp.data
         except Exception:
             row = None
@@ -300,13 +302,26 @@ async def create_employees(employees: List[Employee]):
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_employees():
-    """Retrieve all employees"""
-    client = supabase
+async def get_all_employees(
+    response: Response,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns; default: all",
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams every row (export)"),
+):
+    """
+    List employees, one keyset page at a time (ordered by employee_number).
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
+    client = await get_async_supabase_client()
     if client:
         try:
-            resp = client.table("employees").select("*").execute()
-            return resp.data or []
+            return await list_rows(client, EMPLOYEES, response, fields, limit, after, format)
+        except HTTPException:
+            raise
         except Exception as exc:
             print(f"[employees] Supabase fetch all failed: {exc}")
     return []
@@ -323,7 +338,7 @@ async def get_employee_profile(employee_number: str):
         raise HTTPException(status_code=404, detail=f"Employee not found: {employee_number}")
 
     data = ensure_mapping(load_json_file("mock_user_profile.json"), "Mock profile")
-    data = enrich_profile_from_supabase(data, employee_number)
+    data = await enrich_profile_from_supabase(data, employee_number)
     data = ensure_mapping(data, "Profile data")
     return EmployeeProfile(**data)
 
@@ -339,32 +354,70 @@ async def get_current_employee(employee_number: int = Header(default=MOCK_EMPLOY
 @router.get("/{employee_number}", response_model=dict)
 async def get_employee(employee_number: int):
     """Retrieve a specific employee by number"""
-    client = supabase
+    client = await get_async_supabase_client()
     if not client:
         return {}
 
-    try:
-        # Base employee row
-        emp_resp = (
+    # Helper to strip heavy fields
+    def clean_position(pos: dict | None) -> dict | None:
+        if not isinstance(pos, dict):
+            return None
+        pos.pop("embedding", None)
+        return pos
+
+    async def fetch_position(position_id: int | str | None) -> dict | None:
+        if position_id is None:
+            return None
+        try:
+            resp = await execute(
+                client.table("positions")
+                .select("*")
+                .eq("position_id", position_id)
+                .single()
+            )
+            return clean_position(resp.data)
+        except Exception as exc:
+            print(f"[employees] positions lookup failed for {position_id}: {exc}")
+            return None
+
+    async def fetch_employee_with_position() -> tuple[dict | None, dict | None]:
+        # The position lookup only needs current_position, so it is chained right
+        # behind the employee row instead of waiting for the structured row too.
+        resp = await execute(
             client.table("employees")
             .select("*")
             .eq("employee_number", employee_number)
-            .single()
-            .execute()
+            .maybe_single()
         )
-        if not emp_resp.data:
-            raise HTTPException(status_code=404, detail=f"Employee not found: {employee_number}")
+        row = resp.data if resp else None
+        if not row:
+            return None, None
+        return row, await fetch_position(row.get("current_position"))
 
-        # Structured employee row (acts as joined data)
-        struct_resp = (
+    async def fetch_structured() -> dict | None:
+        resp = await execute(
             client.table("structured_employees")
             .select("*")
             .eq("employee_number", employee_number)
-            .single()
-            .execute()
+            .maybe_single()
         )
+        return resp.data if resp else None
+
+    try:
+        results = await fan_out({
+            "employee": fetch_employee_with_position(),
+            "structured": fetch_structured(),
+        })
+
+        # Base employee row is required; the structured row is optional enrichment
+        employee, current_position_record = results["employee"].unwrap()
+        if not employee:
+            raise HTTPException(status_code=404, detail=f"Employee not found: {employee_number}")
 
-        employee = emp_resp.data or {}
+        struct_result = results["structured"]
+        if not struct_result.ok:
+            print(f"[employees] /{employee_number} structured_employees lookup failed: {struct_result.error!r}")
+        struct_data = struct_result.value_or(None)
 
         # Ensure positions is always returned as a list (JSONB array of position_id/name pairs)
         if "positions" in employee and employee["positions"] is None:
@@ -372,38 +425,12 @@ async def get_employee(employee_number: int):
         elif "positions" not in employee:
             employee["positions"] = []
 
-        if struct_resp.data:
-            struct_data = struct_resp.data
+        if struct_data:
             if isinstance(struct_data, dict):
                 struct_data.pop("embedding", None)
             employee["structured_employees"] = struct_data
 
-        # Helper to strip heavy fields
-        def clean_position(pos: dict | None) -> dict | None:
-            if not isinstance(pos, dict):
-                return None
-            pos.pop("embedding", None)
-            return pos
-
-        def fetch_position(position_id: int | str | None) -> dict | None:
-            if position_id is None:
-                return None
-            try:
-                resp = (
-                    client.table("positions")
-                    .select("*")
-                    .eq("position_id", position_id)
-                    .single()
-                    .execute()
-                )
-                return clean_position(resp.data)
-            except Exception as exc:
-                print(f"[employees] positions lookup failed for {position_id}: {exc}")
-                return None
-
         # Resolve current_position name (keep for convenience)
-        current_position_id = employee.get("current_position")
-        current_position_record = fetch_position(current_position_id)
         if current_position_record and "position_name" in current_position_record:
             employee["current_position_name"] = current_position_record.get("position_name")
 
@@ -429,10 +456,11 @@ async def get_employee(employee_number: int):
 @router.put("/{employee_number}", response_model=Employee)
 async def update_employee(employee_number: int, employee: Employee):
     """Update an existing employee"""
-    client = supabase
+    client = await get_async_supabase_client()
     if client:
         try:
-            resp = client.table("employees").update(employee.model_dump()).eq("employee_number", employee_number).execute()
+            resp = await execute(client.table("employees").update(employee.model_dump()).eq("employee_number", employee_number))
+            invalidate_candidate(employee_number)
             return resp.data
         except Exception as exc:
             print(f"[employees] /{employee_number} Supabase update failed: {exc}")
@@ -444,7 +472,7 @@ async def update_employee_positions(employee_number: int, payload: EmployeePosit
     """
     Update the employee's liked_positions with the provided profile objects.
     """
-    client = supabase
+    client = await get_async_supabase_client()
     if not client:
         raise HTTPException(status_code=500, detail="Supabase client is not initialized.")
 
@@ -460,12 +488,12 @@ async def update_employee_positions(employee_number: int, payload: EmployeePosit
         if not update_payload:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        resp = (
+        resp = await execute(
             client.table("employees")
             .update(update_payload)
             .eq("employee_number", employee_number)
-            .execute()
         )
+        invalidate_candidate(employee_number)
         if not resp.data:
             raise HTTPException(status_code=404, detail=f"Employee not found: {employee_number}")
         return resp.data[0]
@@ -479,10 +507,11 @@ async def update_employee_positions(employee_number: int, payload: EmployeePosit
 @router.delete("/{employee_number}", status_code=204)
 async def delete_employee(employee_number: int):
     """Delete a specific employee"""
-    client = supabase
+    client = await get_async_supabase_client()
     if client:
         try:
-            resp = client.table("employees").delete().eq("employee_number", employee_number).execute()
+            resp = await execute(client.table("employees").delete().eq("employee_number", employee_number))
+            invalidate_candidate(employee_number)
             return resp.data
         except Exception as exc:
             print(f"[employees] /{employee_number} Supabase delete failed: {exc}")
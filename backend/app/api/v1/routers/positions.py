@@ -1,18 +1,16 @@
 """Positions API router."""
 
-import json
-from pathlib import Path
-from typing import List
-from fastapi import APIRouter, HTTPException, Header
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Header, Query, Response
 from pydantic import BaseModel
+from app.core.config import settings
 from app.models.Position import Position
-from app.services.supabase_client import get_supabase_client
+from app.services.cache import clear_all, invalidate_position
+from app.services.static_assets import static_assets
+from app.services.supabase_client import get_async_supabase_client, execute
+from app.services.table_pages import POSITIONS, list_rows
 
 router = APIRouter(prefix="/positions", tags=["positions"])
-supabase = get_supabase_client()
-
-# Data directory
-DATA_DIR = Path(__file__).parent.parent.parent.parent.parent / "data"
 
 # Hardcoded mock employee ID
 MOCK_POSITION_NUMBER = '70000501'
@@ -77,13 +75,12 @@ class MatchingPosition(BaseModel):
     match_summary: str | None = None
 
 
-def load_json_file(filename: str) -> dict | list:
-    """Load JSON data from file."""
-    filepath = DATA_DIR / filename
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail=f"Data file not found: {filename}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# Parsed once, indexed by id, reloaded when the file changes
+_matching_jobs = static_assets.asset(
+    "mock_matching_jobs.json",
+    parse=lambda jobs: [MatchingPosition(**job) for job in jobs],
+    key=lambda job: job.id,
+)
 
 
 # =====================
@@ -103,13 +100,26 @@ async def create_positions(positions: List[Position]):
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_positions():
-    """Retrieve all positions"""
-    client = supabase
+async def get_all_positions(
+    response: Response,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns; default: all except embedding/fulltext",
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams every row (export)"),
+):
+    """
+    List positions, one keyset page at a time (ordered by position_id).
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
+    client = await get_async_supabase_client()
     if client:
         try:
-            resp = client.table("positions").select("*").execute()
-            return resp.data or []
+            return await list_rows(client, POSITIONS, response, fields, limit, after, format)
+        except HTTPException:
+            raise
         except Exception as exc:
             print(f"[positions] Supabase fetch all failed: {exc}")
     return []
@@ -121,18 +131,22 @@ async def get_matching_positions():
     Get positions matching the current user's profile.
     Returns positions with match scores and requirements status.
     """
-    data = load_json_file("mock_matching_jobs.json")
-    return [MatchingPosition(**job) for job in data]
+    try:
+        return _matching_jobs.value()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.get("/matching/{position_id}", response_model=MatchingPosition)
 async def get_matching_position(position_id: str):
     """Get a specific matching position by ID."""
-    jobs = load_json_file("mock_matching_jobs.json")
-    for job in jobs:
-        if job["id"] == position_id:
-            return MatchingPosition(**job)
-    raise HTTPException(status_code=404, detail=f"Position not found: {position_id}")
+    try:
+        job = _matching_jobs.get(position_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Position not found: {position_id}")
+    return job
 
 @router.get("/me", response_model=dict)
 async def get_current_position(position_id: str = Header(default=MOCK_POSITION_NUMBER, alias="X-User-ID")):
@@ -145,11 +159,11 @@ async def get_current_position(position_id: str = Header(default=MOCK_POSITION_N
 @router.get("/{position_id}", response_model=dict)
 async def get_position(position_id: str):
     """Retrieve a specific position by ID"""
-    client = supabase
+    client = await get_async_supabase_client()
     position_data: dict = {}
     if client:
         try:
-            resp = client.table("positions").select("*").eq("position_id", position_id).single().execute()
+            resp = await execute(client.table("positions").select("*").eq("position_id", position_id).single())
             position_data = resp.data or {}
         except Exception as exc:
             print(f"[positions] /{position_id} Supabase fetch failed: {exc}")
@@ -160,16 +174,17 @@ async def get_position(position_id: str):
 @router.put("/{position_id}", response_model=Position)
 async def update_position(position_id: str, position: Position):
     """Update an existing position"""
+    invalidate_position(position_id)
     return position
 
 
 @router.delete("/{position_id}", status_code=204)
 async def delete_position(position_id: str):
     """Delete a specific position"""
-    pass
+    invalidate_position(position_id)
 
 
 @router.delete("/", status_code=204)
 async def delete_all_positions():
     """Delete all positions"""
-    pass
+    clear_all()
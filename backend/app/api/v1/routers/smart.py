@@ -1,32 +1,38 @@
 from __future__ import annotations
+import asyncio
+import hashlib
 import os
 import math
-from typing import List, Optional, Literal, Dict, Any, Union, cast
-from collections import Counter, defaultdict
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Literal, Dict, Any, Tuple, Union
 from xml.etree.ElementTree import indent
 
 from fastapi import APIRouter, Query, HTTPException
 from pydantic import BaseModel, Field
-from supabase import create_client, Client
-from dotenv import load_dotenv
 
-# LLM (LangChain)
-try:
-    from langchain_openai import ChatOpenAI  # type: ignore
-    from langchain_core.prompts import ChatPromptTemplate  # type: ignore
-except Exception:  # pragma: no cover - optional dependency at runtime
-    ChatOpenAI = None  # type: ignore
-    ChatPromptTemplate = None  # type: ignore
-
-load_dotenv()
+from app.core.config import settings
+from app.services.cache import (
+    cache_stats,
+    candidate_cache,
+    position_cache,
+    position_category_cache,
+    position_profiles_cache,
+    profile_cache,
+)
+from app.services.concurrency import fan_out
+from app.services.course_index import course_index
+from app.services.course_skills import course_skill_index, course_text
+from app.services.llm_cache import fingerprint, llm_cache
+from app.services.llm_gateway import LLMUnavailableError, llm_gateway
+from app.services.repository import get_repository
+from app.services.skill_gaps import STATUSES, SkillGapBatch, skill_gap_engine
+from app.services.sse import sse_response
+from app.services.vector_index import local_match_backend
 
 # -------------------------------------------------------------------
 # CONFIG
 # -------------------------------------------------------------------
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SUPABASE_KEY = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 router = APIRouter(prefix="/smart", tags=["smart"])
 colours = ["red", "blue", "green", "yellow", "orange"]
 
@@ -114,6 +120,15 @@ class LearningRecommendationModel(BaseModel):
     ids: List[int]
 
 
+class LearningPlanModel(BaseModel):
+    """mode=enrich: the courses are already picked, the LLM only writes the plan."""
+    plan: str
+
+
+# Bump whenever the learning recommendation prompt changes so cached plans are not reused
+LEARNING_PROMPT_VERSION = 1
+
+
 class LearningRecommendationResponse(BaseModel):
     plan: str
     courses: List[Course]
@@ -148,86 +163,146 @@ class SimilarCandidateResult(BaseModel):
 # -------------------------------------------------------------------
 
 
-def get_skill_gaps_by_candidate_and_profiles(
-    candidate_id: int,
-    profiles: List[Dict]
-) -> Dict[int, SkillGapForProfile]:
+def _compare_skills(
+    candidates: List[Dict[str, Any]],
+    requirements: List[Dict[str, Any]],
+    pairs: Optional[List[tuple[int, int]]] = None,
+) -> tuple[SkillGapBatch, SkillGapBatch]:
     """
-    profiles: list of RPC rows (at least profile_id, profile_name, position_id, etc.)
-    We will fetch the full profile from DB to get hard_skills / soft_skills.
+    Run the vectorized gap engine for hard and soft skills at once.
+
+    `candidates` / `requirements` are DB rows with `hard_skills` / `soft_skills`.
+    Without `pairs` every candidate is compared with every requirement
+    (pair index = candidate_index * len(requirements) + requirement_index).
     """
-    candidate = _get_candidate(candidate_id)
-    responses: Dict[int, SkillGapForProfile] = {}
+    cand_hard = [c.get("hard_skills") for c in candidates]
+    cand_soft = [c.get("soft_skills") for c in candidates]
+    req_hard = [r.get("hard_skills") for r in requirements]
+    req_soft = [r.get("soft_skills") for r in requirements]
+    return (
+        skill_gap_engine.compare("hard", cand_hard, req_hard, pairs),
+        skill_gap_engine.compare("soft", cand_soft, req_soft, pairs),
+    )
 
-    cand_hard = _parse_skills(candidate.get("hard_skills"))
-    cand_soft = _parse_skills(candidate.get("soft_skills"))
 
-    for profile_row in profiles:
-        profile_id = profile_row["profile_id"]
+def _skill_gaps(batch: SkillGapBatch, i: int) -> List[SkillGap]:
+    """Materialize SkillGap objects for a single pair of a batch."""
+    return [
+        SkillGap(skill=skill, candidate_level=cand, required_level=req, gap=gap, status=status)
+        for skill, cand, req, gap, status in batch.items(i)
+    ]
 
-        # fetch full profile with skills from DB
-        full_profile = _get_profile(profile_id)
 
-        req_hard = _parse_skills(full_profile.get("hard_skills"))
-        req_soft = _parse_skills(full_profile.get("soft_skills"))
+def _gap_summary(hard: SkillGapBatch, soft: SkillGapBatch, i: int, **extra: Any) -> Dict[str, Any]:
+    return {
+        "total_required_hard": int(hard.total_required[i]),
+        "total_required_soft": int(soft.total_required[i]),
+        "hard_status_counts": hard.status_counts(i),
+        "soft_status_counts": soft.status_counts(i),
+        **extra,
+    }
 
-        hard_gaps = _analyze_skill_gaps(cand_hard, req_hard)
-        soft_gaps = _analyze_skill_gaps(cand_soft, req_soft)
 
-        summary = {
-            "total_required_hard": len(req_hard),
-            "total_required_soft": len(req_soft),
-            "hard_status_counts": dict(Counter(g.status for g in hard_gaps)),
-            "soft_status_counts": dict(Counter(g.status for g in soft_gaps)),
-            "profile_id": profile_id,
-            "profile_name": full_profile.get("profile_name"),
-        }
+async def get_skill_gaps_by_candidate_and_profiles(
+    candidate_id: int,
+    profiles: List[Dict],
+    candidate: Optional[Dict[str, Any]] = None,
+    profiles_by_id: Optional[Dict[int, Dict[str, Any]]] = None,
+) -> Dict[int, SkillGapForProfile]:
+    """
+    profiles: list of RPC rows (at least profile_id, profile_name, position_id, etc.)
+
+    Full profiles (with hard_skills / soft_skills) are loaded with a single
+    batched query unless the caller already prefetched them in `profiles_by_id`.
+    """
+    if candidate is None:
+        candidate = await _get_candidate(candidate_id)
+    if profiles_by_id is None:
+        profiles_by_id = await _get_profiles([row["profile_id"] for row in profiles])
+
+    # Unique profiles in RPC order; profiles that vanished between the RPC and the lookup are skipped
+    profile_ids = [
+        pid for pid in dict.fromkeys(int(row["profile_id"]) for row in profiles)
+        if pid in profiles_by_id
+    ]
+    full_profiles = [profiles_by_id[pid] for pid in profile_ids]
+
+    hard, soft = _compare_skills([candidate], full_profiles)
 
+    responses: Dict[int, SkillGapForProfile] = {}
+    for i, (profile_id, profile) in enumerate(zip(profile_ids, full_profiles)):
         responses[profile_id] = SkillGapForProfile(
             profile_id=profile_id,
-            hard_skill_gaps=hard_gaps,
-            soft_skill_gaps=soft_gaps,
-            summary=summary,
+            hard_skill_gaps=_skill_gaps(hard, i),
+            soft_skill_gaps=_skill_gaps(soft, i),
+            summary=_gap_summary(
+                hard, soft, i,
+                profile_id=profile_id,
+                profile_name=profile.get("profile_name"),
+            ),
         )
 
     return responses
 
 
-def get_skill_gaps_for_candidates_and_profiles(
-    rows: List[Dict[str, Any]]
+async def get_skill_gaps_for_candidates_and_profiles(
+    rows: List[Dict[str, Any]],
+    candidates_by_id: Optional[Dict[int, Dict[str, Any]]] = None,
+    profiles_by_id: Optional[Dict[int, Dict[str, Any]]] = None,
 ) -> Dict[tuple[int, int], SkillGapForProfile]:
     """
     Given a list of RPC rows that include at least:
       - candidate_id
       - profile_id
 
-    Returns a dict keyed by (candidate_id, profile_id) -> SkillGapForProfile
-    using the existing get_skill_gaps_by_candidate_and_profiles helper.
-    """
-    profiles_by_candidate: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    Returns a dict keyed by (candidate_id, profile_id) -> SkillGapForProfile.
 
-    # group profiles per candidate
-    for row in rows:
-        cid = int(row["candidate_id"])
-        profiles_by_candidate[cid].append(row)
+    Candidates and profiles are fetched with one `in_()` query per table
+    (or taken from the prefetched maps), and the gaps for all returned pairs
+    are computed in a single vectorized pass.
+    """
+    if candidates_by_id is None:
+        candidates_by_id = await _get_candidates([row["candidate_id"] for row in rows])
+    if profiles_by_id is None:
+        profiles_by_id = await _get_profiles([row["profile_id"] for row in rows])
+
+    cand_ids = list(candidates_by_id.keys())
+    prof_ids = list(profiles_by_id.keys())
+    cand_pos = {cid: i for i, cid in enumerate(cand_ids)}
+    prof_pos = {pid: j for j, pid in enumerate(prof_ids)}
+
+    # Only the (candidate, profile) pairs that actually appear in the result page
+    keys = [
+        key for key in dict.fromkeys((int(row["candidate_id"]), int(row["profile_id"])) for row in rows)
+        if key[0] in cand_pos and key[1] in prof_pos
+    ]
+
+    hard, soft = _compare_skills(
+        [candidates_by_id[cid] for cid in cand_ids],
+        [profiles_by_id[pid] for pid in prof_ids],
+        pairs=[(cand_pos[cid], prof_pos[pid]) for cid, pid in keys],
+    )
 
     combined: Dict[tuple[int, int], SkillGapForProfile] = {}
-
-    for cid, candidate_profiles in profiles_by_candidate.items():
-        per_profile = get_skill_gaps_by_candidate_and_profiles(
-            candidate_id=cid,
-            profiles=candidate_profiles,
+    for i, (cid, pid) in enumerate(keys):
+        combined[(cid, pid)] = SkillGapForProfile(
+            profile_id=pid,
+            hard_skill_gaps=_skill_gaps(hard, i),
+            soft_skill_gaps=_skill_gaps(soft, i),
+            summary=_gap_summary(
+                hard, soft, i,
+                profile_id=pid,
+                profile_name=profiles_by_id[pid].get("profile_name"),
+            ),
         )
-        # per_profile: profile_id -> SkillGapForProfile
-        for pid, gap in per_profile.items():
-            combined[(cid, pid)] = gap
 
     return combined
 
 
-def get_skill_gaps_between_candidates(
+async def get_skill_gaps_between_candidates(
     base_candidate_id: int,
     similar_candidate_ids: List[int],
+    base_candidate: Optional[Dict[str, Any]] = None,
 ) -> Dict[int, CandidateSimilarityGap]:
     """
     Compute skill gaps between a base candidate and a list of similar candidates.
@@ -239,49 +314,42 @@ def get_skill_gaps_between_candidates(
         Dict[similar_candidate_id, CandidateSimilarityGap]
     """
     # Base candidate (the one we compare everyone to)
-    base_candidate = _get_candidate(base_candidate_id)
+    if base_candidate is None:
+        base_candidate = await _get_candidate(base_candidate_id)
     base_name = f"{base_candidate.get('first_name', '')} {base_candidate.get('last_name', '')}".strip()
 
-    base_hard = _parse_skills(base_candidate.get("hard_skills"))
-    base_soft = _parse_skills(base_candidate.get("soft_skills"))
+    # One batched lookup for all similar candidates
+    others = await _get_candidates(similar_candidate_ids)
+    other_ids = list(others.keys())
 
-    results: Dict[int, CandidateSimilarityGap] = {}
+    # Base candidate is the "required" reference
+    hard, soft = _compare_skills([others[cid] for cid in other_ids], [base_candidate])
 
-    # Deduplicate ids to avoid redundant DB calls
-    for cid in set(similar_candidate_ids):
-        other = _get_candidate(cid)
+    results: Dict[int, CandidateSimilarityGap] = {}
+    for i, cid in enumerate(other_ids):
+        other = others[cid]
         other_name = f"{other.get('first_name', '')} {other.get('last_name', '')}".strip() or None
 
-        cand_hard = _parse_skills(other.get("hard_skills"))
-        cand_soft = _parse_skills(other.get("soft_skills"))
-
-        # Base candidate is the "required" reference
-        hard_gaps = _analyze_skill_gaps(cand_hard, base_hard)
-        soft_gaps = _analyze_skill_gaps(cand_soft, base_soft)
-
-        summary = {
-            "total_required_hard": len(base_hard),
-            "total_required_soft": len(base_soft),
-            "hard_status_counts": dict(Counter(g.status for g in hard_gaps)),
-            "soft_status_counts": dict(Counter(g.status for g in soft_gaps)),
-            "reference_candidate_id": base_candidate_id,
-            "reference_candidate_name": base_name,
-        }
-
         results[cid] = CandidateSimilarityGap(
             candidate_id=cid,
             candidate_name=other_name,
-            hard_skill_gaps=hard_gaps,
-            soft_skill_gaps=soft_gaps,
-            summary=summary,
+            hard_skill_gaps=_skill_gaps(hard, i),
+            soft_skill_gaps=_skill_gaps(soft, i),
+            summary=_gap_summary(
+                hard, soft, i,
+                reference_candidate_id=base_candidate_id,
+                reference_candidate_name=base_name,
+            ),
         )
 
     return results
 
 
-def get_skill_gaps_between_profiles(
+async def get_skill_gaps_between_profiles(
     base_profile_id: int,
     similar_profile_ids: List[int],
+    base_profile: Optional[Dict[str, Any]] = None,
+    similar_profiles: Optional[Dict[int, Dict[str, Any]]] = None,
 ) -> Dict[int, SkillGapForProfile]:
     """
     Compute skill gaps between a base profile and a list of similar profiles.
@@ -291,38 +359,32 @@ def get_skill_gaps_between_profiles(
 
     Returns:
         Dict[similar_profile_id, SkillGapForProfile]
+
+    `base_profile` / `similar_profiles` may be passed in when the caller has
+    already loaded them, to avoid another round trip.
     """
-    base_profile = _get_profile(base_profile_id)
+    if base_profile is None:
+        base_profile = await _get_profile(base_profile_id)
     base_name = base_profile.get("profile_name")
 
-    req_hard = _parse_skills(base_profile.get("hard_skills"))
-    req_soft = _parse_skills(base_profile.get("soft_skills"))
+    # One batched lookup for all similar profiles
+    if similar_profiles is None:
+        similar_profiles = await _get_profiles(similar_profile_ids)
+    similar_ids = list(similar_profiles.keys())
 
-    results: Dict[int, SkillGapForProfile] = {}
-
-    for pid in set(similar_profile_ids):
-        similar_profile = _get_profile(pid)
-
-        cand_hard = _parse_skills(similar_profile.get("hard_skills"))
-        cand_soft = _parse_skills(similar_profile.get("soft_skills"))
-
-        hard_gaps = _analyze_skill_gaps(cand_hard, req_hard)
-        soft_gaps = _analyze_skill_gaps(cand_soft, req_soft)
-
-        summary = {
-            "total_required_hard": len(req_hard),
-            "total_required_soft": len(req_soft),
-            "hard_status_counts": dict(Counter(g.status for g in hard_gaps)),
-            "soft_status_counts": dict(Counter(g.status for g in soft_gaps)),
-            "reference_profile_id": base_profile_id,
-            "reference_profile_name": base_name,
-        }
+    hard, soft = _compare_skills([similar_profiles[pid] for pid in similar_ids], [base_profile])
 
+    results: Dict[int, SkillGapForProfile] = {}
+    for i, pid in enumerate(similar_ids):
         results[pid] = SkillGapForProfile(
             profile_id=pid,
-            hard_skill_gaps=hard_gaps,
-            soft_skill_gaps=soft_gaps,
-            summary=summary,
+            hard_skill_gaps=_skill_gaps(hard, i),
+            soft_skill_gaps=_skill_gaps(soft, i),
+            summary=_gap_summary(
+                hard, soft, i,
+                reference_profile_id=base_profile_id,
+                reference_profile_name=base_name,
+            ),
         )
 
     return results
@@ -352,76 +414,98 @@ def _normalize(
     return normalized
 
 
-def _get_candidate(candidate_id: int):
-    resp = (
-        supabase.table("structured_employees")
-        .select("employee_number, first_name, last_name, hard_skills, soft_skills")
-        .eq("employee_number", candidate_id)
-        .single()
-        .execute()
-    )
-    if not resp.data:
-        raise HTTPException(404, "Candidate not found")
-    return resp.data
+async def _get_candidate(candidate_id: int):
+    async def load():
+        row = await get_repository().candidate(candidate_id)
+        if not row:
+            raise HTTPException(404, "Candidate not found")
+        return row
 
+    return await candidate_cache.get_or_load(int(candidate_id), load)
 
-def _get_position(position_id: int):
+
+async def _get_position(position_id: int):
     """
     positions table columns (relevant):
     - position_id (bigint)
     - position_name (varchar)
     - description (text)
     """
-    resp = (
-        supabase.table("positions")
-        .select("position_id, position_name, description")
-        .eq("position_id", position_id)
-        .single()
-        .execute()
-    )
-    if not resp.data:
-        raise HTTPException(404, "Position not found")
-    return resp.data
+    async def load():
+        row = await get_repository().position(position_id)
+        if not row:
+            raise HTTPException(404, "Position not found")
+        return row
 
+    return await position_cache.get_or_load(int(position_id), load)
 
-def _get_profile(profile_id: int):
+
+async def _get_profile(profile_id: int):
     # NOTE: include description here so we can send it back in responses
-    resp = (
-        supabase.table("profiles")
-        .select(
-            "profile_id, position_id, profile_name, position_name, "
-            "description, hard_skills, soft_skills"
-        )
-        .eq("profile_id", profile_id)
-        .single()
-        .execute()
-    )
-    if not resp.data:
-        raise HTTPException(404, "Profile not found")
-    return resp.data
+    async def load():
+        row = await get_repository().profile(profile_id)
+        if not row:
+            raise HTTPException(404, "Profile not found")
+        return row
+
+    return await profile_cache.get_or_load(int(profile_id), load)
 
 
-def _get_profile_by_position_id(position_id: int):
+async def _get_profile_by_position_id(position_id: int):
     """
     Get the first profile for a position (MVP: 1 profile per position),
     used in /gaps and as base profile for /positions/similar.
     """
-    resp = (
-        supabase.table("profiles")
-        .select(
-            "profile_id, position_id, profile_name, position_name, "
-            "description, hard_skills, soft_skills"
-        )
-        .eq("position_id", position_id)
-        .limit(1_000)
-        .execute()
-    )
-    data = resp.data or []
+    data = await _get_profiles_for_position(position_id)
     if not data:
         raise HTTPException(404, "No profile for this position")
     return data[0]
 
 
+async def _get_candidates(candidate_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Batched version of `_get_candidate`: one query for the ids not in cache.
+    Missing candidates are simply absent from the returned map.
+    """
+    async def load(ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        rows = await get_repository().candidates(ids)
+        return {int(row["employee_number"]): row for row in rows}
+
+    ids = sorted({int(cid) for cid in candidate_ids})
+    if not ids:
+        return {}
+    return await candidate_cache.get_many_or_load(ids, load)
+
+
+async def _get_profiles(profile_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Batched version of `_get_profile`: one query for the ids not in cache.
+    Missing profiles are simply absent from the returned map.
+    """
+    async def load(ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        rows = await get_repository().profiles(ids)
+        return {int(row["profile_id"]): row for row in rows}
+
+    ids = sorted({int(pid) for pid in profile_ids})
+    if not ids:
+        return {}
+    return await profile_cache.get_many_or_load(ids, load)
+
+
+async def _get_position_categories(position_ids: List[int]) -> Dict[int, str]:
+    """
+    Batched version of `get_position_category`: position_id -> category ("" if unset).
+    """
+    async def load(ids: List[int]) -> Dict[int, str]:
+        rows = await get_repository().position_categories(ids)
+        return {int(row["position_id"]): row.get("category") or "" for row in rows}
+
+    ids = sorted({int(pid) for pid in position_ids})
+    if not ids:
+        return {}
+    return await position_category_cache.get_many_or_load(ids, load)
+
+
 def _parse_skills(skills_json):
     """
     skills_json is JSON / JSONB array like:
@@ -441,36 +525,6 @@ def _parse_skills(skills_json):
     return result
 
 
-def _analyze_skill_gaps(
-    candidate_skills: Dict[str, int],
-    required_skills: Dict[str, int]
-) -> List[SkillGap]:
-    gaps: List[SkillGap] = []
-    for skill_name, req_level in required_skills.items():
-        cand_level = candidate_skills.get(skill_name, 0)
-        gap_val = req_level - cand_level
-
-        if gap_val <= -1:
-            status = "strength"
-        elif gap_val == 0:
-            status = "meet"
-        elif 1 <= gap_val <= 2:
-            status = "upskill"
-        else:
-            status = "missing"
-
-        gaps.append(
-            SkillGap(
-                skill=skill_name,
-                candidate_level=cand_level,
-                required_level=req_level,
-                gap=gap_val,
-                status=status,
-            )
-        )
-    return gaps
-
-
 def _category_colour_for_position(
     position_id: int,
 ) -> Optional[Literal["red", "blue", "green", "yellow", "orange"]]:
@@ -484,40 +538,201 @@ def _category_colour_for_position(
     return colours[idx]
 
 
-def _get_profiles_for_position(position_id: int) -> List[Dict[str, Any]]:
+async def _get_profiles_for_position(position_id: int) -> List[Dict[str, Any]]:
     """
     Return ALL profiles for a given position_id.
     """
-    resp = (
-        supabase.table("profiles")
-        .select(
-            "profile_id, position_id, profile_name, position_name, "
-            "description, hard_skills, soft_skills"
-        )
-        .eq("position_id", position_id)
-        .execute()
-    )
-    return resp.data or []
+    async def load():
+        return await get_repository().profiles_for_position(position_id)
 
+    return await position_profiles_cache.get_or_load(int(position_id), load)
 
-def get_position_category(supabase: Client, position_id: int) -> Optional[str]:
+
+async def get_position_category(position_id: int) -> Optional[str]:
     """
     Given a position_id, return its category from the positions table.
     """
-    resp = (
-        supabase
-        .table("positions")
-        .select("category")
-        .eq("position_id", position_id)
-        .single()
-        .execute()
-    )
-    print(resp.data)
+    async def load():
+        rows = await get_repository().position_categories([position_id])
+        return (rows[0] if rows else {}).get("category") or ""
+
+    # Cached as "" when unset so the batched loader can share the same entries
+    return await position_category_cache.get_or_load(int(position_id), load) or None
+
+
+# Read-through variants over the precomputed top-k tables (MATCH_TOPK_TABLES)
+_TOPK_RPCS = {
+    "match_candidates_for_position": "match_candidates_for_position_topk",
+    "match_positions_for_candidate": "match_positions_for_candidate_topk",
+    "match_positions_for_candidate_detailed": "match_positions_for_candidate_detailed_topk",
+}
+
+
+async def _match(name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Run one of the match_* RPCs on the configured backend: the pgvector RPC
+    (through the configured repository) by default, or the in-process index
+    when MATCH_BACKEND=local. With MATCH_TOPK_TABLES the RPCs that have a
+    *_topk variant read the precomputed lists, which fall back to the live
+    RPC in SQL when stale.
+    """
+    if settings.MATCH_BACKEND == "local":
+        # Index search is CPU-bound numpy work: keep it off the event loop
+        return await asyncio.to_thread(local_match_backend.rpc, name, params)
+    if settings.MATCH_TOPK_TABLES:
+        name = _TOPK_RPCS.get(name, name)
+    return await get_repository().match(name, params)
+
+
+async def _get_courses() -> List[Dict[str, Any]]:
+    return await get_repository().courses()
+
 
-    if not resp.data:
+def _detail_rpcs() -> bool:
+    """Whether /positions/top and /positions/similar use the single-round-trip *_detailed RPCs."""
+    return settings.MATCH_DETAIL_RPCS and settings.MATCH_BACKEND != "local"
+
+
+# Fields every row of a match RPC must carry (the position RPCs by default)
+_RPC_REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "match_candidates_for_position": ("candidate_id", "profile_id", "score"),
+    "match_similar_candidates": ("candidate_id", "score"),
+}
+
+
+def _check_rpc_rows(name: str, rows: List[Dict[str, Any]]) -> None:
+    """Basic schema validation for safety (rows of the match RPCs)."""
+    required_fields = _RPC_REQUIRED_FIELDS.get(name, ("profile_id", "position_id", "score"))
+    for idx, row in enumerate(rows):
+        for field in required_fields:
+            if field not in row:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"RPC '{name}' missing field '{field}' in row {idx}",
+                )
+
+
+def _status_counts(gaps: List[SkillGap]) -> Dict[str, int]:
+    counts = Counter(gap.status for gap in gaps)
+    return {status: counts[status] for status in STATUSES if counts[status]}
+
+
+def _row_gaps(row: Dict[str, Any], **extra: Any) -> Optional[SkillGapForProfile]:
+    """
+    SkillGapForProfile from the gap columns of a *_detailed RPC row (same
+    summary as `_gap_summary`); None when the matched profile no longer exists.
+    """
+    if row.get("hard_skill_gaps") is None:
         return None
+    hard = [SkillGap(**gap) for gap in row["hard_skill_gaps"]]
+    soft = [SkillGap(**gap) for gap in row.get("soft_skill_gaps") or []]
+    return SkillGapForProfile(
+        profile_id=int(row["profile_id"]),
+        hard_skill_gaps=hard,
+        soft_skill_gaps=soft,
+        summary={
+            "total_required_hard": len(hard),
+            "total_required_soft": len(soft),
+            "hard_status_counts": _status_counts(hard),
+            "soft_status_counts": _status_counts(soft),
+            **extra,
+        },
+    )
+
+
+async def _top_positions_detailed(candidate_id: int, limit: int) -> List[MatchResult]:
+    """/positions/top from match_positions_for_candidate_detailed: one query, rows only reshaped here."""
+    name = "match_positions_for_candidate_detailed"
+    rows = await _match(name, {"p_candidate_id": candidate_id, "p_limit": limit})
+    if not rows:
+        # No rows either means no matches or an unknown candidate (404)
+        await _get_candidate(candidate_id)
+        return []
+    _check_rpc_rows(name, rows)
+
+    results: List[MatchResult] = []
+    for row, norm_score in zip(rows, _normalize([float(row["score"]) for row in rows])):
+        profile_id = int(row["profile_id"])
+        position_id = int(row["position_id"])
+        category = row.get("category") or ""
+        # match_profile_name comes from the match RPC, profile_name from the profiles table
+        profile_name = row.get("match_profile_name") or row.get("profile_name") or ""
+        gaps = _row_gaps(row, profile_id=profile_id, profile_name=row.get("profile_name"))
+        results.append(
+            MatchResult(
+                candidate_id=candidate_id,
+                candidate_name=row.get("candidate_name"),
+                position_id=position_id,
+                profile_id=profile_id,
+                category=category,
+                category_colour=_category_colour_for_position(position_id) if category else None,
+                profile_name=str(profile_name),
+                profile_description=str(row.get("profile_description") or ""),
+                position_name=str(row.get("position_name") or ""),
+                score=norm_score,
+                gaps=gaps,
+                experience_match=gaps,
+            )
+        )
+    return results
 
-    return resp.data.get("category")
+
+async def _similar_positions_detailed(position_id: int, limit: int) -> List[PositionsSimilar]:
+    """/positions/similar from match_similar_positions_detailed: one query, rows only reshaped here."""
+    name = "match_similar_positions_detailed"
+    rows = await _match(name, {"p_position_id": position_id, "p_limit": limit})
+    if not rows:
+        # Unknown position / position without a profile are 404s, as in the regular path
+        await _get_position(position_id)
+        await _get_profile_by_position_id(position_id)
+        return []
+    _check_rpc_rows(name, rows)
+
+    results: List[PositionsSimilar] = []
+    for row, norm_score in zip(rows, _normalize([float(row["score"]) for row in rows])):
+        similar_position_id = int(row["position_id"])
+        category = row.get("category") or ""
+        gaps = _row_gaps(
+            row,
+            reference_profile_id=row.get("reference_profile_id"),
+            reference_profile_name=row.get("reference_profile_name"),
+        )
+        results.append(
+            PositionsSimilar(
+                position_id=similar_position_id,
+                profile_id=int(row["profile_id"]),
+                category=category,
+                category_colour=_category_colour_for_position(similar_position_id) if category else None,
+                profile_name=str(row.get("match_profile_name") or row.get("profile_name") or ""),
+                profile_description=str(row.get("profile_description") or ""),
+                position_name=str(row.get("position_name") or ""),
+                score=norm_score,
+                gaps=gaps,
+                experience_match=gaps,
+            )
+        )
+    return results
+
+
+def _fast_plan(
+    picks: List[tuple[int, List[str]]],
+    id_to_course: Dict[int, Course],
+    open_gaps: List[tuple[str, float]],
+) -> str:
+    """Templated plan for mode=fast: one bullet per picked course, then any gaps left uncovered."""
+    if not open_gaps:
+        return "- No open skill gaps for this profile."
+    lines = [
+        f"- {id_to_course[cid].name}: addresses {', '.join(skills)}"
+        for cid, skills in picks
+    ]
+    covered = {skill for _, skills in picks for skill in skills}
+    uncovered = [
+        skill for skill, _ in sorted(open_gaps, key=lambda g: -g[1]) if skill.strip().lower() not in covered
+    ]
+    if uncovered:
+        lines.append(f"- No course in the catalog covers: {', '.join(uncovered)}")
+    return "\n".join(lines)
 
 
 # -------------------------------------------------------------------
@@ -526,65 +741,60 @@ def get_position_category(supabase: Client, position_id: int) -> Optional[str]:
 
 # 1️⃣ Top candidates for a position (profile → employees)
 @router.get("/candidates/top", response_model=List[MatchResult])
-def get_top_candidates_for_position(
+async def get_top_candidates_for_position(
     position_id: int = Query(...),
     limit: int = Query(10, ge=1, le=100),
 ):
-    # 1) Validate position exists (for name / 404)
-    position = _get_position(position_id)
-
-    # 2) Fetch category once for this position
-    category = get_position_category(supabase, position_id) or ""
+    # 1) Position (for name / 404), its category and the RPC
+    #    (match_candidates_for_position) are independent, so run them concurrently
+    res = await fan_out({
+        "position": _get_position(position_id),
+        "category": get_position_category(position_id),
+        "rpc": _match("match_candidates_for_position", {"p_position_id": position_id, "p_limit": limit}),
+    })
+    position = res["position"].unwrap()
+
+    # 2) Category is optional enrichment: a failed lookup just leaves it empty
+    category = res["category"].value_or(None) or ""
     category_colour = _category_colour_for_position(position_id) if category else None
 
-    # 3) Call RPC: match_candidates_for_position
-    rpc = supabase.rpc(
-        "match_candidates_for_position",
-        {"p_position_id": position_id, "p_limit": limit},
-    ).execute()
-
-    rows = rpc.data or []
+    # 3) RPC rows
+    rows = res["rpc"].unwrap()
 
     if not rows:
         return []
 
     # 4) Basic schema validation for safety
-    required_fields = ["candidate_id", "profile_id", "score"]
-    for idx, row in enumerate(rows):
-        for field in required_fields:
-            if field not in row:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"RPC 'match_candidates_for_position' missing field '{field}' in row {idx}",
-                )
+    _check_rpc_rows("match_candidates_for_position", rows)
 
     # 5) Normalize scores with logistic mapping (absolute, not batch-based)
     scores = [float(row["score"]) for row in rows]
     norm_scores = _normalize(scores)
 
-    # 6) Compute gaps for ALL (candidate, profile) pairs in these rows
-    gaps_map = get_skill_gaps_for_candidates_and_profiles(rows)
+    # 6) Load every candidate and profile of this page in one query per table (concurrently)
+    res = await fan_out({
+        "candidates": _get_candidates([row["candidate_id"] for row in rows]),
+        "profiles": _get_profiles([row["profile_id"] for row in rows]),
+    })
+    candidates_by_id = res["candidates"].unwrap()
+    profiles_by_id = res["profiles"].unwrap()
+
+    # 7) Compute gaps for ALL (candidate, profile) pairs in these rows
+    gaps_map = await get_skill_gaps_for_candidates_and_profiles(
+        rows,
+        candidates_by_id=candidates_by_id,
+        profiles_by_id=profiles_by_id,
+    )
     # gaps_map key: (candidate_id, profile_id) -> SkillGapForProfile
 
-    # 7) Cache profiles and candidates to avoid repeated DB calls
-    profile_cache: Dict[int, Dict[str, Any]] = {}
-    candidate_cache: Dict[int, Dict[str, Any]] = {}
-
     results: List[MatchResult] = []
 
     for row, norm_score in zip(rows, norm_scores):
         candidate_id = int(row["candidate_id"])
         profile_id = int(row["profile_id"])
 
-        # cache profile
-        if profile_id not in profile_cache:
-            profile_cache[profile_id] = _get_profile(profile_id)
-        profile = profile_cache[profile_id]
-
-        # cache candidate to get candidate_name
-        if candidate_id not in candidate_cache:
-            candidate_cache[candidate_id] = _get_candidate(candidate_id)
-        cand = candidate_cache[candidate_id]
+        profile = profiles_by_id.get(profile_id, {})
+        cand = candidates_by_id.get(candidate_id, {})
         candidate_name = (
             f"{cand.get('first_name', '')} {cand.get('last_name', '')}".strip() or None
         )
@@ -614,32 +824,23 @@ def get_top_candidates_for_position(
 
 # 2️⃣ Similar candidates (employee → employees)
 @router.get("/candidates/similar", response_model=List[SimilarCandidateResult])
-def get_similar_candidates(
+async def get_similar_candidates(
     candidate_id: int = Query(...),
     limit: int = Query(10, ge=1, le=100),
 ):
-    # 1) Validate base candidate exists
-    _ = _get_candidate(candidate_id)
-
-    # 2) Call RPC
-    rpc = supabase.rpc(
-        "match_similar_candidates",
-        {"p_candidate_id": candidate_id, "p_limit": limit},
-    ).execute()
-
-    rows = rpc.data or []
+    # 1) Validate base candidate exists + 2) call RPC, concurrently
+    res = await fan_out({
+        "candidate": _get_candidate(candidate_id),
+        "rpc": _match("match_similar_candidates", {"p_candidate_id": candidate_id, "p_limit": limit}),
+    })
+    base_candidate = res["candidate"].unwrap()
+
+    rows = res["rpc"].unwrap()
     if not rows:
         return []
 
     # 3) Basic schema validation
-    required_fields = ["candidate_id", "score"]
-    for idx, row in enumerate(rows):
-        for field in required_fields:
-            if field not in row:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"RPC 'match_similar_candidates' missing field '{field}' in row {idx}",
-                )
+    _check_rpc_rows("match_similar_candidates", rows)
 
     # 4) Normalize scores (logistic, batch-independent)
     scores = [float(row["score"]) for row in rows]
@@ -647,9 +848,10 @@ def get_similar_candidates(
 
     # 5) Compute gaps between base candidate and all similar candidates
     similar_ids = [int(r["candidate_id"]) for r in rows]
-    gaps_map = get_skill_gaps_between_candidates(
+    gaps_map = await get_skill_gaps_between_candidates(
         base_candidate_id=candidate_id,
         similar_candidate_ids=similar_ids,
+        base_candidate=base_candidate,
     )
 
     results: List[SimilarCandidateResult] = []
@@ -684,65 +886,59 @@ def get_similar_candidates(
     "/positions/top",
     response_model=List[MatchResult],
 )
-def get_top_positions_for_candidate(
+async def get_top_positions_for_candidate(
     candidate_id: int = Query(...),
     limit: int = Query(10, ge=1, le=100),
 ):
-    # 1) Validate candidate exists (404 if missing) + get their record
-    candidate = _get_candidate(candidate_id)
+    if _detail_rpcs():
+        return await _top_positions_detailed(candidate_id, limit)
+
+    # 1) Validate candidate exists (404 if missing) + get their record,
+    # 2) concurrently with the RPC: match_positions_for_candidate
+    res = await fan_out({
+        "candidate": _get_candidate(candidate_id),
+        "rpc": _match("match_positions_for_candidate", {"p_candidate_id": candidate_id, "p_limit": limit}),
+    })
+    candidate = res["candidate"].unwrap()
     candidate_name = (
         f"{candidate.get('first_name', '')} {candidate.get('last_name', '')}".strip() or None
     )
 
-    # 2) Call RPC: match_positions_for_candidate
-    rpc = supabase.rpc(
-        "match_positions_for_candidate",
-        {"p_candidate_id": candidate_id, "p_limit": limit},
-    ).execute()
-
-    rows = rpc.data or []
+    rows = res["rpc"].unwrap()
     if not rows:
         return []
 
     # 3) Basic schema validation for safety
-    required_fields = ["profile_id", "position_id", "score"]
-    for idx, row in enumerate(rows):
-        for field in required_fields:
-            if field not in row:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"RPC 'match_positions_for_candidate' missing field '{field}' in row {idx}",
-                )
+    _check_rpc_rows("match_positions_for_candidate", rows)
 
-    # 4) Precompute categories per position (avoid repeated DB calls)
-    unique_position_ids = {int(row["position_id"]) for row in rows}
-    category_map: Dict[int, str] = {}
-    for pos_id in unique_position_ids:
-        category_map[pos_id] = get_position_category(supabase, pos_id) or ""
+    # 4) Categories for all positions + all profiles, one query each (concurrently);
+    # categories are optional enrichment
+    res = await fan_out({
+        "categories": _get_position_categories([row["position_id"] for row in rows]),
+        "profiles": _get_profiles([row["profile_id"] for row in rows]),
+    })
+    category_map = res["categories"].value_or({})
+    profiles_by_id = res["profiles"].unwrap()
 
     # 5) Normalize scores using logistic mapping (batch-independent)
     scores = [float(row["score"]) for row in rows]
     norm_scores = _normalize(scores)
 
-    # 6) Compute skill gaps once for all profiles in this result
-    gaps = get_skill_gaps_by_candidate_and_profiles(
+    # 6) Compute skill gaps from the loaded profile rows
+    gaps = await get_skill_gaps_by_candidate_and_profiles(
         candidate_id=candidate_id,
         profiles=rows,
+        candidate=candidate,
+        profiles_by_id=profiles_by_id,
     )
 
-    # 7) Cache profiles to avoid repeated DB calls
-    profile_cache: Dict[int, Dict[str, Any]] = {}
-
     results: List[MatchResult] = []
 
     for row, norm_score in zip(rows, norm_scores):
         profile_id = int(row["profile_id"])
         position_id = int(row["position_id"])
 
-        # cache profile
-        if profile_id not in profile_cache:
-            profile_cache[profile_id] = _get_profile(profile_id)
-        profile = profile_cache[profile_id]
+        profile = profiles_by_id.get(profile_id, {})
 
         # category + colour for this position
         category = category_map.get(position_id, "")
@@ -778,24 +974,26 @@ def get_top_positions_for_candidate(
 @router.get(
     "/positions/similar",
     response_model=List[PositionsSimilar])
-def get_similar_positions(
+async def get_similar_positions(
     position_id: int = Query(...),
     limit: int = Query(10, ge=1, le=100),
 ):
-    # 1) Validate base position exists (404 if not)
-    _ = _get_position(position_id)
-
-    # 1a) Determine base profile for this position (reference profile)
-    base_profile = _get_profile_by_position_id(position_id)
+    if _detail_rpcs():
+        return await _similar_positions_detailed(position_id, limit)
+
+    # 1) Validate base position exists (404 if not),
+    # 1a) determine base profile for this position (reference profile) and
+    # 2) call RPC: match_similar_positions -- all independent, run concurrently
+    res = await fan_out({
+        "position": _get_position(position_id),
+        "base_profile": _get_profile_by_position_id(position_id),
+        "rpc": _match("match_similar_positions", {"p_position_id": position_id, "p_limit": limit}),
+    })
+    _ = res["position"].unwrap()
+    base_profile = res["base_profile"].unwrap()
     base_profile_id = int(base_profile["profile_id"])
 
-    # 2) Call RPC: match_similar_positions
-    rpc = supabase.rpc(
-        "match_similar_positions",
-        {"p_position_id": position_id, "p_limit": limit},
-    ).execute()
-
-    rows = rpc.data or []
+    rows = res["rpc"].unwrap()
     if not rows:
         return []
 
@@ -804,20 +1002,16 @@ def get_similar_positions(
     #   - profile_id (similar profile)
     #   - position_id (the similar position)
     #   - score
-    required_fields = ["profile_id", "position_id", "score"]
-    for idx, row in enumerate(rows):
-        for field in required_fields:
-            if field not in row:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"RPC 'match_similar_positions' missing field '{field}' in row {idx}",
-                )
+    _check_rpc_rows("match_similar_positions", rows)
 
-    # 4) Precompute categories per position (avoid repeated DB calls)
-    unique_position_ids = {int(row["position_id"]) for row in rows}
-    category_map: Dict[int, str] = {}
-    for pos_id in unique_position_ids:
-        category_map[pos_id] = get_position_category(supabase, pos_id) or ""
+    # 4) Categories for all positions + all similar profiles, one query each (concurrently)
+    similar_profile_ids = [int(r["profile_id"]) for r in rows]
+    res = await fan_out({
+        "categories": _get_position_categories([row["position_id"] for row in rows]),
+        "profiles": _get_profiles(similar_profile_ids),
+    })
+    category_map = res["categories"].value_or({})
+    profiles_by_id = res["profiles"].unwrap()
 
     # 5) Normalize scores using logistic mapping (batch-independent)
     scores = [float(row["score"]) for row in rows]
@@ -825,25 +1019,20 @@ def get_similar_positions(
 
     # 6) Compute profile-vs-profile gaps:
     # base_profile_id (reference) vs each similar profile_id in rows
-    similar_profile_ids = [int(r["profile_id"]) for r in rows]
-    profile_gaps_map = get_skill_gaps_between_profiles(
+    profile_gaps_map = await get_skill_gaps_between_profiles(
         base_profile_id=base_profile_id,
         similar_profile_ids=similar_profile_ids,
+        base_profile=base_profile,
+        similar_profiles=profiles_by_id,
     )
 
-    # 7) Cache profiles to avoid repeated DB calls
-    profile_cache: Dict[int, Dict[str, Any]] = {}
-
     results: List[PositionsSimilar] = []
 
     for row, norm_score in zip(rows, norm_scores):
         profile_id = int(row["profile_id"])
         similar_position_id = int(row["position_id"])
 
-        # Cache profile
-        if profile_id not in profile_cache:
-            profile_cache[profile_id] = _get_profile(profile_id)
-        profile = profile_cache[profile_id]
+        profile = profiles_by_id.get(profile_id, {})
 
         # category + colour for this similar position
         category = category_map.get(similar_position_id, "")
@@ -880,86 +1069,120 @@ def get_similar_positions(
 # 5️⃣ Skill gap analysis (candidate vs ALL profiles for a position)
 # -------------------------------------------------------------------
 @router.get("/gaps", response_model=List[SkillGapResponse])
-def get_skill_gaps(
+async def get_skill_gaps(
     candidate_id: int = Query(...),
     position_id: int = Query(...),
 ):
-    candidate = _get_candidate(candidate_id)
-    position = _get_position(position_id)
-
-    # All profiles for this position
-    profiles = _get_profiles_for_position(position_id)
+    # Candidate, position and all profiles for this position, concurrently
+    res = await fan_out({
+        "candidate": _get_candidate(candidate_id),
+        "position": _get_position(position_id),
+        "profiles": _get_profiles_for_position(position_id),
+    })
+    candidate = res["candidate"].unwrap()
+    position = res["position"].unwrap()
+    profiles = res["profiles"].unwrap()
 
     cand_name = f"{candidate.get('first_name', '')} {candidate.get('last_name', '')}".strip()
     pos_name = position["position_name"]
-    # Candidate skills
-    cand_hard = _parse_skills(candidate.get("hard_skills"))
-    cand_soft = _parse_skills(candidate.get("soft_skills"))
 
     if not profiles:
         raise HTTPException(status_code=404, detail="No profiles found for this position")
 
-    responses: List[SkillGapResponse] = []
-
-    for profile in profiles:
-        req_hard = _parse_skills(profile.get("hard_skills"))
-        req_soft = _parse_skills(profile.get("soft_skills"))
+    # Candidate vs every profile in one vectorized pass
+    hard, soft = _compare_skills([candidate], profiles)
 
-        hard_gaps = _analyze_skill_gaps(cand_hard, req_hard)
-        soft_gaps = _analyze_skill_gaps(cand_soft, req_soft)
-
-        summary = {
-            "total_required_hard": len(req_hard),
-            "total_required_soft": len(req_soft),
-            "hard_status_counts": dict(Counter(g.status for g in hard_gaps)),
-            "soft_status_counts": dict(Counter(g.status for g in soft_gaps)),
-            "profile_id": profile["profile_id"],
-            "profile_name": profile.get("profile_name"),
-        }
+    responses: List[SkillGapResponse] = []
 
+    for i, profile in enumerate(profiles):
         responses.append(
             SkillGapResponse(
                 candidate_id=candidate_id,
                 position_id=position_id,
                 candidate_name=cand_name or None,
                 position_name=pos_name,
-                hard_skill_gaps=hard_gaps,
-                soft_skill_gaps=soft_gaps,
-                summary=summary,
+                hard_skill_gaps=_skill_gaps(hard, i),
+                soft_skill_gaps=_skill_gaps(soft, i),
+                summary=_gap_summary(
+                    hard, soft, i,
+                    profile_id=profile["profile_id"],
+                    profile_name=profile.get("profile_name"),
+                ),
             )
         )
 
     return responses
 
 
-@router.post("/learning_recommendations", response_model=LearningRecommendationResponse)
-def get_learning_recommendations(employee_number: int, profile_id: int):
-    """
-    Build a prompt with employee info, target profile, skill gaps and available courses,
-    then use LangChain `with_structured_output` to get a LearningRecommendationModel,
-    finally return a LearningRecommendationResponse with plan and concrete course objects.
-    """
-    # 1) Fetch data
-    employee = _get_candidate(employee_number)
-    profile = _get_profile(profile_id)
+@router.get("/cache/stats", response_model=Dict[str, Dict[str, Any]])
+async def get_cache_stats():
+    """Hit/miss counters and sizes of the in-process reference data caches and the LLM response cache."""
+    stats = cache_stats()
+    if llm_cache is not None:
+        stats["llm_responses"] = llm_cache.stats()
+    return stats
 
-    # 2) Parse skills and compute gaps
-    cand_hard = _parse_skills(employee.get("hard_skills"))
-    cand_soft = _parse_skills(employee.get("soft_skills"))
-    req_hard = _parse_skills(profile.get("hard_skills"))
-    req_soft = _parse_skills(profile.get("soft_skills"))
 
-    hard_gaps = _analyze_skill_gaps(cand_hard, req_hard)
-    soft_gaps = _analyze_skill_gaps(cand_soft, req_soft)
+@dataclass
+class _LearningRequest:
+    """Everything a learning recommendation needs once the employee, profile and catalog are loaded."""
+    profile_id: int
+    profile_name: str
+    cand_hard: Dict[str, int]
+    cand_soft: Dict[str, int]
+    req_hard: Dict[str, int]
+    req_soft: Dict[str, int]
+    hard_gaps: List[SkillGap]
+    soft_gaps: List[SkillGap]
+    id_to_course: Dict[int, Course]
+    open_gaps: List[tuple[str, float]]
+    course_texts: Dict[int, str]
+
+    def to_response(self, rec: LearningRecommendationModel) -> LearningRecommendationResponse:
+        # Map ids back to Course objects and build response
+        selected_courses: List[Course] = []
+        for cid in rec.ids:
+            if cid in self.id_to_course:
+                selected_courses.append(self.id_to_course[cid])
+        return LearningRecommendationResponse(plan=rec.plan, courses=selected_courses)
+
+
+@dataclass
+class _LearningPrompt:
+    shortlist: List[int]
+    model_name: str
+    cache_key: str
+    messages: List[Dict[str, str]]
+    ranked: bool = False  # courses picked by the course-skill index; the LLM writes only the plan
+
+    @property
+    def schema(self) -> type[BaseModel]:
+        return LearningPlanModel if self.ranked else LearningRecommendationModel
+
+    def recommendation(self, data: Dict[str, Any]) -> LearningRecommendationModel:
+        if self.ranked:
+            return LearningRecommendationModel(plan=data["plan"], ids=self.shortlist)
+        return LearningRecommendationModel(**data)
+
+
+async def _learning_request(employee_number: int, profile_id: int) -> _LearningRequest:
+    # 1) Fetch data (employee, profile and courses catalog are independent)
+    res = await fan_out({
+        "employee": _get_candidate(employee_number),
+        "profile": _get_profile(profile_id),
+        "courses": _get_courses(),
+    })
+    employee = res["employee"].unwrap()
+    profile = res["profile"].unwrap()
 
-    # 3) Fetch courses catalog (assume courses table / endpoint exists)
-    try:
-        courses_resp = (
-            supabase.table("courses").select("id, course_name, course_description").execute()
-        )
-        courses_data = courses_resp.data or []
-    except Exception:  # fallback empty catalog if table absent
-        courses_data = []
+    # 2) Parse skills and compute gaps
+    hard, soft = _compare_skills([employee], [profile])
+    hard_gaps = _skill_gaps(hard, 0)
+    soft_gaps = _skill_gaps(soft, 0)
+
+    # 3) Courses catalog (assume courses table / endpoint exists);
+    # fallback empty catalog if table absent
+    courses_data = res["courses"].value_or([])
 
     # Map id->course for quick lookup later
     id_to_course: Dict[int, Course] = {}
@@ -973,24 +1196,55 @@ def get_learning_recommendations(employee_number: int, profile_id: int):
             )
         except Exception:
             continue
-    print(id_to_course)
-
-    # 4) Prepare LLM
-    if ChatOpenAI is None or ChatPromptTemplate is None:
-        raise HTTPException(status_code=500, detail="LLM dependencies are not available on server")
 
-    openai_key = os.environ.get("OPENAI_API_KEY")
-    if not openai_key:
-        raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not configured")
+    return _LearningRequest(
+        profile_id=profile_id,
+        profile_name=str(profile.get("profile_name") or profile.get("position_name") or ""),
+        cand_hard=_parse_skills(employee.get("hard_skills")),
+        cand_soft=_parse_skills(employee.get("soft_skills")),
+        req_hard=_parse_skills(profile.get("hard_skills")),
+        req_soft=_parse_skills(profile.get("soft_skills")),
+        hard_gaps=hard_gaps,
+        soft_gaps=soft_gaps,
+        id_to_course=id_to_course,
+        open_gaps=[(g.skill, float(g.gap)) for g in hard_gaps + soft_gaps if g.gap > 0],
+        course_texts={cid: course_text(c.name, c.description) for cid, c in id_to_course.items()},
+    )
 
-    model_name = os.environ.get("OPENAI_MODEL", "gpt-4o")
-    llm = ChatOpenAI(model=model_name, temperature=0.2)
-    structured_llm = llm.with_structured_output(LearningRecommendationModel)
 
-    # 5) Build prompt
-    employee_name = f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip()
-    profile_name = str(profile.get("profile_name") or profile.get("position_name") or "")
+async def _learning_prompt(
+    req: _LearningRequest,
+    picks: Optional[List[tuple[int, List[str]]]] = None,
+) -> _LearningPrompt:
+    """
+    Prompt for an LLM-written plan. Without `picks` the LLM also selects the courses
+    from an embedding shortlist; with `picks` (course id, gaps it addresses) from the
+    course-skill index the courses are fixed and the LLM only writes the plan.
+    """
+    # 4) Shortlist the courses closest to the open gaps so the prompt stays bounded
+    #    as the catalog grows (course embeddings are rebuilt when the catalog changes)
+    catalog_version = hashlib.sha256(
+        "\n".join(f"{cid}\t{c.name}\t{c.description}" for cid, c in sorted(req.id_to_course.items())).encode("utf-8")
+    ).hexdigest()
+    if picks is None:
+        shortlist = await asyncio.to_thread(course_index.shortlist, req.course_texts, catalog_version, req.open_gaps)
+    else:
+        shortlist = [cid for cid, _ in picks]
 
+    # 5) Cache key: same gaps, skills, target profile and course shortlist (or picks)
+    model_name = os.environ.get("OPENAI_MODEL", "gpt-4o")
+    key_data: Dict[str, Any] = {
+        "profile_id": req.profile_id,
+        "skills": [req.cand_hard, req.cand_soft, req.req_hard, req.req_soft],
+        "gaps": [[g.model_dump() for g in req.hard_gaps], [g.model_dump() for g in req.soft_gaps]],
+        "catalog": catalog_version,
+        "courses": shortlist,
+    }
+    if picks is not None:
+        key_data["picks"] = picks
+    cache_key = fingerprint("learning_recommendations", model_name, LEARNING_PROMPT_VERSION, key_data)
+
+    # 6) Build prompt (no employee identity, so the plan can be reused for identical gaps)
     def gaps_block(title: str, gaps: List[SkillGap]) -> str:
         lines = [title + ":"]
         if not gaps:
@@ -1011,51 +1265,166 @@ def get_learning_recommendations(employee_number: int, profile_id: int):
                 lines.append(f"  - {k}: {v}")
         return "\n".join(lines)
 
-    courses_block_lines = ["Available courses (choose relevant by ID):"]
-    if id_to_course:
-        for cid, course in sorted(id_to_course.items(), key=lambda x: x[0]):
+    if picks is None:
+        courses_block_lines = ["Available courses (choose relevant by ID):"]
+        for cid in shortlist:
+            course = req.id_to_course[cid]
             courses_block_lines.append(f"  - [{cid}] {course.name}: {course.description}")
+        output_line = "Return a structured response with a textual plan and a list of course IDs that best address the gaps."
+        course_instruction = "- Select 1-3 course IDs that directly help close the most important gaps."
     else:
+        courses_block_lines = ["Selected courses, most impactful first (already chosen, do not change):"]
+        for cid, skills in picks:
+            course = req.id_to_course[cid]
+            courses_block_lines.append(
+                f"  - [{cid}] {course.name}: {course.description} (addresses: {', '.join(skills)})"
+            )
+        output_line = "Return a structured response with the textual plan only; the courses are already selected."
+        course_instruction = "- Build the plan around the selected courses, in order; do not suggest other courses."
+    if not shortlist:
         courses_block_lines.append("  - (no courses available)")
     courses_block = "\n".join(courses_block_lines)
-    print(courses_block)
 
     full_prompt = "\n".join(
         [
             "You are an expert learning and development advisor.",
             "Given the employee's current skills and the target profile requirements,",
             "analyze the gaps and propose a concise, actionable learning plan.",
-            "Return a structured response with a textual plan and a list of course IDs that best address the gaps.",
+            output_line,
             "\nContext:",
-            f"Employee: {employee_name} (#{employee_number})",
-            f"Target profile: {profile_name} (#{profile_id})",
-            dict_block("Candidate hard skills", cand_hard),
-            dict_block("Candidate soft skills", cand_soft),
-            dict_block("Required hard skills", req_hard),
-            dict_block("Required soft skills", req_soft),
-            gaps_block("Hard skill gaps", hard_gaps),
-            gaps_block("Soft skill gaps", soft_gaps),
+            f"Target profile: {req.profile_name} (#{req.profile_id})",
+            dict_block("Candidate hard skills", req.cand_hard),
+            dict_block("Candidate soft skills", req.cand_soft),
+            dict_block("Required hard skills", req.req_hard),
+            dict_block("Required soft skills", req.req_soft),
+            gaps_block("Hard skill gaps", req.hard_gaps),
+            gaps_block("Soft skill gaps", req.soft_gaps),
             "\n" + courses_block,
             "\nInstructions:",
             "- Create a short plan (3-5 bullets) prioritizing the most impactful upskilling steps.",
             "You must explain which gaps the courses help to reduce in order to meet the profiles requirements.",
-            "- Select 1-3 course IDs that directly help close the most important gaps.",
+            course_instruction,
             "- Prefer beginner/intermediate where gaps are large; advanced for strengths only when useful.",
             "respond ONLY in Hebrew!",
         ]
     )
-
-    prompt = ChatPromptTemplate.from_template("{input}")
     print(full_prompt)
-    chain = prompt | structured_llm
-    rec: LearningRecommendationModel = cast(
-        LearningRecommendationModel, chain.invoke({"input": full_prompt})
+
+    return _LearningPrompt(
+        shortlist=shortlist,
+        model_name=model_name,
+        cache_key=cache_key,
+        messages=[{"role": "user", "content": full_prompt}],
+        ranked=picks is not None,
     )
 
-    # 6) Map ids back to Course objects and build response
-    selected_courses: List[Course] = []
-    for cid in rec.ids:
-        if cid in id_to_course:
-            selected_courses.append(id_to_course[cid])
 
-    return LearningRecommendationResponse(plan=rec.plan, courses=selected_courses)
+def _cached_recommendation(prompt: _LearningPrompt) -> Optional[LearningRecommendationModel]:
+    if llm_cache is None:
+        return None
+    cached = llm_cache.get(prompt.cache_key)
+    return prompt.recommendation(cached) if cached is not None else None
+
+
+@router.post("/learning_recommendations", response_model=LearningRecommendationResponse)
+async def get_learning_recommendations(
+    employee_number: int,
+    profile_id: int,
+    mode: Literal["llm", "fast", "enrich"] = Query(
+        "llm",
+        description="fast: deterministic course picks from the course-skill index, no LLM call; "
+                    "enrich: the same course picks, with an LLM-written plan around them; "
+                    "llm: LLM-written plan and course selection",
+    ),
+):
+    """
+    mode=fast picks up to COURSE_FAST_MAX_COURSES courses by greedy weighted set cover
+    of the open gaps over the course-skill index and returns a templated plan.
+
+    mode=enrich picks the courses the same way and passes them, with the gaps each one
+    addresses, into the prompt: the LLM writes only the plan and the response keeps the picks.
+
+    mode=llm builds a prompt with employee info, target profile, skill gaps and available courses,
+    then use structured outputs (via the shared LLM gateway) to get a LearningRecommendationModel,
+    finally return a LearningRecommendationResponse with plan and concrete course objects.
+    Only the COURSE_SHORTLIST_SIZE courses most similar to the open gaps (by embedding)
+    are put in the prompt. Plans are cached on disk by gaps, skills, target profile,
+    course catalog version and shortlist.
+    """
+    req = await _learning_request(employee_number, profile_id)
+
+    # Course picks from the offline course-skill index
+    picks = None
+    if mode != "llm":
+        picks = await asyncio.to_thread(course_skill_index.rank, req.course_texts, req.open_gaps)
+
+    # Fast path: no LLM call
+    if mode == "fast":
+        return LearningRecommendationResponse(
+            plan=_fast_plan(picks, req.id_to_course, req.open_gaps),
+            courses=[req.id_to_course[cid] for cid, _ in picks],
+        )
+
+    prompt = await _learning_prompt(req, picks)
+    cached = _cached_recommendation(prompt)
+    if cached is not None:
+        return req.to_response(cached)
+
+    # 7) Structured LLM call through the shared gateway (client reuse, limits, retries)
+    try:
+        result = await llm_gateway.structured(
+            messages=prompt.messages,
+            model=prompt.model_name,
+            schema=prompt.schema,
+            temperature=0.2,
+        )
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if llm_cache is not None:
+        llm_cache.set(prompt.cache_key, "learning_recommendations", result.model_dump())
+
+    return req.to_response(prompt.recommendation(result.model_dump()))
+
+
+@router.post("/learning_recommendations/stream")
+async def stream_learning_recommendations(employee_number: int, profile_id: int):
+    """
+    Streaming variant of /learning_recommendations (mode=llm), as Server-Sent Events.
+
+    Events, in order:
+    - gaps: {"hard_skill_gaps": [...], "soft_skill_gaps": [...]}, sent as soon as they are computed
+    - courses: the shortlisted courses offered to the model
+    - plan: {"text": ...} chunks of the plan as the model writes it (one chunk when cached)
+    - result: the final LearningRecommendationResponse
+    - error: {"detail": ...} if the LLM call fails after the stream started
+    """
+    # Lookup errors (unknown employee/profile) still surface as HTTP status codes
+    req = await _learning_request(employee_number, profile_id)
+
+    async def events():
+        yield "gaps", {"hard_skill_gaps": req.hard_gaps, "soft_skill_gaps": req.soft_gaps}
+        prompt = await _learning_prompt(req)
+        yield "courses", [req.id_to_course[cid] for cid in prompt.shortlist]
+
+        rec = _cached_recommendation(prompt)
+        if rec is not None:
+            yield "plan", {"text": rec.plan}
+        else:
+            async for kind, payload in llm_gateway.stream_structured(
+                messages=prompt.messages,
+                model=prompt.model_name,
+                schema=LearningRecommendationModel,
+                text_field="plan",
+                temperature=0.2,
+            ):
+                if kind == "delta":
+                    yield "plan", {"text": payload}
+                else:
+                    rec = payload
+            if llm_cache is not None:
+                llm_cache.set(prompt.cache_key, "learning_recommendations", rec.model_dump())
+
+        yield "result", req.to_response(rec)
+
+    return sse_response(events())
@@ -1,37 +1,59 @@
 """Structured Employees API router."""
 
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Header, Query, Response
 
-from app.services.supabase_client import get_supabase_client
+from app.core.config import settings
+from app.services.cache import invalidate_candidate
+from app.services.supabase_client import get_async_supabase_client, execute
+from app.services.table_pages import STRUCTURED_EMPLOYEES, list_rows
+from app.services.vector_index import local_match_backend
 
 router = APIRouter(prefix="/structured_employees", tags=["structured_employees"])
-supabase = get_supabase_client()
 
 # Default mock id fallback (align with other routers pattern)
 MOCK_EMPLOYEE_NUMBER = 1001
 
 
-def _require_client():
+async def _require_client():
     """Ensure Supabase client is available; otherwise raise a clear 500."""
-    if not supabase:
+    client = await get_async_supabase_client()
+    if not client:
         raise HTTPException(
             status_code=500,
             detail="Supabase client is not initialized. Check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY/SUPABASE_ANON_KEY.",
         )
-    return supabase
+    return client
+
+
+def _sync_match_index(rows: Optional[List[dict]]) -> None:
+    """Keep the in-process match index (MATCH_BACKEND=local) in step with writes."""
+    if local_match_backend.loaded and rows:
+        local_match_backend.upsert_employees(rows)
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_structured_employees():
+async def get_all_structured_employees(
+    response: Response,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns; default: all except embedding/fulltext",
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams every row (export)"),
+):
     """
-    Retrieve all structured employees from Supabase.
+    List structured employees from Supabase, one keyset page at a time
+    (ordered by employee_number). The next page's cursor is returned in the
+    X-Next-Cursor header.
     """
-    client = supabase
+    client = await _require_client()
     try:
-        resp = client.table("structured_employees").select("*").execute()
-        return resp.data or []
+        return await list_rows(client, STRUCTURED_EMPLOYEES, response, fields, limit, after, format)
+    except HTTPException:
+        raise
     except Exception as exc:
         msg = f"[structured_employees] fetch all failed: {exc}"
         print(msg)
@@ -53,14 +75,13 @@ async def get_structured_employee(employee_number: int):
     """
     Retrieve a specific structured employee by employee_number.
     """
-    client = _require_client()
+    client = await _require_client()
     try:
-        resp = (
+        resp = await execute(
             client.table("structured_employees")
             .select("*")
             .eq("employee_number", employee_number)
             .single()
-            .execute()
         )
         if not resp.data:
             raise HTTPException(status_code=404, detail=f"Employee not found: {employee_number}")
@@ -78,9 +99,10 @@ async def create_structured_employee(payload: dict):
     """
     Create a new structured employee (expects a JSON body).
     """
-    client = _require_client()
+    client = await _require_client()
     try:
-        resp = client.table("structured_employees").insert(payload).execute()
+        resp = await execute(client.table("structured_employees").insert(payload))
+        _sync_match_index(resp.data)
         return (resp.data or [None])[0] or {}
     except Exception as exc:
         msg = f"[structured_employees] create failed: {exc}"
@@ -93,14 +115,15 @@ async def update_structured_employee(employee_number: int, payload: dict):
     """
     Update an existing structured employee.
     """
-    client = _require_client()
+    client = await _require_client()
     try:
-        resp = (
+        resp = await execute(
             client.table("structured_employees")
             .update(payload)
             .eq("employee_number", employee_number)
-            .execute()
         )
+        invalidate_candidate(employee_number)
+        _sync_match_index(resp.data)
         return (resp.data or [None])[0] or {}
     except Exception as exc:
         msg = f"[structured_employees] update {employee_number} failed: {exc}"
@@ -113,14 +136,16 @@ async def delete_structured_employee(employee_number: int):
     """
     Delete a structured employee by employee_number.
     """
-    client = _require_client()
+    client = await _require_client()
     try:
-        resp = (
+        resp = await execute(
             client.table("structured_employees")
             .delete()
             .eq("employee_number", employee_number)
-            .execute()
         )
+        invalidate_candidate(employee_number)
+        if local_match_backend.loaded:
+            local_match_backend.remove_employee(employee_number)
         return {"deleted": bool(resp.data)}
     except Exception as exc:
         msg = f"[structured_employees] delete {employee_number} failed: {exc}"
@@ -18,19 +18,104 @@ class Settings(BaseSettings):
     DB_NAME: str = "career_ai"
     DATABASE_URL: Optional[str] = None
 
+    # pgvector search client (app.vector_db.client)
+    VECTOR_DB_POOL_MIN_SIZE: int = 1
+    VECTOR_DB_POOL_MAX_SIZE: int = 10
+    VECTOR_DB_POOL_TIMEOUT_SECONDS: float = 5.0
+    VECTOR_DB_RETRY_SECONDS: float = 30.0  # fail fast for this long after the database was unreachable
+    VECTOR_DB_PREPARE_THRESHOLD: Optional[int] = 5  # None disables prepared statements (e.g. behind pgbouncer)
+    VECTOR_DB_METRIC: str = "cosine"  # "cosine", "ip" or "l2"; must match the index opclass
+    VECTOR_DB_HNSW_EF_SEARCH: Optional[int] = None
+    VECTOR_DB_IVFFLAT_PROBES: Optional[int] = None
+    # MatchingService ANN shortlist over pgvector. Off: the Supabase `embedding` columns hold
+    # 1536-dim OpenAI vectors keyed by employee_number/position_id, not this service's vectors/ids
+    MATCHING_DB_SEARCH: bool = False
+
     # Vector Settings (pgvector)
     VECTOR_DIMENSIONS: int = 384  # Default embedding dimension
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_WORKERS: int = 0  # >1 spreads batches over a pool
+    EMBEDDING_EXECUTOR: str = "thread"  # "thread" or "process"
+    EMBEDDING_CACHE_DIR: Optional[str] = ".cache/embeddings"  # unset to disable the on-disk cache
 
     # API
     API_V1_PREFIX: str = "/api/v1"
 
+    # Assessment results (SQLite file; defaults to backend/data/assessment_results.sqlite3)
+    ASSESSMENT_RESULTS_DB: Optional[str] = None
+    ANALYSIS_WORKERS: int = 4  # concurrent background AI analyses per worker process
+    ANALYSIS_QUEUE_MAXSIZE: int = 1000
+
+    # Disk-backed LLM response cache (defaults to backend/data/llm_cache.sqlite3)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: Optional[str] = None
+    LLM_CACHE_TTL_SECONDS: float = 7 * 24 * 3600.0
+    LLM_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Learning recommendations: courses shortlisted by embedding similarity to the gaps
+    COURSE_SHORTLIST_SIZE: int = 30
+    COURSE_FAST_MAX_COURSES: int = 3  # courses picked by mode=fast (greedy set cover, no LLM)
+
+    # List endpoints (keyset pagination; format=ndjson exports page through the whole table)
+    LIST_DEFAULT_PAGE_SIZE: int = 500
+    LIST_MAX_PAGE_SIZE: int = 5000
+    LIST_EXPORT_PAGE_SIZE: int = 1000
+
+    # Static JSON data files (backend/data) are re-read only when their mtime changes
+    STATIC_ASSET_CHECK_SECONDS: float = 1.0
+
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
 
+    # LLM gateway (shared by every OpenAI call in the app)
+    LLM_MAX_CONCURRENCY: int = 8  # in-flight LLM calls per worker process
+    LLM_REQUESTS_PER_SECOND: float = 5.0  # token-bucket rate; 0 disables
+    LLM_BURST: int = 10
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 8.0
+
     # Supabase (optional)
     SUPABASE_URL: Optional[str] = None
     SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None
 
+    # Supabase async HTTP pool
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_MAX_CONNECTIONS: int = 50
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    SUPABASE_TIMEOUT_SECONDS: float = 10.0
+    SUPABASE_MAX_CONCURRENCY: int = 32  # max in-flight PostgREST calls per worker
+
+    # Concurrent lookups (fan_out)
+    FANOUT_TIMEOUT_SECONDS: float = 10.0  # default per-call timeout
+
+    # In-process reference data cache (per worker)
+    CACHE_MAX_ENTRIES: int = 2048  # per cache
+    CACHE_PROFILE_TTL_SECONDS: float = 600.0
+    CACHE_POSITION_TTL_SECONDS: float = 600.0
+    CACHE_CANDIDATE_TTL_SECONDS: float = 60.0
+
+    # Repository for the /smart read queries: "supabase" (PostgREST) or "postgres" (direct SQL over DATABASE_URL)
+    REPOSITORY_BACKEND: str = "supabase"
+    REPOSITORY_POOL_MIN_SIZE: int = 1
+    REPOSITORY_POOL_MAX_SIZE: int = 10
+    REPOSITORY_POOL_TIMEOUT_SECONDS: float = 5.0
+    REPOSITORY_PREPARE_THRESHOLD: Optional[int] = 0  # prepare on first use; None behind a transaction pooler (pgbouncer/Supavisor)
+
+    # Matching backend for /smart: "supabase" (pgvector RPCs) or "local" (in-process index)
+    MATCH_BACKEND: str = "supabase"
+    # /positions/top and /positions/similar in one round trip via the *_detailed RPCs (db/migrations/002)
+    MATCH_DETAIL_RPCS: bool = False
+    # /candidates/top and /positions/top (also with MATCH_DETAIL_RPCS) from the precomputed top-k tables when fresh (db/migrations/005)
+    MATCH_TOPK_TABLES: bool = False
+    LOCAL_INDEX_NLIST: int = 0  # 0 = auto (~2*sqrt(n))
+    LOCAL_INDEX_NPROBE: int = 32
+    LOCAL_INDEX_EXACT_THRESHOLD: int = 20_000  # brute-force scan below this many vectors
+    # Read index vectors with a binary COPY over DATABASE_URL (falls back to PostgREST text vectors)
+    LOCAL_INDEX_BINARY_LOAD: bool = True
+
     class Config:
         env_file = ".env"
         case_sensitive = True
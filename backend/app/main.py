@@ -1,12 +1,38 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.routers import skills, positions, smart, assessment, employees
+from app.core.config import settings
+from app.services.assessment import assessment_service
+from app.services.llm_gateway import llm_gateway
+from app.services.repository import postgres_repository
+from app.services.supabase_client import close_async_supabase_client
+from app.services.vector_index import local_match_backend
+from app.vector_db.client import vector_db_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Optional in-process match index (MATCH_BACKEND=local) is built once per worker
+    if settings.MATCH_BACKEND == "local":
+        await local_match_backend.load()
+    assessment_service.start_analysis_worker()
+    yield
+    await assessment_service.stop_analysis_worker()
+    await llm_gateway.close()
+    # Release the pooled Supabase HTTP connections and Postgres connections
+    await close_async_supabase_client()
+    await postgres_repository.close()
+    vector_db_client.close()
+
 
 app = FastAPI(
     title="Career AI API",
     description="Intelligent backend service for managing positions, candidates, and skills",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware - allow frontend to access the API
@@ -16,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
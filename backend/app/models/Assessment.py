@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -31,7 +31,10 @@ class AssessmentResult(BaseModel):
     user_id: str = Field(..., description="User ID from X-User-ID header")
     submitted_at: datetime = Field(default_factory=datetime.now, description="Timestamp of submission")
     category_scores: List[CategoryScore] = Field(..., description="Scores for each skill category")
-    ai_summary: str = Field(..., description="AI-generated profile summary in Hebrew")
-    top_strengths: List[str] = Field(..., description="Top 3 strengths identified by AI")
-    growth_recommendation: str = Field(..., description="AI-generated career growth recommendation in Hebrew")
+    analysis_status: Literal["pending", "ready", "failed"] = Field(
+        "ready", description="State of the background AI analysis; AI fields are final once 'ready'"
+    )
+    ai_summary: str = Field("", description="AI-generated profile summary in Hebrew")
+    top_strengths: List[str] = Field(..., description="Top 3 strengths identified by AI (top-scoring categories while pending)")
+    growth_recommendation: str = Field("", description="AI-generated career growth recommendation in Hebrew")
 
@@ -1,8 +1,10 @@
-import json
 import os
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, List, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
+from pydantic import BaseModel
+from app.services.llm_cache import fingerprint, llm_cache
+from app.services.llm_gateway import llm_gateway
 
 # Load .env file from project root (parent of back folder)
 project_root = Path(__file__).parent.parent.parent.parent
@@ -16,6 +18,18 @@ else:
     print("Loaded .env from current directory")
 
 
+PROFILE_ANALYSIS_MODEL = "gpt-4o-mini"
+# Bump whenever the profile analysis prompt changes so cached responses are not reused
+PROFILE_ANALYSIS_PROMPT_VERSION = 1
+
+
+class ProfileAnalysisModel(BaseModel):
+    """Structured output schema for the streamed profile analysis"""
+    summary: str
+    strengths: List[str]
+    recommendation: str
+
+
 class AIService:
     """Service for generating AI-powered profile analysis using OpenAI"""
 
@@ -29,7 +43,7 @@ class AIService:
         else:
             print("No OpenAI API key found - using mock responses")
 
-    def generate_profile_analysis(self, scores: Dict[str, float]) -> Dict[str, any]:
+    async def agenerate_profile_analysis(self, scores: Dict[str, float]) -> Dict[str, any]:
         """
         Generate AI-powered profile analysis based on category scores.
         
@@ -42,25 +56,105 @@ class AIService:
         if self.use_mock:
             return self._get_mock_response(scores)
         
+        cache_key = self._cache_key(scores)
+        if llm_cache is not None:
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            return self._call_openai(scores)
+            result = await self._call_openai(scores)
+            if llm_cache is not None and result:
+                llm_cache.set(cache_key, "profile_analysis", result)
+            return result
         except Exception as e:
             print(f"Error calling OpenAI API: {e}")
             # Fallback to mock if API call fails
             return self._get_mock_response(scores)
 
-    def _call_openai(self, scores: Dict[str, float]) -> Dict[str, any]:
-        """Call OpenAI API to generate profile analysis using gpt-4o-mini"""
+    async def astream_profile_analysis(self, scores: Dict[str, float]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of `agenerate_profile_analysis`.
+
+        Yields ("summary", text) chunks of the summary as the model writes it,
+        then ("analysis", dict) with the complete, validated analysis. Mock and
+        cached analyses arrive as a single summary chunk. If the call fails the
+        final analysis is the mock fallback, which replaces any streamed text.
+        """
+        if self.use_mock:
+            result = self._get_mock_response(scores)
+            yield "summary", result["summary"]
+            yield "analysis", result
+            return
+        
+        cache_key = self._cache_key(scores)
+        cached = llm_cache.get(cache_key) if llm_cache is not None else None
+        if cached is not None:
+            yield "summary", cached["summary"]
+            yield "analysis", cached
+            return
+        
         try:
-            from openai import OpenAI
+            async for kind, payload in llm_gateway.stream_structured(
+                messages=self._profile_messages(scores),
+                model=PROFILE_ANALYSIS_MODEL,
+                schema=ProfileAnalysisModel,
+                text_field="summary",
+                temperature=0.7,
+            ):
+                if kind == "delta":
+                    yield "summary", payload
+                else:
+                    result = payload.model_dump()
+        except Exception as e:
+            print(f"Error streaming from OpenAI API: {e}")
+            yield "analysis", self._get_mock_response(scores)
+            return
+        
+        if llm_cache is not None:
+            llm_cache.set(cache_key, "profile_analysis", result)
+        yield "analysis", result
+
+    @staticmethod
+    def _cache_key(scores: Dict[str, float]) -> str:
+        """Identical (rounded) score vectors get the cached analysis"""
+        return fingerprint(
+            "profile_analysis",
+            PROFILE_ANALYSIS_MODEL,
+            PROFILE_ANALYSIS_PROMPT_VERSION,
+            {category: round(float(score), 2) for category, score in scores.items()},
+        )
+
+    async def _call_openai(self, scores: Dict[str, float]) -> Dict[str, any]:
+        """Call OpenAI API (through the shared LLM gateway) to generate profile analysis using gpt-4o-mini"""
+        try:
+            print(f"Calling OpenAI API with {PROFILE_ANALYSIS_MODEL} model...")
             
-            print("Calling OpenAI API with gpt-4o-mini model...")
-            client = OpenAI(api_key=self.api_key)
+            result = await llm_gateway.chat_json(
+                model=PROFILE_ANALYSIS_MODEL,
+                messages=self._profile_messages(scores),
+                temperature=0.7,
+            )
+            print(f"OpenAI response received successfully")
+            print(result)
             
-            # Format scores for the prompt
-            scores_text = "\n".join([f"- {category}: {score:.2f}/5.0" for category, score in scores.items()])
+            # Validate structure
+            if not all(key in result for key in ["summary", "strengths", "recommendation"]):
+                raise ValueError("Invalid response structure from OpenAI")
+            
+            return result
             
-            prompt = f"""אתה יועץ קריירה מקצועי. נתח את הפרופיל הבא של עובד על סמך הציונים הבאים:
+        except Exception as e:
+            print(f"Error in OpenAI API call: {e}")
+            raise e  # Re-raise to see the actual error
+
+    @staticmethod
+    def _profile_messages(scores: Dict[str, float]) -> List[Dict[str, str]]:
+        """Chat messages for the profile analysis prompt"""
+        # Format scores for the prompt
+        scores_text = "\n".join([f"- {category}: {score:.2f}/5.0" for category, score in scores.items()])
+        
+        prompt = f"""אתה יועץ קריירה מקצועי. נתח את הפרופיל הבא של עובד על סמך הציונים הבאים:
 
 {scores_text}
 
@@ -78,33 +172,10 @@ class AIService:
 - ה-recommendation צריכה להיות מעשית וספציפית
 - החזר רק JSON, ללא טקסט נוסף"""
 
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "אתה יועץ קריירה מקצועי. תמיד החזר תשובות ב-JSON תקין בלבד."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-            
-            result_text = response.choices[0].message.content
-            print(f"OpenAI response received successfully")
-            result = json.loads(result_text)
-            print(result_text)
-            
-            # Validate structure
-            if not all(key in result for key in ["summary", "strengths", "recommendation"]):
-                raise ValueError("Invalid response structure from OpenAI")
-            
-            return result
-            
-        except ImportError as e:
-            print(f"OpenAI package not installed: {e}. Using mock response.")
-            # return self._get_mock_response(scores)
-        except Exception as e:
-            print(f"Error in OpenAI API call: {e}")
-            raise e  # Re-raise to see the actual error
+        return [
+            {"role": "system", "content": "אתה יועץ קריירה מקצועי. תמיד החזר תשובות ב-JSON תקין בלבד."},
+            {"role": "user", "content": prompt}
+        ]
 
     def _get_mock_response(self, scores: Dict[str, float]) -> Dict[str, any]:
         """Generate mock AI response for testing without API key"""
@@ -1,9 +1,13 @@
-import json
-from typing import Dict, List
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Tuple
 from pathlib import Path
 from datetime import datetime
+from app.core.config import settings
 from app.models.Assessment import AssessmentQuestion, CategoryScore, AssessmentResult
 from app.services.ai_service import ai_service
+from app.services.job_queue import JobQueue
+from app.services.result_store import ResultStore
+from app.services.static_assets import static_assets
 
 
 class AssessmentService:
@@ -13,24 +17,33 @@ class AssessmentService:
         # Get the base directory (back folder)
         self.base_dir = Path(__file__).parent.parent.parent
         self.questions_file = self.base_dir / "data" / "assessment_questions.json"
+        self._questions = static_assets.asset(
+            self.questions_file,
+            parse=lambda questions: [AssessmentQuestion(**q) for q in questions],
+        )
+        # Legacy whole-file JSON store; only read to seed the SQLite store
         self.results_file = self.base_dir / "data" / "assessment_results.json"
-        self._ensure_results_file()
+        self.results_store = ResultStore(
+            settings.ASSESSMENT_RESULTS_DB or self.base_dir / "data" / "assessment_results.sqlite3"
+        )
+        self._import_legacy_results()
+        # AI analysis runs here, off the submit request path
+        self.analysis_jobs = JobQueue(
+            "assessment-analysis", settings.ANALYSIS_WORKERS, settings.ANALYSIS_QUEUE_MAXSIZE
+        )
     
-    def _ensure_results_file(self):
-        """Ensure the results file exists"""
-        if not self.results_file.exists():
-            with open(self.results_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
+    def _import_legacy_results(self):
+        """Import assessment_results.json into an empty results store"""
+        if self.results_file.exists() and len(self.results_store) == 0:
+            imported = self.results_store.import_json(self.results_file)
+            print(f"[assessment] imported {imported} results from {self.results_file.name}")
     
     def load_questions(self) -> List[AssessmentQuestion]:
-        """Load assessment questions from JSON file"""
-        if not self.questions_file.exists():
+        """Load assessment questions (parsed once, reloaded when the JSON file changes)"""
+        try:
+            return list(self._questions.value())
+        except FileNotFoundError:
             raise FileNotFoundError(f"Questions file not found: {self.questions_file}")
-        
-        with open(self.questions_file, 'r', encoding='utf-8') as f:
-            questions_data = json.load(f)
-        
-        return [AssessmentQuestion(**q) for q in questions_data]
     
     def calculate_category_scores(self, answers: Dict[int, int], questions: List[AssessmentQuestion]) -> List[CategoryScore]:
         """Calculate average score for each skill category"""
@@ -59,7 +72,64 @@ class AssessmentService:
         return result
     
     def save_results(self, user_id: str, answers: Dict[int, int], is_test: bool = False) -> AssessmentResult:
-        """Save assessment results for a user with AI analysis"""
+        """
+        Save assessment results for a user and queue the AI analysis.
+
+        The category scores are stored right away with analysis_status "pending";
+        a background job fills in the AI fields. Without an event loop (e.g.
+        scripts) the analysis runs inline as before.
+        """
+        result, result_dict = self._new_result(user_id, answers, is_test)
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): run the analysis inline
+            return self._result_from_dict(asyncio.run(self._analyze(result_dict)))
+        
+        self.analysis_jobs.start()  # no-op once the app lifespan started it
+        if not self.analysis_jobs.submit(user_id, lambda: self._analyze(result_dict)):
+            # Queue full: use the instant fallback analysis instead of the LLM
+            scores_dict = self._scores(result_dict)
+            result = self._result_from_dict(
+                self._store_analysis(result_dict, ai_service._get_mock_response(scores_dict))
+            )
+        
+        return result
+    
+    async def stream_results(
+        self, user_id: str, answers: Dict[int, int], is_test: bool = False
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of `save_results`.
+
+        Yields ("result", AssessmentResult) with the scores as soon as they are
+        saved, ("summary", text) chunks of the AI summary as it is generated,
+        and finally ("result", AssessmentResult) with the stored analysis. If
+        the client goes away mid-stream the analysis moves to the background
+        queue so the result does not stay "pending".
+        """
+        result, result_dict = self._new_result(user_id, answers, is_test)
+        yield "result", result
+        
+        finished = False
+        try:
+            async for kind, payload in ai_service.astream_profile_analysis(self._scores(result_dict)):
+                if kind == "summary":
+                    yield "summary", payload
+                else:
+                    analyzed = self._store_analysis(result_dict, payload)
+                    finished = True
+                    yield "result", self._result_from_dict(analyzed)
+        finally:
+            if not finished:
+                self.analysis_jobs.start()
+                self.analysis_jobs.submit(user_id, lambda: self._analyze(result_dict))
+    
+    def _new_result(
+        self, user_id: str, answers: Dict[int, int], is_test: bool
+    ) -> Tuple[AssessmentResult, Dict[str, Any]]:
+        """Score the answers and store the result with analysis_status "pending"."""
         questions = self.load_questions()
         
         # For test mode, only use questions that were answered
@@ -69,33 +139,68 @@ class AssessmentService:
         
         category_scores = self.calculate_category_scores(answers, questions)
         
-        # Prepare scores dict for AI service
-        scores_dict = {cs.category: cs.score for cs in category_scores}
-        
-        # Get AI analysis
-        ai_analysis = ai_service.generate_profile_analysis(scores_dict)
-        
-        # Get top 3 categories by score
+        # Get top 3 categories by score (shown until the AI strengths are ready)
         top_strengths = [cs.category for cs in category_scores[:3]]
         
         result = AssessmentResult(
             user_id=user_id,
             submitted_at=datetime.now(),
             category_scores=category_scores,
+            analysis_status="pending",
+            top_strengths=top_strengths,
+        )
+        
+        # Save results (overwrite previous result for this user)
+        result_dict = self._result_to_dict(result)
+        self.results_store.put(user_id, result_dict)
+        return result, result_dict
+    
+    @staticmethod
+    def _scores(result_dict: Dict[str, Any]) -> Dict[str, float]:
+        """Prepare scores dict for AI service"""
+        return {cs["category"]: cs["score"] for cs in result_dict["category_scores"]}
+    
+    def _store_analysis(self, result_dict: Dict[str, Any], ai_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist the analysis unless a newer submission replaced the result meanwhile"""
+        analyzed = dict(
+            result_dict,
+            analysis_status="ready",
             ai_summary=ai_analysis["summary"],
             top_strengths=ai_analysis["strengths"],
-            growth_recommendation=ai_analysis["recommendation"]
+            growth_recommendation=ai_analysis["recommendation"],
         )
-        
-        # Load existing results
-        if self.results_file.exists():
-            with open(self.results_file, 'r', encoding='utf-8') as f:
-                all_results = json.load(f)
-        else:
-            all_results = {}
-        
-        # Convert result to dict for JSON serialization
-        result_dict = {
+        self.results_store.update_if_current(result_dict["user_id"], analyzed)
+        return analyzed
+    
+    async def _analyze(self, result_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate and store the AI analysis for a saved result"""
+        try:
+            ai_analysis = await ai_service.agenerate_profile_analysis(self._scores(result_dict))
+            return self._store_analysis(result_dict, ai_analysis)
+        except Exception as e:
+            print(f"[assessment] AI analysis failed for {result_dict['user_id']}: {e}")
+            failed = dict(result_dict, analysis_status="failed")
+            self.results_store.update_if_current(result_dict["user_id"], failed)
+            return failed
+    
+    def start_analysis_worker(self) -> None:
+        """Start the background workers and re-queue analyses interrupted by a restart."""
+        self.analysis_jobs.start()
+        pending = self.results_store.pending()
+        for result_dict in pending:
+            self.analysis_jobs.submit(
+                result_dict["user_id"], lambda result_dict=result_dict: self._analyze(result_dict)
+            )
+        if pending:
+            print(f"[assessment] re-queued {len(pending)} pending analyses")
+    
+    async def stop_analysis_worker(self) -> None:
+        await self.analysis_jobs.stop()
+    
+    @staticmethod
+    def _result_to_dict(result: AssessmentResult) -> Dict[str, Any]:
+        """Convert result to dict for JSON serialization"""
+        return {
             "user_id": result.user_id,
             "submitted_at": result.submitted_at.isoformat(),
             "category_scores": [
@@ -106,33 +211,23 @@ class AssessmentService:
                 }
                 for cs in result.category_scores
             ],
+            "analysis_status": result.analysis_status,
             "ai_summary": result.ai_summary,
             "top_strengths": result.top_strengths,
             "growth_recommendation": result.growth_recommendation
         }
-        
-        # Save results (overwrite previous result for this user)
-        all_results[user_id] = result_dict
-        
-        with open(self.results_file, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, indent=2, ensure_ascii=False)
-        
-        return result
     
     def get_user_results(self, user_id: str) -> AssessmentResult:
         """Get assessment results for a specific user"""
-        if not self.results_file.exists():
-            raise FileNotFoundError("No assessment results found")
-        
-        with open(self.results_file, 'r', encoding='utf-8') as f:
-            all_results = json.load(f)
-        
-        if user_id not in all_results:
+        result_data = self.results_store.get(user_id)
+        if result_data is None:
             raise ValueError(f"No results found for user: {user_id}")
         
-        result_data = all_results[user_id]
-        
-        # Reconstruct the AssessmentResult object
+        return self._result_from_dict(result_data)
+    
+    @staticmethod
+    def _result_from_dict(result_data: Dict[str, Any]) -> AssessmentResult:
+        """Reconstruct the AssessmentResult object"""
         category_scores = [
             CategoryScore(**cs) for cs in result_data["category_scores"]
         ]
@@ -141,6 +236,7 @@ class AssessmentService:
             user_id=result_data["user_id"],
             submitted_at=datetime.fromisoformat(result_data["submitted_at"]),
             category_scores=category_scores,
+            analysis_status=result_data.get("analysis_status", "ready"),
             ai_summary=result_data.get("ai_summary", ""),
             top_strengths=result_data.get("top_strengths", []),
             growth_recommendation=result_data.get("growth_recommendation", "")
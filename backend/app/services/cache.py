@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from app.core.config import settings
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with a per-cache TTL and LRU eviction.
+
+    Values are shared between requests, so callers must treat them as read-only.
+    Concurrent misses for the same key are coalesced into a single load.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on every invalidation so a load that started before a write
+        # never stores its (now stale) result.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._inflight.pop(key, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._inflight.clear()
+            self._generation += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value or await `loader()` once and cache its result (errors are not cached)."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        # The load runs in its own task and every caller, the first one
+        # included, awaits it through shield(): a caller that is cancelled or
+        # times out neither cancels the load nor hands its CancelledError to
+        # the others.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, self._generation))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._load_done(key, done))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        value = await loader()
+        self.set(key, value, generation)
+        return value
+
+    def _load_done(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller has gone
+
+    async def get_many_or_load(
+        self,
+        keys: Iterable[Hashable],
+        loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, Any]:
+        """
+        Batched variant: serve cached keys from memory and load only the misses
+        with a single `loader(missing_keys)` call returning {key: value}.
+        Keys absent from the loader's result are not cached.
+        """
+        found: Dict[Hashable, Any] = {}
+        missing: List[Hashable] = []
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            generation = self._generation
+            loaded = await loader(missing)
+            for key, value in loaded.items():
+                self.set(key, value, generation)
+            found.update(loaded)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# -------------------------------------------------------------------
+# Named caches for reference data
+# -------------------------------------------------------------------
+
+profile_cache = TTLCache("profiles", settings.CACHE_MAX_ENTRIES, settings.CACHE_PROFILE_TTL_SECONDS)
+position_cache = TTLCache("positions", settings.CACHE_MAX_ENTRIES, settings.CACHE_POSITION_TTL_SECONDS)
+position_category_cache = TTLCache("position_categories", settings.CACHE_MAX_ENTRIES, settings.CACHE_POSITION_TTL_SECONDS)
+position_profiles_cache = TTLCache("position_profiles", settings.CACHE_MAX_ENTRIES, settings.CACHE_PROFILE_TTL_SECONDS)
+candidate_cache = TTLCache("candidates", settings.CACHE_MAX_ENTRIES, settings.CACHE_CANDIDATE_TTL_SECONDS)
+
+_caches: Dict[str, TTLCache] = {
+    cache.name: cache
+    for cache in (profile_cache, position_cache, position_category_cache, position_profiles_cache, candidate_cache)
+}
+
+
+def _key(entity_id: Any) -> Optional[int]:
+    try:
+        return int(entity_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def invalidate_position(position_id: Any) -> None:
+    """Drop everything cached for a position (row, category and its profile list)."""
+    key = _key(position_id)
+    position_cache.invalidate(key)
+    position_category_cache.invalidate(key)
+    position_profiles_cache.invalidate(key)
+
+
+def invalidate_profile(profile_id: Any, position_id: Optional[Any] = None) -> None:
+    profile_cache.invalidate(_key(profile_id))
+    if position_id is not None:
+        position_profiles_cache.invalidate(_key(position_id))
+
+
+def invalidate_candidate(employee_number: Any) -> None:
+    candidate_cache.invalidate(_key(employee_number))
+
+
+def clear_all() -> None:
+    for cache in _caches.values():
+        cache.clear()
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
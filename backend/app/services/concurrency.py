@@ -0,0 +1,77 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Mapping, Optional
+
+from app.core.config import settings
+
+
+class CallResult:
+    """Outcome of one call in a fan-out: either a value or the error it raised."""
+
+    __slots__ = ("name", "value", "error", "elapsed")
+
+    def __init__(self, name: str, value: Any = None, error: Optional[BaseException] = None, elapsed: float = 0.0):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def timed_out(self) -> bool:
+        return isinstance(self.error, asyncio.TimeoutError)
+
+    def unwrap(self) -> Any:
+        """Return the value, re-raising the original error (e.g. an HTTPException 404)."""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def value_or(self, default: Any) -> Any:
+        """Return the value, or `default` if the call failed or timed out."""
+        return default if self.error is not None else self.value
+
+
+async def _run(name: str, awaitable: Awaitable[Any], timeout: Optional[float]) -> CallResult:
+    start = time.perf_counter()
+    try:
+        if timeout:
+            value = await asyncio.wait_for(awaitable, timeout)
+        else:
+            value = await awaitable
+        return CallResult(name, value=value, elapsed=time.perf_counter() - start)
+    except asyncio.TimeoutError as exc:
+        print(f"[fan_out] {name} timed out after {timeout}s")
+        return CallResult(name, error=exc, elapsed=time.perf_counter() - start)
+    except Exception as exc:
+        return CallResult(name, error=exc, elapsed=time.perf_counter() - start)
+
+
+async def fan_out(
+    calls: Mapping[str, Awaitable[Any]],
+    timeout: Optional[float] = None,
+    timeouts: Optional[Mapping[str, float]] = None,
+) -> Dict[str, CallResult]:
+    """
+    Run independent awaitables concurrently and collect one CallResult per name.
+
+    Every call gets its own timeout (`timeouts[name]`, else `timeout`, else
+    FANOUT_TIMEOUT_SECONDS). A failing or slow call never cancels the others;
+    callers decide per result whether to `unwrap()` (required data) or fall back
+    with `value_or()` (optional enrichment).
+
+    Usage:
+        res = await fan_out({"position": _get_position(pid), "category": get_position_category(pid)})
+        position = res["position"].unwrap()
+        category = res["category"].value_or(None)
+    """
+    default_timeout = settings.FANOUT_TIMEOUT_SECONDS if timeout is None else timeout
+    per_call = timeouts or {}
+    names = list(calls.keys())
+    results = await asyncio.gather(
+        *(_run(name, calls[name], per_call.get(name, default_timeout)) for name in names)
+    )
+    return dict(zip(names, results))
@@ -0,0 +1,83 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vectorization import vectorization_service
+
+
+class CourseIndex:
+    """
+    In-memory embedding index of the course catalog, used to shortlist the
+    courses relevant to a set of skill gaps before they go into an LLM prompt.
+
+    Course texts are embedded through the vectorization service (so the
+    on-disk embedding cache makes restarts cheap) and the matrix is rebuilt
+    only when the catalog version changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._ids: List[int] = []
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _sync(self, courses: Dict[int, str], version: str) -> Tuple[List[int], np.ndarray]:
+        with self._lock:
+            if version != self._version:
+                ids = sorted(courses)
+                vectors = vectorization_service.vectorize_texts([courses[cid] for cid in ids])
+                self._ids = ids
+                self._matrix = self._normalize(vectors.astype(np.float32, copy=False))
+                self._version = version
+                print(f"[course_index] embedded {len(ids)} courses (catalog {version[:12]})")
+            return self._ids, self._matrix
+
+    def shortlist(
+        self,
+        courses: Dict[int, str],
+        version: str,
+        gaps: Sequence[Tuple[str, float]],
+        k: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Ids of at most `k` courses (COURSE_SHORTLIST_SIZE by default) that best
+        cover `gaps`, given as (skill name, weight) pairs.
+
+        Every gap gets its own ranking by cosine similarity to the course
+        texts; slots are handed out round-robin with larger gaps first, so a
+        single dominant gap cannot crowd the others out. When the catalog
+        already fits, or embeddings are unavailable, all course ids are
+        returned unchanged.
+        """
+        k = k or settings.COURSE_SHORTLIST_SIZE
+        if len(courses) <= k or not gaps or not vectorization_service.is_available():
+            return sorted(courses)
+
+        ids, matrix = self._sync(courses, version)
+        ordered = sorted(gaps, key=lambda g: -g[1])
+        queries = self._normalize(vectorization_service.vectorize_texts([skill for skill, _ in ordered]))
+        rankings = np.argsort(-(matrix @ queries.T), axis=0)  # (n_courses, n_gaps)
+
+        selected: List[int] = []
+        seen = set()
+        for row in rankings:
+            for col in row:
+                cid = ids[col]
+                if cid not in seen:
+                    seen.add(cid)
+                    selected.append(cid)
+                    if len(selected) == k:
+                        return selected
+        return selected
+
+
+# Singleton instance
+course_index = CourseIndex()
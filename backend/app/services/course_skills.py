@@ -0,0 +1,174 @@
+import hashlib
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, get_args
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.BaseValues import HardSkills, SoftSkills
+from app.services.static_assets import static_assets
+from app.services.vectorization import MODEL_NAME, vectorization_service
+
+# Offline index written by data_generation/build_course_skill_index.py
+INDEX_FILE = "course_skills.json"
+INDEX_FORMAT_VERSION = 1
+
+SKILL_NAMES: Tuple[str, ...] = tuple(dict.fromkeys(get_args(HardSkills) + get_args(SoftSkills)))
+# Index keys are normalized the same way as SkillVocabulary, so they match gap names
+SKILLS: Tuple[str, ...] = tuple(name.strip().lower() for name in SKILL_NAMES)
+_SKILL_SET = frozenset(SKILLS)
+
+MIN_SIMILARITY = 0.45  # course/skill cosine similarity needed to count as "addresses"
+MAX_SKILLS_PER_COURSE = 5
+
+
+def course_text(name: str, description: str) -> str:
+    return f"{name}: {description}"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _keyword_skills(text: str, skills: Sequence[str] = SKILLS) -> Dict[str, float]:
+    lowered = text.lower()
+    return {
+        skill: 1.0
+        for skill in skills
+        if re.search(r"\b" + re.escape(skill) + r"\b", lowered)
+    }
+
+
+def build_course_skills(texts: Dict[int, str]) -> Dict[int, Dict[str, float]]:
+    """
+    Map each course text to the vocabulary skills it addresses, with a
+    strength in (0, 1]: 1.0 when the skill is named in the text, otherwise
+    the embedding similarity between course and skill (top
+    MAX_SKILLS_PER_COURSE above MIN_SIMILARITY; keywords only when
+    sentence-transformers is not installed).
+    """
+    ids = sorted(texts)
+    out = {cid: _keyword_skills(texts[cid]) for cid in ids}
+    if not ids or not vectorization_service.is_available():
+        return out
+
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    courses = normalize(vectorization_service.vectorize_texts([texts[cid] for cid in ids]))
+    skills = normalize(vectorization_service.vectorize_texts(list(SKILL_NAMES)))
+    similarity = courses @ skills.T
+    for row, cid in enumerate(ids):
+        for col in np.argsort(-similarity[row])[:MAX_SKILLS_PER_COURSE]:
+            score = float(similarity[row, col])
+            if score < MIN_SIMILARITY:
+                break
+            skill = SKILLS[col]
+            out[cid][skill] = max(out[cid].get(skill, 0.0), round(score, 4))
+    return out
+
+
+def _parse_index(raw: Dict) -> Dict[int, Tuple[str, Dict[str, float]]]:
+    if raw.get("format") != INDEX_FORMAT_VERSION or raw.get("model") != MODEL_NAME:
+        print(f"[course_skills] ignoring {INDEX_FILE}: built with another format/model")
+        return {}
+    return {int(cid): (entry["text_hash"], entry["skills"]) for cid, entry in raw.get("courses", {}).items()}
+
+
+class CourseSkillIndex:
+    """
+    Course -> addressed skills, and a greedy weighted set-cover ranker that
+    picks the few courses covering the largest skill gaps without an LLM.
+
+    Mappings come from the offline index in data/course_skills.json; courses
+    that are missing there or whose text changed since it was built are
+    mapped on the fly and memoized for the process lifetime.
+    """
+
+    def __init__(self):
+        self._asset = static_assets.asset(INDEX_FILE, parse=_parse_index)
+        self._lock = threading.Lock()
+        self._built: Dict[Tuple[int, str], Dict[str, float]] = {}
+
+    def _offline(self) -> Dict[int, Tuple[str, Dict[str, float]]]:
+        try:
+            return self._asset.value()
+        except FileNotFoundError:
+            return {}
+
+    def skills_for(self, texts: Dict[int, str]) -> Dict[int, Dict[str, float]]:
+        offline = self._offline()
+        out: Dict[int, Dict[str, float]] = {}
+        missing: Dict[int, str] = {}
+        with self._lock:
+            for cid, text in texts.items():
+                digest = text_hash(text)
+                entry = offline.get(cid)
+                if entry is not None and entry[0] == digest:
+                    out[cid] = entry[1]
+                elif (cid, digest) in self._built:
+                    out[cid] = self._built[(cid, digest)]
+                else:
+                    missing[cid] = text
+        if missing:
+            built = build_course_skills(missing)
+            with self._lock:
+                for cid, skills in built.items():
+                    self._built[(cid, text_hash(missing[cid]))] = skills
+            out.update(built)
+        return out
+
+    def rank(
+        self,
+        texts: Dict[int, str],
+        gaps: Sequence[Tuple[str, float]],
+        max_courses: Optional[int] = None,
+    ) -> List[Tuple[int, List[str]]]:
+        """
+        Greedy weighted set cover over `gaps` ((skill, gap size) pairs).
+
+        Each round picks the course with the largest remaining covered weight
+        (sum over skills of remaining gap * strength), then discounts the
+        skills it covers by its strength. Stops at `max_courses`
+        (COURSE_FAST_MAX_COURSES by default) or when nothing adds coverage.
+        Gap names are matched case-insensitively. Returns (course_id, covered
+        skills) in pick order; ties go to the lower course id, so the result
+        is deterministic.
+        """
+        max_courses = max_courses or settings.COURSE_FAST_MAX_COURSES
+        weights = {skill.strip().lower(): float(weight) for skill, weight in gaps if weight > 0}
+        remaining = dict(weights)
+        if not remaining or not texts:
+            return []
+
+        coverage = {
+            cid: {skill: strength for skill, strength in skills.items() if skill in remaining}
+            for cid, skills in self.skills_for(texts).items()
+        }
+        # Gap skills outside the fixed vocabulary (e.g. from the `skills` table) are
+        # not in the index; match them by name against the course texts instead
+        extra = [skill for skill in remaining if skill not in _SKILL_SET]
+        if extra:
+            for cid, text in texts.items():
+                coverage[cid].update(_keyword_skills(text, extra))
+        picks: List[Tuple[int, List[str]]] = []
+        while len(picks) < max_courses:
+            best_id, best_gain = None, 0.0
+            for cid in sorted(coverage):
+                gain = sum(remaining[skill] * strength for skill, strength in coverage[cid].items())
+                if gain > best_gain + 1e-9:
+                    best_id, best_gain = cid, gain
+            if best_id is None:
+                break
+            covered = coverage.pop(best_id)
+            for skill, strength in covered.items():
+                remaining[skill] *= 1.0 - strength
+            picks.append((best_id, sorted(covered, key=lambda s: -weights[s])))
+        return picks
+
+
+# Singleton instance
+course_skill_index = CourseSkillIndex()
@@ -0,0 +1,269 @@
+"""
+Persistent content-hash embedding cache.
+
+Embeddings are keyed by (model name, sha256 of the exact text that would be
+sent to the model) and stored per model in one append-only binary file:
+
+    header:  b"EMBC" | version (u16) | dim (u32) | len(model) (u16) | model (utf-8)
+    records: sha256 digest (32 bytes) | float32[dim]
+
+Only numpy and the standard library are used so the data generation scripts
+can share it without importing the FastAPI app.
+
+Several processes may append to the same file (the data generation scripts,
+uvicorn workers sharing EMBEDDING_CACHE_DIR): appends happen under an
+exclusive `flock`, and row numbers are taken from the file size at that
+point, never from what this process has seen so far.
+"""
+
+import hashlib
+import os
+import re
+import struct
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer only
+    fcntl = None
+
+
+_MAGIC = b"EMBC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHIH")
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Disk-backed {sha256(text): vector} map for a single embedding model."""
+
+    def __init__(self, directory: Union[str, Path], model: str):
+        self.model = model
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model).strip("_")
+        self.path = Path(directory) / f"{slug}-{hashlib.sha1(model.encode('utf-8')).hexdigest()[:8]}.bin"
+        self.dim: Optional[int] = None
+        self._index: Dict[bytes, int] = {}  # key -> row on disk
+        self._stored: Optional[np.ndarray] = None  # memory-mapped records already on disk
+        self._offset = 0
+        self._inode: Optional[int] = None  # file the index refers to (compact() replaces it)
+        self._pending: Dict[bytes, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    # ----------------------------------------------------------------
+    # File format
+    # ----------------------------------------------------------------
+
+    def _record_dtype(self) -> np.dtype:
+        return np.dtype([("key", "S32"), ("vector", "<f4", (self.dim,))])
+
+    def _header(self) -> bytes:
+        name = self.model.encode("utf-8")
+        return _HEADER.pack(_MAGIC, _VERSION, self.dim, len(name)) + name
+
+    @contextmanager
+    def _locked(self, mode: str) -> Iterator[BinaryIO]:
+        """Open the cache file under an exclusive lock (retrying if it was replaced meanwhile)."""
+        while True:
+            fh = open(self.path, mode)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+                    if not self.path.exists() or os.stat(self.path).st_ino != os.fstat(fh.fileno()).st_ino:
+                        continue
+                yield fh
+                return
+            finally:
+                fh.close()
+
+    def _read_header(self, fh: BinaryIO) -> Optional[int]:
+        """Check the header and return the records offset; None for an empty file."""
+        fh.seek(0)
+        raw = fh.read(_HEADER.size)
+        if not raw:
+            return None
+        if len(raw) == _HEADER.size:
+            magic, version, dim, name_len = _HEADER.unpack(raw)
+            model = fh.read(name_len).decode("utf-8", errors="replace")
+            if magic == _MAGIC and version == _VERSION and model == self.model and self.dim in (None, dim):
+                self.dim = dim
+                return _HEADER.size + name_len
+        raise ValueError(f"incompatible embedding cache file {self.path}")
+
+    def _truncate_torn(self, fh: BinaryIO) -> None:
+        """Drop a partial record left at the end by an interrupted write (lock held)."""
+        size = os.fstat(fh.fileno()).st_size
+        whole = self._offset + (size - self._offset) // self._record_dtype().itemsize * self._record_dtype().itemsize
+        if whole != size:
+            print(f"[embedding_cache] dropping {size - whole} bytes of a torn record in {self.path}")
+            fh.truncate(whole)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with self._locked("r+b") as fh:
+                offset = self._read_header(fh)
+                if offset is None:
+                    return
+                self._offset = offset
+                self._truncate_torn(fh)
+                self._inode = os.fstat(fh.fileno()).st_ino
+        except ValueError:
+            aside = self.path.with_suffix(".incompatible")
+            print(f"[embedding_cache] incompatible cache file {self.path}; moved to {aside}")
+            os.replace(self.path, aside)
+            return
+        self._map()
+        self._index_rows(0)
+
+    def _index_rows(self, first: int) -> None:
+        # Later records win, so re-embedded texts simply append. numpy drops
+        # trailing NUL bytes of "S32" values, so pad the digests back.
+        if self._stored is not None:
+            for row, key in enumerate(self._stored["key"][first:].tolist(), start=first):
+                self._index[key.ljust(32, b"\0")] = row
+
+    def _map(self) -> None:
+        dtype = self._record_dtype()
+        count = (self.path.stat().st_size - self._offset) // dtype.itemsize
+        self._stored = (
+            np.memmap(self.path, dtype=dtype, mode="r", offset=self._offset, shape=(count,))
+            if count > 0 else None
+        )
+
+    # ----------------------------------------------------------------
+    # Lookup / store
+    # ----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._index.keys() | self._pending.keys())
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = text_key(text)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+        row = self._index.get(key)
+        return None if row is None else np.array(self._stored[row]["vector"], dtype=np.float32)
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+        vectors = vectors.reshape(len(texts), -1)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"embedding dimension {vectors.shape[1]} != cache dimension {self.dim}")
+            for text, vec in zip(texts, vectors):
+                self._pending[text_key(text)] = vec.copy()
+
+    def flush(self) -> None:
+        """Append pending records to disk."""
+        with self._lock:
+            if not self._pending:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.touch()
+            with self._locked("r+b") as fh:
+                offset = self._read_header(fh)
+                if offset is None:
+                    header = self._header()
+                    fh.write(header)
+                    fh.flush()
+                    offset = len(header)
+                self._offset = offset
+                self._truncate_torn(fh)
+                inode = os.fstat(fh.fileno()).st_ino
+                if inode != self._inode:
+                    # New file, or compacted by another process: rows moved
+                    self._index.clear()
+                    self._stored = None
+                    self._inode = inode
+                known = 0 if self._stored is None else self._stored.shape[0]
+
+                records = np.empty(len(self._pending), dtype=self._record_dtype())
+                records["key"] = list(self._pending)
+                records["vector"] = np.stack(list(self._pending.values()))
+                fh.seek(0, os.SEEK_END)
+                fh.write(records.tobytes())
+                fh.flush()
+                os.fsync(fh.fileno())
+                self._pending.clear()
+                # Pick up everything appended since the last mapping, ours
+                # and other processes' alike
+                self._map()
+                self._index_rows(known)
+
+    # ----------------------------------------------------------------
+    # Main entry point
+    # ----------------------------------------------------------------
+
+    def embed(
+        self,
+        texts: Sequence[str],
+        encode: Callable[[List[str]], np.ndarray],
+        flush: bool = True,
+    ) -> np.ndarray:
+        """
+        Return (len(texts), dim) float32 embeddings, calling `encode` only for
+        texts not seen before (each distinct text at most once).
+        """
+        rows: List[Optional[np.ndarray]] = [self.get(t) for t in texts]
+        missing = list(dict.fromkeys(t for t, row in zip(texts, rows) if row is None))
+        self.hits += len(texts) - sum(1 for row in rows if row is None)
+        self.misses += len(missing)
+
+        if missing:
+            encoded = np.asarray(encode(missing), dtype=np.float32).reshape(len(missing), -1)
+            self.put_many(missing, encoded)
+            if flush:
+                self.flush()
+            by_text = dict(zip(missing, encoded))
+            rows = [by_text[t] if row is None else row for t, row in zip(texts, rows)]
+
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.stack(rows).astype(np.float32, copy=False)
+
+    def compact(self) -> None:
+        """Rewrite the file keeping only the latest record per text."""
+        self.flush()
+        with self._lock:
+            if self._stored is None:
+                return
+            with self._locked("r+b") as fh:
+                # Index other processes' appends too, so compaction keeps them
+                self._truncate_torn(fh)
+                if os.fstat(fh.fileno()).st_ino != self._inode:
+                    self._index.clear()
+                    self._stored = None
+                    self._inode = os.fstat(fh.fileno()).st_ino
+                known = 0 if self._stored is None else self._stored.shape[0]
+                self._map()
+                self._index_rows(known)
+                if self._stored is None:
+                    return
+                rows = sorted(self._index.values())
+                records = np.array(self._stored[rows])
+                tmp = self.path.with_suffix(".tmp")
+                with open(tmp, "wb") as out:
+                    out.write(self._header())
+                    out.write(records.tobytes())
+                self._stored = None
+                os.replace(tmp, self.path)
+            self._index.clear()
+            self._inode = None
+        self._load()
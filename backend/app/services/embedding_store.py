@@ -0,0 +1,163 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.Employee import Employee
+from app.models.Position import Position
+from app.services.vectorization import vectorization_service
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class EmbeddingMatrix:
+    """
+    L2-normalized float32 embeddings kept in one contiguous (N x D) matrix.
+
+    Rows are keyed by string id; removals swap the last row into the hole so
+    the live rows always stay packed in `[:len(self)]`.
+    """
+
+    def __init__(self):
+        self.dim: Optional[int] = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._row_of
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only view of the live rows."""
+        view = self._matrix[: len(self._ids)]
+        view.flags.writeable = False
+        return view
+
+    def get(self, item_id: str) -> Optional[np.ndarray]:
+        row = self._row_of.get(item_id)
+        return None if row is None else self._matrix[row].copy()
+
+    def upsert_many(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(ids) or vectors.size == 0:
+            return
+        vectors = _normalize(vectors.reshape(len(ids), -1))
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._matrix = np.empty((0, self.dim), dtype=np.float32)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"embedding dimension {vectors.shape[1]} != store dimension {self.dim}")
+
+            needed = len(self._ids) + sum(1 for i in ids if i not in self._row_of)
+            if needed > self._matrix.shape[0]:
+                grown = np.empty((max(needed, 2 * self._matrix.shape[0], 256), self.dim), dtype=np.float32)
+                grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+                self._matrix = grown
+
+            for item_id, vec in zip(ids, vectors):
+                row = self._row_of.get(item_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._ids.append(item_id)
+                    self._row_of[item_id] = row
+                self._matrix[row] = vec
+
+    def upsert(self, item_id: str, vector: Sequence[float]) -> None:
+        self.upsert_many([item_id], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def remove(self, item_id: str) -> None:
+        with self._lock:
+            row = self._row_of.pop(item_id, None)
+            if row is None:
+                return
+            last = len(self._ids) - 1
+            if row != last:
+                moved = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved
+                self._row_of[moved] = row
+            self._ids.pop()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+            self._row_of.clear()
+
+    def similarities(self, query: Sequence[float]) -> np.ndarray:
+        """Cosine similarity of `query` against every row (one matrix-vector product)."""
+        q = np.asarray(query, dtype=np.float32).ravel()
+        if not len(self._ids) or q.size != self.dim:
+            return np.empty(0, dtype=np.float32)
+        return self._matrix[: len(self._ids)] @ _normalize(q)
+
+    def top_k(self, query: Sequence[float], k: int, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity), best first, using argpartition."""
+        scores = self.similarities(query)
+        return self.top_k_from_scores(scores, k, exclude)
+
+    def top_k_from_scores(self, scores: np.ndarray, k: int, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        exclude = set(exclude)
+        take = min(k + len(exclude), scores.shape[0])
+        if take <= 0:
+            return []
+        top = np.argpartition(-scores, take - 1)[:take]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        out: List[Tuple[str, float]] = []
+        for row in top.tolist():
+            item_id = self._ids[row]
+            if item_id in exclude:
+                continue
+            out.append((item_id, float(scores[row])))
+            if len(out) == k:
+                break
+        return out
+
+
+class EmbeddingStore:
+    """Employee and position embeddings encoded once, at ingest time."""
+
+    def __init__(self):
+        self.employees = EmbeddingMatrix()
+        self.positions = EmbeddingMatrix()
+
+    def add_employees(self, employees: Sequence[Employee]) -> None:
+        vectors = vectorization_service.vectorize_employees(employees)
+        if len(vectors):
+            self.employees.upsert_many([e.employee_id for e in employees], vectors)
+
+    def add_positions(self, positions: Sequence[Position]) -> None:
+        vectors = vectorization_service.vectorize_positions(positions)
+        if len(vectors):
+            self.positions.upsert_many([str(p.id) for p in positions], vectors)
+
+    def employee_vector(self, employee: Employee) -> Optional[np.ndarray]:
+        """Stored vector, or encode on the fly for an employee that was never ingested."""
+        vector = self.employees.get(employee.employee_id)
+        if vector is None:
+            encoded = vectorization_service.vectorize_employee(employee)
+            vector = np.asarray(encoded, dtype=np.float32) if encoded else None
+        return vector
+
+    def position_vector(self, position: Position) -> Optional[np.ndarray]:
+        vector = self.positions.get(str(position.id))
+        if vector is None:
+            encoded = vectorization_service.vectorize_position(position)
+            vector = np.asarray(encoded, dtype=np.float32) if encoded else None
+        return vector
+
+
+# Singleton instance
+embedding_store = EmbeddingStore()
@@ -2,6 +2,7 @@ from typing import List, Dict, Optional
 from app.models.Employee import Employee
 from app.models.Position import Position
 from app.models.Skill import Skill
+from app.services.embedding_store import embedding_store
 
 
 class IngestionService:
@@ -11,15 +12,19 @@ class IngestionService:
         # In-memory stores; swap to DB later
         self._employees: Dict[str, Employee] = {}
         self._positions: Dict[str, Position] = {}
+        # Embeddings are encoded once here, not per matching query
+        self.embeddings = embedding_store
 
     # ---- Employees ----
     def ingest_employees(self, employees: List[Employee]) -> List[Employee]:
         for c in employees:
             self._employees[c.employee_id] = c
+        self.embeddings.add_employees(employees)
         return employees
 
     def ingest_employee(self, employee: Employee) -> Employee:
         self._employees[employee.employee_id] = employee
+        self.embeddings.add_employees([employee])
         return employee
 
     def get_employee(self, employee_id: str) -> Optional[Employee]:
@@ -30,18 +35,22 @@ class IngestionService:
 
     def delete_employee(self, employee_id: str) -> None:
         self._employees.pop(employee_id, None)
+        self.embeddings.employees.remove(employee_id)
 
     def clear_employees(self) -> None:
         self._employees.clear()
+        self.embeddings.employees.clear()
 
     # ---- Positions ----
     def ingest_positions(self, positions: List[Position]) -> List[Position]:
         for p in positions:
             self._positions[str(p.id)] = p
+        self.embeddings.add_positions(positions)
         return positions
 
     def ingest_position(self, position: Position) -> Position:
         self._positions[str(position.id)] = position
+        self.embeddings.add_positions([position])
         return position
 
     def get_position(self, position_id: str) -> Optional[Position]:
@@ -52,9 +61,11 @@ class IngestionService:
 
     def delete_position(self, position_id: str) -> None:
         self._positions.pop(position_id, None)
+        self.embeddings.positions.remove(position_id)
 
     def clear_positions(self) -> None:
         self._positions.clear()
+        self.embeddings.positions.clear()
 
     # ---- Skills (placeholder for parity) ----
     def ingest_skills(self, skills: List[Skill]) -> List[Skill]:
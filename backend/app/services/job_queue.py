@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class JobQueue:
+    """
+    Bounded in-process background job queue.
+
+    Jobs are async callables keyed by an id; a fixed number of workers runs
+    them so slow jobs (LLM calls) never hold a request open. Submitting a key
+    that is still waiting replaces its job, so a user who resubmits only gets
+    the latest one run.
+    """
+
+    def __init__(self, name: str, workers: int, maxsize: int = 0):
+        self.name = name
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Dict[Hashable, Callable[[], Awaitable[Any]]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Let queued jobs finish for up to `timeout` seconds, then cancel the workers."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[{self.name}] stopping with {len(self._pending)} jobs still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+
+    def submit(self, key: Hashable, job: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Queue `job` under `key`. Must be called from the event loop thread.
+        Returns False when the queue is not running or full.
+        """
+        if not self.running:
+            return False
+        if key in self._pending:
+            self._pending[key] = job
+            return True
+        try:
+            self._queue.put_nowait(key)
+        except asyncio.QueueFull:
+            return False
+        self._pending[key] = job
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._queue.get()
+            job = self._pending.pop(key, None)
+            try:
+                if job is not None:
+                    await job()
+                    self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.failed += 1
+                print(f"[{self.name}] job {key!r} failed: {exc}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers if self.running else 0,
+            "queued": len(self._pending),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
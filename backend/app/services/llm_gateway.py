@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type, TypeVar
+
+import httpx
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+try:
+    import jiter  # type: ignore
+    import openai  # type: ignore
+    from openai import AsyncOpenAI  # type: ignore
+except ImportError:  # openai not installed
+    jiter = None
+    openai = None
+    AsyncOpenAI = None
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class LLMUnavailableError(RuntimeError):
+    """The OpenAI package or API key is missing."""
+
+
+class TokenBucket:
+    """Request-rate limiter shared by every event loop in the process."""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token; return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class LLMGateway:
+    """
+    Single entry point for OpenAI calls.
+
+    Keeps one long-lived AsyncOpenAI client (keep-alive connection pool) per
+    event loop. Every call goes through a shared concurrency limit
+    (LLM_MAX_CONCURRENCY), a token-bucket rate limit (LLM_REQUESTS_PER_SECOND),
+    a per-call timeout, and retries with exponential backoff on rate limits,
+    timeouts, connection errors and 5xx responses.
+    """
+
+    def __init__(self):
+        self._clients: Dict[int, tuple] = {}  # id(loop) -> (loop, client, semaphore)
+        self._lock = threading.Lock()
+        self._bucket = TokenBucket(settings.LLM_REQUESTS_PER_SECOND, settings.LLM_BURST)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return settings.OPENAI_API_KEY or os.environ.get("OPENAI_API_KEY")
+
+    def is_available(self) -> bool:
+        return AsyncOpenAI is not None and bool(self.api_key)
+
+    def _client(self) -> tuple:
+        if AsyncOpenAI is None:
+            raise LLMUnavailableError("openai package is not installed")
+        if not self.api_key:
+            raise LLMUnavailableError("OPENAI_API_KEY is not configured")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(id(loop))
+            if entry is None or entry[0] is not loop:
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.LLM_MAX_CONCURRENCY,
+                        max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+                        keepalive_expiry=60.0,
+                    ),
+                    timeout=settings.LLM_TIMEOUT_SECONDS,
+                )
+                client = AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+                entry = (loop, client, asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY))
+                # Drop clients of loops that have been closed (e.g. asyncio.run in scripts)
+                self._clients = {k: v for k, v in self._clients.items() if not v[0].is_closed()}
+                self._clients[id(loop)] = entry
+            return entry
+
+    @staticmethod
+    def _retryable(exc: BaseException) -> bool:
+        if openai is None:
+            return False
+        if isinstance(exc, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+    async def _backoff(self, exc: BaseException, attempt: int, attempts: int) -> None:
+        self.retries += 1
+        delay = min(settings.LLM_BACKOFF_MAX_SECONDS, settings.LLM_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+        delay *= 0.5 + random.random()
+        print(f"[llm_gateway] {type(exc).__name__}; retry {attempt}/{attempts - 1} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def _call(self, make_request, timeout: Optional[float]) -> Any:
+        _, client, semaphore = self._client()
+        timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        attempts = max(1, settings.LLM_MAX_RETRIES + 1)
+        for attempt in range(1, attempts + 1):
+            await self._bucket.acquire()
+            try:
+                async with semaphore:
+                    self.calls += 1
+                    return await make_request(client.with_options(timeout=timeout))
+            except Exception as exc:
+                if attempt == attempts or not self._retryable(exc):
+                    self.failures += 1
+                    raise
+                await self._backoff(exc, attempt, attempts)
+
+    async def chat_json(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Chat completion in JSON mode, parsed into a dict."""
+        async def request(client):
+            return await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                response_format={"type": "json_object"},
+            )
+
+        response = await self._call(request, timeout)
+        return json.loads(response.choices[0].message.content)
+
+    async def structured(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        schema: Type[T],
+        temperature: float = 0.2,
+        timeout: Optional[float] = None,
+    ) -> T:
+        """Chat completion constrained to `schema` (structured outputs)."""
+        async def request(client):
+            completions = getattr(client.chat.completions, "parse", None) or client.beta.chat.completions.parse
+            return await completions(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                response_format=schema,
+            )
+
+        response = await self._call(request, timeout)
+        message = response.choices[0].message
+        if message.parsed is None:
+            raise ValueError(f"Model returned no structured output: {message.refusal or message.content!r}")
+        return message.parsed
+
+    async def stream_structured(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        schema: Type[T],
+        text_field: str,
+        temperature: float = 0.2,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of `structured`.
+
+        Yields ("delta", text) with the new characters of the string field
+        `text_field` as tokens arrive, then ("done", parsed schema instance).
+        The concurrency slot is held until the stream ends; retries only
+        happen before the first delta was yielded.
+        """
+        _, client, semaphore = self._client()
+        timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        attempts = max(1, settings.LLM_MAX_RETRIES + 1)
+        for attempt in range(1, attempts + 1):
+            await self._bucket.acquire()
+            streamed = ""
+            try:
+                async with semaphore:
+                    self.calls += 1
+                    scoped = client.with_options(timeout=timeout)
+                    open_stream = getattr(scoped.chat.completions, "stream", None) or scoped.beta.chat.completions.stream
+                    async with open_stream(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        response_format=schema,
+                    ) as stream:
+                        async for event in stream:
+                            if event.type != "content.delta":
+                                continue
+                            # The SDK's partial parse drops unterminated strings; keep them
+                            try:
+                                partial = jiter.from_json(event.snapshot.encode("utf-8"), partial_mode="trailing-strings")
+                            except ValueError:
+                                continue
+                            text = partial.get(text_field) if isinstance(partial, dict) else None
+                            if isinstance(text, str) and len(text) > len(streamed) and text.startswith(streamed):
+                                delta, streamed = text[len(streamed):], text
+                                yield "delta", delta
+                        completion = await stream.get_final_completion()
+                message = completion.choices[0].message
+                if message.parsed is None:
+                    raise ValueError(f"Model returned no structured output: {message.refusal or message.content!r}")
+                yield "done", message.parsed
+                return
+            except Exception as exc:
+                if streamed or attempt == attempts or not self._retryable(exc):
+                    self.failures += 1
+                    raise
+                await self._backoff(exc, attempt, attempts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "max_concurrency": settings.LLM_MAX_CONCURRENCY,
+            "requests_per_second": settings.LLM_REQUESTS_PER_SECOND,
+        }
+
+    async def close(self) -> None:
+        """Close the client of the current event loop (app shutdown)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.pop(id(loop), None)
+        if entry is not None:
+            await entry[1].close()
+
+
+# Singleton instance
+llm_gateway = LLMGateway()
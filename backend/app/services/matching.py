@@ -1,8 +1,10 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Iterable, Optional
 import numpy as np
+from app.core.config import settings
 from app.models.Employee import Employee
 from app.models.Position import Position
 from app.models.Skill import HardSkill, SoftSkill
+from app.services.embedding_store import EmbeddingMatrix, embedding_store
 from app.services.ingestion import ingestion_service
 from app.services.vectorization import vectorization_service
 from app.vector_db.client import vector_db_client
@@ -45,19 +47,169 @@ class MatchingService:
     def __init__(self):
         self.employees_table = "employees"
         self.positions_table = "positions"
+        self._db_search_failed = False
+        self._db_search_checked = False
 
     # ---- Internal helpers ----
-    def _db_search(self, table: str, query_vector: List[float], limit: int) -> List[Dict[str, Any]]:
+    def check_db_search(self) -> None:
         """
-        Try to search in pgvector. Returns list of {id, similarity, metadata}.
-        On any failure returns empty list (caller may fallback to in-memory computation).
+        Make sure the pgvector tables can answer this service's queries: their
+        embedding columns must have the dimension of `vectorization_service`
+        vectors (and be keyed by the ids the ingestion service uses).
+        Raises RuntimeError otherwise, instead of failing on every search.
         """
+        expected = vectorization_service.get_vector_dimension()
+        for table in (self.employees_table, self.positions_table):
+            dim = vector_db_client.embedding_dimension(table)
+            if dim is not None and dim != expected:
+                raise RuntimeError(
+                    f"MATCHING_DB_SEARCH is on but the {table} embedding column has {dim} dimensions "
+                    f"and MatchingService queries with {expected}; turn it off or add a matching column"
+                )
+        self._db_search_checked = True
+
+    def _db_search(self, table: str, query_vector: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        """
+        Try to search in pgvector (MATCHING_DB_SEARCH). Returns list of {id, similarity, metadata}.
+        Returns an empty list when disabled or on a database error (caller may
+        fallback to in-memory computation); a dimension mismatch raises.
+        """
+        if not settings.MATCHING_DB_SEARCH:
+            return []
+        if not self._db_search_checked:
+            self.check_db_search()
         try:
             return vector_db_client.search_similar(table, query_vector, limit)
-        except Exception:
-            # Silent fallback to in-memory approach
+        except Exception as e:
+            # Fall back to the in-memory approach; report the cause once
+            if not self._db_search_failed:
+                print(f"[matching] pgvector search unavailable, using in-memory fallback: {e}")
+                self._db_search_failed = True
+            return []
+
+    @staticmethod
+    def _hybrid_candidates(limit: int) -> int:
+        """ANN shortlist size for hybrid re-scoring (same widening as `_fallback_search`)."""
+        return max(limit * 4, 32)
+
+    def _fallback_search(
+        self,
+        matrix: EmbeddingMatrix,
+        query: np.ndarray,
+        limit: int,
+        build: Callable[[str, float], Optional[Dict[str, Any]]],
+        exclude: Iterable[str] = (),
+        hybrid: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        In-memory fallback over the precomputed embedding matrix.
+
+        Similarities for all rows come from one matrix-vector product; rows are
+        then visited best-first via argpartition. For hybrid scores the shortlist
+        is widened until no unvisited row could still reach the top `limit`
+        (its score is at most the hybrid score with perfect skill/category match).
+        """
+        sims = matrix.similarities(query)
+        if sims.size == 0:
             return []
 
+        results: List[Dict[str, Any]] = []
+        k = self._hybrid_candidates(limit) if hybrid else limit
+        visited = 0
+        while True:
+            hits = matrix.top_k_from_scores(sims, k, exclude)
+            for item_id, sim in hits[visited:]:
+                row = build(item_id, sim)
+                if row is not None:
+                    results.append(row)
+            visited = len(hits)
+            if not hybrid or visited < k:
+                break
+            results.sort(key=lambda r: r["score"], reverse=True)
+            best_possible = self.calculate_hybrid_score(hits[-1][1], {"overall_match": 1.0}, True)
+            if len(results) >= limit and best_possible <= results[limit - 1]["score"]:
+                break
+            k *= 4
+        return results
+
+    @staticmethod
+    def _category_match(employee: Employee, category: Any) -> bool:
+        if employee.current_position and employee.current_position.category == category:
+            return True
+        return any(past.category == category for past in employee.past_positions)
+
+    def _employee_for_position_result(
+        self,
+        cand: Employee,
+        sim: float,
+        position: Position,
+        required_hard: List[HardSkill],
+        required_soft: List[SoftSkill],
+    ) -> Dict[str, Any]:
+        overlap = vectorization_service.calculate_skill_overlap(
+            cand.hard_skills,
+            cand.soft_skills,
+            required_hard,
+            required_soft,
+        )
+        category_match = self._category_match(cand, position.category)
+        score = self.calculate_hybrid_score(sim, overlap, category_match)
+
+        # Build details: matching skills list where employee level >= 80% of required
+        employee_hard_dict = {s.skill: s.level for s in cand.hard_skills}
+        matched_skills = [
+            s.skill for s in required_hard
+            if s.skill in employee_hard_dict and employee_hard_dict[s.skill] >= s.level * 0.8
+        ]
+
+        return {
+            "id": cand.employee_id,
+            "name": cand.name,
+            "score": round(float(score), 4),
+            "semantic_similarity": round(float(sim), 4),
+            "skill_match": round(float(overlap.get("overall_match", 0.0)), 4),
+            "details": {
+                "matching_skills": matched_skills,
+                "category_match": category_match,
+            },
+        }
+
+    def _position_for_employee_result(self, employee: Employee, pos: Position, sim: float) -> Dict[str, Any]:
+        # Collect required skills
+        req_hard: List[HardSkill] = []
+        req_soft: List[SoftSkill] = []
+        for profile in pos.profiles:
+            req_hard.extend(profile.hard_skills)
+            req_soft.extend(profile.soft_skills)
+
+        overlap = vectorization_service.calculate_skill_overlap(
+            employee.hard_skills,
+            employee.soft_skills,
+            req_hard,
+            req_soft,
+        )
+        category_match = self._category_match(employee, pos.category)
+        score = self.calculate_hybrid_score(sim, overlap, category_match)
+
+        matched_skills = [
+            s.skill for s in req_hard
+            if any(cs.skill == s.skill and cs.level >= s.level * 0.8 for cs in employee.hard_skills)
+        ]
+
+        return {
+            "id": str(pos.id),
+            "name": pos.name,
+            "score": round(float(score), 4),
+            "semantic_similarity": round(float(sim), 4),
+            "skill_match": round(float(overlap.get("overall_match", 0.0)), 4),
+            "details": {
+                "matching_skills": matched_skills,
+                "category_match": category_match,
+                "matched_requirements": len(matched_skills),
+                "total_requirements": len(req_hard),
+            },
+        }
+
     def calculate_hybrid_score(
         self,
         vector_similarity: float,
@@ -105,10 +257,9 @@ class MatchingService:
         if not position:
             return []
 
-        # 2. Vectorize position (query vector for ANN search)
-        pos_vec_list = vectorization_service.vectorize_position(position)
-        pos_vec = np.array(pos_vec_list)
-        if pos_vec.size == 0:
+        # 2. Position vector (precomputed at ingest; query vector for ANN search)
+        pos_vec = embedding_store.position_vector(position)
+        if pos_vec is None or pos_vec.size == 0:
             return []
 
         # 3. Prepare position skill requirements
@@ -119,7 +270,7 @@ class MatchingService:
             required_soft.extend(profile.soft_skills)
 
         # 4. Try pgvector ANN search first
-        ann_results = self._db_search(self.employees_table, pos_vec_list, limit)
+        ann_results = self._db_search(self.employees_table, pos_vec, self._hybrid_candidates(limit))
 
         results: List[Dict[str, Any]] = []
 
@@ -148,89 +299,20 @@ class MatchingService:
 
                 # Vector similarity from hit, compute overlap and category
                 sim = float(hit.get("similarity", 0.0))
-                overlap = vectorization_service.calculate_skill_overlap(
-                    cand.hard_skills,
-                    cand.soft_skills,
-                    required_hard,
-                    required_soft,
+                results.append(
+                    self._employee_for_position_result(cand, sim, position, required_hard, required_soft)
                 )
-                category_match = False
-                if cand.current_position and cand.current_position.category == position.category:
-                    category_match = True
-                else:
-                    for past in cand.past_positions:
-                        if past.category == position.category:
-                            category_match = True
-                            break
-
-                score = self.calculate_hybrid_score(sim, overlap, category_match)
-
-                employee_hard_dict = {s.skill: s.level for s in cand.hard_skills}
-                matched_skills = [
-                    s.skill for s in required_hard
-                    if s.skill in employee_hard_dict and employee_hard_dict[s.skill] >= s.level * 0.8
-                ]
-
-                results.append({
-                    "id": cand.employee_id,
-                    "name": cand.name,
-                    "score": round(float(score), 4),
-                    "semantic_similarity": round(float(sim), 4),
-                    "skill_match": round(float(overlap.get("overall_match", 0.0)), 4),
-                    "details": {
-                        "matching_skills": matched_skills,
-                        "category_match": category_match,
-                    },
-                })
         else:
-            # Fallback: brute-force over in-memory employees
-            for cand in ingestion_service.list_employees():
-                # 4. Vectorize employee
-                cand_vec = np.array(vectorization_service.vectorize_employee(cand))
-                if cand_vec.size == 0:
-                    continue
-
-                # 5. Cosine similarity
-                sim = self._cosine_similarity(pos_vec, cand_vec)
-
-                # 6. Skill overlap
-                overlap = vectorization_service.calculate_skill_overlap(
-                    cand.hard_skills,
-                    cand.soft_skills,
-                    required_hard,
-                    required_soft,
-                )
-
-                # 7. Category match heuristic
-                category_match = False
-                if cand.current_position and cand.current_position.category == position.category:
-                    category_match = True
-                else:
-                    for past in cand.past_positions:
-                        if past.category == position.category:
-                            category_match = True
-                            break
-
-                score = self.calculate_hybrid_score(sim, overlap, category_match)
-
-                # Build details: matching skills list where employee level >= 80% of required
-                employee_hard_dict = {s.skill: s.level for s in cand.hard_skills}
-                matched_skills = [
-                    s.skill for s in required_hard
-                    if s.skill in employee_hard_dict and employee_hard_dict[s.skill] >= s.level * 0.8
-                ]
+            # Fallback: precomputed in-memory employee embeddings
+            def build(employee_id: str, sim: float) -> Optional[Dict[str, Any]]:
+                cand = ingestion_service.get_employee(employee_id)
+                if not cand:
+                    return None
+                return self._employee_for_position_result(cand, sim, position, required_hard, required_soft)
 
-                results.append({
-                    "id": cand.employee_id,
-                    "name": cand.name,
-                    "score": round(float(score), 4),
-                    "semantic_similarity": round(float(sim), 4),
-                    "skill_match": round(float(overlap.get("overall_match", 0.0)), 4),
-                    "details": {
-                        "matching_skills": matched_skills,
-                        "category_match": category_match,
-                    },
-                })
+            results = self._fallback_search(
+                embedding_store.employees, pos_vec, limit, build, hybrid=True
+            )
 
         # Sort and limit
         results.sort(key=lambda r: r["score"], reverse=True)
@@ -250,14 +332,13 @@ class MatchingService:
         if not employee:
             return []
 
-        cand_vec_list = vectorization_service.vectorize_employee(employee)
-        cand_vec = np.array(cand_vec_list)
-        if cand_vec.size == 0:
+        cand_vec = embedding_store.employee_vector(employee)
+        if cand_vec is None or cand_vec.size == 0:
             return []
 
         results: List[Dict[str, Any]] = []
 
-        ann_results = self._db_search(self.positions_table, cand_vec_list, limit)
+        ann_results = self._db_search(self.positions_table, cand_vec, self._hybrid_candidates(limit))
         if ann_results:
             for hit in ann_results:
                 pos = ingestion_service.get_position(hit["id"])  # Prefer in-memory
@@ -279,101 +360,18 @@ class MatchingService:
                     })
                     continue
 
-                # Collect required skills
-                req_hard: List[HardSkill] = []
-                req_soft: List[SoftSkill] = []
-                for profile in pos.profiles:
-                    req_hard.extend(profile.hard_skills)
-                    req_soft.extend(profile.soft_skills)
-
-                overlap = vectorization_service.calculate_skill_overlap(
-                    employee.hard_skills,
-                    employee.soft_skills,
-                    req_hard,
-                    req_soft,
-                )
-
-                category_match = False
-                if employee.current_position and employee.current_position.category == pos.category:
-                    category_match = True
-                else:
-                    for past in employee.past_positions:
-                        if past.category == pos.category:
-                            category_match = True
-                            break
-
-                score = self.calculate_hybrid_score(sim, overlap, category_match)
-
-                matched_skills = [
-                    s.skill for s in req_hard
-                    if any(cs.skill == s.skill and cs.level >= s.level * 0.8 for cs in employee.hard_skills)
-                ]
-
-                results.append({
-                    "id": str(pos.id),
-                    "name": pos.name,
-                    "score": round(float(score), 4),
-                    "semantic_similarity": round(float(sim), 4),
-                    "skill_match": round(float(overlap.get("overall_match", 0.0)), 4),
-                    "details": {
-                        "matching_skills": matched_skills,
-                        "category_match": category_match,
-                        "matched_requirements": len(matched_skills),
-                        "total_requirements": len(req_hard),
-                    },
-                })
+                results.append(self._position_for_employee_result(employee, pos, sim))
         else:
-            # Fallback: brute-force over in-memory positions
-            for pos in ingestion_service.list_positions():
-                pos_vec = np.array(vectorization_service.vectorize_position(pos))
-                if pos_vec.size == 0:
-                    continue
-
-                sim = self._cosine_similarity(cand_vec, pos_vec)
-
-                # Collect required skills
-                req_hard = []
-                req_soft = []
-                for profile in pos.profiles:
-                    req_hard.extend(profile.hard_skills)
-                    req_soft.extend(profile.soft_skills)
-
-                overlap = vectorization_service.calculate_skill_overlap(
-                    employee.hard_skills,
-                    employee.soft_skills,
-                    req_hard,
-                    req_soft,
-                )
-
-                category_match = False
-                if employee.current_position and employee.current_position.category == pos.category:
-                    category_match = True
-                else:
-                    for past in employee.past_positions:
-                        if past.category == pos.category:
-                            category_match = True
-                            break
-
-                score = self.calculate_hybrid_score(sim, overlap, category_match)
-
-                matched_skills = [
-                    s.skill for s in req_hard
-                    if any(cs.skill == s.skill and cs.level >= s.level * 0.8 for cs in employee.hard_skills)
-                ]
+            # Fallback: precomputed in-memory position embeddings
+            def build(position_id: str, sim: float) -> Optional[Dict[str, Any]]:
+                pos = ingestion_service.get_position(position_id)
+                if not pos:
+                    return None
+                return self._position_for_employee_result(employee, pos, sim)
 
-                results.append({
-                    "id": str(pos.id),
-                    "name": pos.name,
-                    "score": round(float(score), 4),
-                    "semantic_similarity": round(float(sim), 4),
-                    "skill_match": round(float(overlap.get("overall_match", 0.0)), 4),
-                    "details": {
-                        "matching_skills": matched_skills,
-                        "category_match": category_match,
-                        "matched_requirements": len(matched_skills),
-                        "total_requirements": len(req_hard),
-                    },
-                })
+            results = self._fallback_search(
+                embedding_store.positions, cand_vec, limit, build, hybrid=True
+            )
 
         results.sort(key=lambda r: r["score"], reverse=True)
         return results[:limit]
@@ -390,14 +388,13 @@ class MatchingService:
         pivot = ingestion_service.get_employee(employee_id)
         if not pivot:
             return []
-        pivot_vec_list = vectorization_service.vectorize_employee(pivot)
-        pivot_vec = np.array(pivot_vec_list)
-        if pivot_vec.size == 0:
+        pivot_vec = embedding_store.employee_vector(pivot)
+        if pivot_vec is None or pivot_vec.size == 0:
             return []
 
         results: List[Dict[str, Any]] = []
 
-        ann_results = self._db_search(self.employees_table, pivot_vec_list, limit + 1)
+        ann_results = self._db_search(self.employees_table, pivot_vec, limit + 1)
         if ann_results:
             for hit in ann_results:
                 hit_id = hit.get("id")
@@ -433,17 +430,16 @@ class MatchingService:
                         },
                     })
         else:
-            for cand in ingestion_service.list_employees():
-                if cand.employee_id == employee_id:
-                    continue
-                cand_vec = np.array(vectorization_service.vectorize_employee(cand))
-                if cand_vec.size == 0:
-                    continue
-                sim = self._cosine_similarity(pivot_vec, cand_vec)
-                pivot_skills = set(s.skill for s in pivot.hard_skills)
+            # Fallback: precomputed in-memory employee embeddings (similarity only)
+            pivot_skills = set(s.skill for s in pivot.hard_skills)
+
+            def build(cand_id: str, sim: float) -> Optional[Dict[str, Any]]:
+                cand = ingestion_service.get_employee(cand_id)
+                if not cand:
+                    return None
                 cand_skills = set(s.skill for s in cand.hard_skills)
                 common = sorted(list(pivot_skills & cand_skills))
-                results.append({
+                return {
                     "id": cand.employee_id,
                     "name": cand.name,
                     "score": round(float(sim), 4),
@@ -452,7 +448,11 @@ class MatchingService:
                         "explanation": "Similar skill profile and experience",
                         "common_skills": common[:10],
                     },
-                })
+                }
+
+            results = self._fallback_search(
+                embedding_store.employees, pivot_vec, limit, build, exclude=[employee_id]
+            )
 
         results.sort(key=lambda r: r["score"], reverse=True)
         return results[:limit]
@@ -469,14 +469,13 @@ class MatchingService:
         pivot = ingestion_service.get_position(position_id)
         if not pivot:
             return []
-        pivot_vec_list = vectorization_service.vectorize_position(pivot)
-        pivot_vec = np.array(pivot_vec_list)
-        if pivot_vec.size == 0:
+        pivot_vec = embedding_store.position_vector(pivot)
+        if pivot_vec is None or pivot_vec.size == 0:
             return []
 
         results: List[Dict[str, Any]] = []
 
-        ann_results = self._db_search(self.positions_table, pivot_vec_list, limit + 1)
+        ann_results = self._db_search(self.positions_table, pivot_vec, limit + 1)
         if ann_results:
             for hit in ann_results:
                 hid = hit.get("id")
@@ -512,17 +511,16 @@ class MatchingService:
                         },
                     })
         else:
-            for pos in ingestion_service.list_positions():
-                if str(pos.id) == position_id:
-                    continue
-                pos_vec = np.array(vectorization_service.vectorize_position(pos))
-                if pos_vec.size == 0:
-                    continue
-                sim = self._cosine_similarity(pivot_vec, pos_vec)
-                pivot_skills = set(s.skill for pr in pivot.profiles for s in pr.hard_skills)
+            # Fallback: precomputed in-memory position embeddings (similarity only)
+            pivot_skills = set(s.skill for pr in pivot.profiles for s in pr.hard_skills)
+
+            def build(pos_id: str, sim: float) -> Optional[Dict[str, Any]]:
+                pos = ingestion_service.get_position(pos_id)
+                if not pos:
+                    return None
                 pos_skills = set(s.skill for pr in pos.profiles for s in pr.hard_skills)
                 common = sorted(list(pivot_skills & pos_skills))
-                results.append({
+                return {
                     "id": str(pos.id),
                     "name": pos.name,
                     "score": round(float(sim), 4),
@@ -531,7 +529,11 @@ class MatchingService:
                         "explanation": "Similar technical requirements and category",
                         "common_skills": common[:10],
                     },
-                })
+                }
+
+            results = self._fallback_search(
+                embedding_store.positions, pivot_vec, limit, build, exclude=[position_id]
+            )
 
         results.sort(key=lambda r: r["score"], reverse=True)
         return results[:limit]
@@ -0,0 +1,214 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.supabase_client import execute, get_async_supabase_client
+
+try:
+    from psycopg import sql  # type: ignore
+    from psycopg.rows import dict_row  # type: ignore
+    from psycopg.types.numeric import FloatLoader  # type: ignore
+    from psycopg_pool import AsyncConnectionPool  # type: ignore
+except ImportError:  # psycopg 3 not installed
+    sql = None
+    dict_row = None
+    FloatLoader = None
+    AsyncConnectionPool = None
+
+
+CANDIDATE_COLUMNS = ("employee_number", "first_name", "last_name", "hard_skills", "soft_skills")
+POSITION_COLUMNS = ("position_id", "position_name", "description")
+PROFILE_COLUMNS = (
+    "profile_id", "position_id", "profile_name", "position_name", "description", "hard_skills", "soft_skills",
+)
+COURSE_COLUMNS = ("id", "course_name", "course_description")
+
+# match_* RPCs and their parameters, in declaration order
+MATCH_RPCS: Dict[str, Sequence[str]] = {
+    "match_candidates_for_position": ("p_position_id", "p_limit"),
+    "match_similar_candidates": ("p_candidate_id", "p_limit"),
+    "match_positions_for_candidate": ("p_candidate_id", "p_limit"),
+    "match_similar_positions": ("p_position_id", "p_limit"),
+    # db/migrations/002_position_match_details.sql
+    "match_positions_for_candidate_detailed": ("p_candidate_id", "p_limit"),
+    "match_similar_positions_detailed": ("p_position_id", "p_limit"),
+    # db/migrations/005_match_topk_tables.sql
+    "match_candidates_for_position_topk": ("p_position_id", "p_limit"),
+    "match_positions_for_candidate_topk": ("p_candidate_id", "p_limit"),
+    "match_positions_for_candidate_detailed_topk": ("p_candidate_id", "p_limit"),
+}
+
+
+class SupabaseRepository:
+    """
+    Read queries of the /smart endpoints over PostgREST (the default).
+
+    Single-row lookups return the row or None; batched lookups return the rows
+    that exist, in no particular order.
+    """
+
+    @staticmethod
+    async def _client():
+        client = await get_async_supabase_client()
+        if client is None:
+            raise HTTPException(
+                status_code=500,
+                detail="Supabase client is not initialized. Check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY.",
+            )
+        return client
+
+    async def _rows(
+        self,
+        table: str,
+        columns: Sequence[str],
+        column: Optional[str] = None,
+        values: Any = None,
+        order: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        query = (await self._client()).table(table).select(", ".join(columns))
+        if isinstance(values, (list, tuple)):
+            query = query.in_(column, list(values))
+        elif column is not None:
+            query = query.eq(column, values)
+        if order is not None:
+            query = query.order(order)
+        return (await execute(query)).data or []
+
+    async def _row(self, table: str, columns: Sequence[str], column: str, value: Any) -> Optional[Dict[str, Any]]:
+        rows = await self._rows(table, columns, column, value)
+        return rows[0] if rows else None
+
+    async def candidate(self, candidate_id: int) -> Optional[Dict[str, Any]]:
+        return await self._row("structured_employees", CANDIDATE_COLUMNS, "employee_number", candidate_id)
+
+    async def candidates(self, candidate_ids: List[int]) -> List[Dict[str, Any]]:
+        return await self._rows("structured_employees", CANDIDATE_COLUMNS, "employee_number", candidate_ids)
+
+    async def position(self, position_id: int) -> Optional[Dict[str, Any]]:
+        return await self._row("positions", POSITION_COLUMNS, "position_id", position_id)
+
+    async def position_categories(self, position_ids: List[int]) -> List[Dict[str, Any]]:
+        return await self._rows("positions", ("position_id", "category"), "position_id", position_ids)
+
+    async def profile(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        return await self._row("profiles", PROFILE_COLUMNS, "profile_id", profile_id)
+
+    async def profiles(self, profile_ids: List[int]) -> List[Dict[str, Any]]:
+        return await self._rows("profiles", PROFILE_COLUMNS, "profile_id", profile_ids)
+
+    async def profiles_for_position(self, position_id: int) -> List[Dict[str, Any]]:
+        """Ordered by profile_id, so the first one is the position's reference profile."""
+        return await self._rows("profiles", PROFILE_COLUMNS, "position_id", position_id, order="profile_id")
+
+    async def courses(self) -> List[Dict[str, Any]]:
+        return await self._rows("courses", COURSE_COLUMNS)
+
+    async def match(self, name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if name not in MATCH_RPCS:
+            raise ValueError(f"Unknown match RPC: {name}")
+        return (await execute((await self._client()).rpc(name, params))).data or []
+
+    async def close(self) -> None:
+        """The Supabase client is closed by `close_async_supabase_client`."""
+
+
+class PostgresRepository(SupabaseRepository):
+    """
+    The same queries straight over DATABASE_URL (REPOSITORY_BACKEND=postgres).
+
+    Uses an async psycopg pool and server-side prepared statements, which
+    skips the PostgREST HTTP hop and JSON round trip on every small lookup.
+    Rows have the same shape as PostgREST's: jsonb columns are decoded and
+    numeric columns come back as floats. Ids are bound as one int8[]
+    parameter so each query prepares once regardless of how many it gets.
+    """
+
+    def __init__(self):
+        self._pool: Optional["AsyncConnectionPool"] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    async def _configure(conn) -> None:
+        # PostgREST serialises numeric as a JSON number; match that
+        conn.adapters.register_loader("numeric", FloatLoader)
+
+    async def _get_pool(self) -> "AsyncConnectionPool":
+        if self._pool is None:
+            if AsyncConnectionPool is None:
+                raise RuntimeError("psycopg[pool] is required for REPOSITORY_BACKEND=postgres")
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._pool is None:
+                    pool = AsyncConnectionPool(
+                        settings.database_url,
+                        min_size=settings.REPOSITORY_POOL_MIN_SIZE,
+                        max_size=settings.REPOSITORY_POOL_MAX_SIZE,
+                        timeout=settings.REPOSITORY_POOL_TIMEOUT_SECONDS,
+                        kwargs={
+                            "prepare_threshold": settings.REPOSITORY_PREPARE_THRESHOLD,
+                            "autocommit": True,
+                            "row_factory": dict_row,
+                        },
+                        configure=self._configure,
+                        open=False,
+                        name="repository",
+                    )
+                    await pool.open(wait=False)
+                    self._pool = pool
+        return self._pool
+
+    async def _fetch(self, query: "sql.Composable", params: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        pool = await self._get_pool()
+        async with pool.connection() as conn:
+            cur = await conn.execute(query, params)
+            return await cur.fetchall()
+
+    async def _rows(
+        self,
+        table: str,
+        columns: Sequence[str],
+        column: Optional[str] = None,
+        values: Any = None,
+        order: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        query = sql.SQL("SELECT {columns} FROM {table}").format(
+            columns=sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+            table=sql.Identifier(table),
+        )
+        if isinstance(values, (list, tuple)):
+            query += sql.SQL(" WHERE {} = ANY(%(values)s::int8[])").format(sql.Identifier(column))
+            values = [int(v) for v in values]
+        elif column is not None:
+            query += sql.SQL(" WHERE {} = %(values)s::int8").format(sql.Identifier(column))
+        if order is not None:
+            query += sql.SQL(" ORDER BY {}").format(sql.Identifier(order))
+        return await self._fetch(query, {"values": values} if column is not None else None)
+
+    async def match(self, name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        names = MATCH_RPCS.get(name)
+        if names is None:
+            raise ValueError(f"Unknown match RPC: {name}")
+        # Named notation, like PostgREST's rpc call
+        query = sql.SQL("SELECT * FROM {}({})").format(
+            sql.Identifier(name),
+            sql.SQL(", ").join(sql.SQL("{} => {}").format(sql.Identifier(n), sql.Placeholder(n)) for n in names),
+        )
+        return await self._fetch(query, {n: params[n] for n in names})
+
+    async def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+
+def get_repository() -> SupabaseRepository:
+    """The repository selected by REPOSITORY_BACKEND ("supabase" or "postgres")."""
+    return postgres_repository if settings.REPOSITORY_BACKEND == "postgres" else supabase_repository
+
+
+# Singleton instances
+supabase_repository = SupabaseRepository()
+postgres_repository = PostgresRepository()
@@ -0,0 +1,117 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+class ResultStore:
+    """
+    Latest assessment result per user in an embedded SQLite database.
+
+    The database runs in WAL mode, so reads do not block the writer and each
+    submit is a single-row upsert on the `user_id` primary key instead of a
+    rewrite of every user's results. Payloads are stored as JSON text in the
+    same shape as the legacy `assessment_results.json` entries.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS assessment_results (
+                user_id      TEXT PRIMARY KEY,
+                submitted_at TEXT NOT NULL,
+                payload      TEXT NOT NULL
+            )
+            """
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM assessment_results").fetchone()[0]
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM assessment_results WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, user_id: str, result: Dict[str, Any]) -> None:
+        """Insert or replace the user's result."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO assessment_results (user_id, submitted_at, payload) VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    submitted_at = excluded.submitted_at,
+                    payload = excluded.payload
+                """,
+                (user_id, result["submitted_at"], json.dumps(result, ensure_ascii=False)),
+            )
+
+    def update_if_current(self, user_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Replace the user's result only if it is still the same submission
+        (same `submitted_at`); returns False when a newer one superseded it.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE assessment_results SET payload = ? WHERE user_id = ? AND submitted_at = ?",
+                (json.dumps(result, ensure_ascii=False), user_id, result["submitted_at"]),
+            )
+        return cursor.rowcount > 0
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Results whose AI analysis has not completed yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM assessment_results"
+                " WHERE json_extract(payload, '$.analysis_status') = 'pending'"
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def import_json(self, path: Union[str, Path]) -> int:
+        """
+        Load a legacy `{user_id: result}` JSON file in one transaction.
+
+        Existing rows are only replaced by strictly newer submissions, so the
+        import can be re-run safely. Returns the number of rows written.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            all_results = json.load(f)
+
+        rows = [
+            (user_id, result["submitted_at"], json.dumps(result, ensure_ascii=False))
+            for user_id, result in all_results.items()
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO assessment_results (user_id, submitted_at, payload) VALUES (?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        submitted_at = excluded.submitted_at,
+                        payload = excluded.payload
+                    WHERE excluded.submitted_at > assessment_results.submitted_at
+                    """,
+                    rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
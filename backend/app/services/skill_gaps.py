@@ -0,0 +1,197 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, get_args
+import numpy as np
+
+from app.models.BaseValues import HardSkills, SoftSkills
+
+
+# Status codes, in the same order as the thresholds in `_status_codes`
+STATUSES: Tuple[str, ...] = ("strength", "meet", "upskill", "missing")
+
+
+class SkillVocabulary:
+    """
+    Maps skill names to column indexes.
+
+    Seeded from the fixed vocabularies in BaseValues so the common skills
+    always share the same columns; names that are not in the seed (e.g. the
+    Hebrew skills coming from the `skills` table) are appended on first sight.
+    """
+
+    def __init__(self, seed: Iterable[str] = ()):
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+        for name in seed:
+            self.index(name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def index(self, name: str) -> int:
+        key = name.strip().lower()
+        idx = self._index.get(key)
+        if idx is None:
+            with self._lock:
+                idx = self._index.get(key)
+                if idx is None:
+                    idx = len(self._names)
+                    self._names.append(key)
+                    self._index[key] = idx
+        return idx
+
+    def name(self, idx: int) -> str:
+        return self._names[idx]
+
+
+class SkillMatrix:
+    """Dense (rows x vocabulary) level matrix plus the original per-row skill order."""
+
+    def __init__(self, rows: List[Dict[int, int]], width: int):
+        self.levels = np.zeros((len(rows), width), dtype=np.int16)
+        self.mask = np.zeros((len(rows), width), dtype=bool)
+        self.order: List[List[int]] = []
+        for i, row in enumerate(rows):
+            cols = list(row.keys())
+            if cols:
+                self.levels[i, cols] = list(row.values())
+                self.mask[i, cols] = True
+            self.order.append(cols)
+
+
+class SkillGapBatch:
+    """
+    Result of comparing P (candidate, requirement) pairs for one skill kind.
+
+    Everything is kept as arrays; `items(i)` only materializes the gaps for
+    one pair when the caller actually needs them.
+    """
+
+    def __init__(
+        self,
+        vocabulary: SkillVocabulary,
+        candidate_levels: np.ndarray,
+        required_levels: np.ndarray,
+        required_mask: np.ndarray,
+        required_order: List[List[int]],
+    ):
+        self.vocabulary = vocabulary
+        self.candidate_levels = candidate_levels
+        self.required_levels = required_levels
+        self.required_mask = required_mask
+        self.required_order = required_order
+        self.gaps = required_levels - candidate_levels
+        self.status = _status_codes(self.gaps)
+        # (P, 4) counts of each status over the required skills only
+        self.counts = np.stack(
+            [((self.status == code) & required_mask).sum(axis=1) for code in range(len(STATUSES))],
+            axis=1,
+        )
+        self.total_required = required_mask.sum(axis=1)
+
+    def __len__(self) -> int:
+        return self.gaps.shape[0]
+
+    def status_counts(self, i: int) -> Dict[str, int]:
+        return {STATUSES[code]: int(n) for code, n in enumerate(self.counts[i]) if n}
+
+    def items(self, i: int) -> List[Tuple[str, int, int, int, str]]:
+        """(skill, candidate_level, required_level, gap, status) in the requirement's original order."""
+        out: List[Tuple[str, int, int, int, str]] = []
+        for col in self.required_order[i]:
+            out.append((
+                self.vocabulary.name(col),
+                int(self.candidate_levels[i, col]),
+                int(self.required_levels[i, col]),
+                int(self.gaps[i, col]),
+                STATUSES[int(self.status[i, col])],
+            ))
+        return out
+
+
+def _status_codes(gaps: np.ndarray) -> np.ndarray:
+    """Vectorized version of the strength/meet/upskill/missing thresholds."""
+    return np.select(
+        [gaps <= -1, gaps == 0, gaps <= 2],
+        [0, 1, 2],
+        default=3,
+    ).astype(np.int8)
+
+
+class SkillGapEngine:
+    """
+    Vectorized skill-gap computation for many (candidate, profile) pairs at once.
+
+    Hard and soft skills each get their own vocabulary; rows are encoded into
+    dense level matrices and gaps/status counts are computed with a single
+    array operation per kind.
+    """
+
+    def __init__(self):
+        self.vocabularies: Dict[str, SkillVocabulary] = {
+            "hard": SkillVocabulary(get_args(HardSkills)),
+            "soft": SkillVocabulary(get_args(SoftSkills)),
+        }
+
+    def _encode(self, kind: str, skills_rows: Sequence[Any]) -> SkillMatrix:
+        vocab = self.vocabularies[kind]
+        rows: List[Dict[int, int]] = []
+        for skills_json in skills_rows:
+            row: Dict[int, int] = {}
+            for item in skills_json or []:
+                skill = (item.get("skill") or "").strip()
+                if not skill:
+                    continue
+                row[vocab.index(skill)] = int(item.get("level") or 0)
+            rows.append(row)
+        return SkillMatrix(rows, len(vocab))
+
+    def compare(
+        self,
+        kind: str,
+        candidate_skills: Sequence[Any],
+        required_skills: Sequence[Any],
+        pairs: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> SkillGapBatch:
+        """
+        Compare raw JSON skill arrays (`[{"skill": ..., "level": ...}, ...]`).
+
+        With `pairs=None` every candidate is compared to every requirement and
+        pair `i * len(required_skills) + j` holds (candidate i, requirement j).
+        Otherwise only the given (candidate index, requirement index) pairs are computed.
+        """
+        cand = self._encode(kind, candidate_skills)
+        req = self._encode(kind, required_skills)
+        width = len(self.vocabularies[kind])
+        cand_levels = _pad(cand.levels, width)
+        req_levels = _pad(req.levels, width)
+        req_mask = _pad(req.mask, width)
+
+        if pairs is None:
+            n, m = cand_levels.shape[0], req_levels.shape[0]
+            ci = np.repeat(np.arange(n), m)
+            ri = np.tile(np.arange(m), n)
+        else:
+            idx = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+            ci, ri = idx[:, 0], idx[:, 1]
+
+        return SkillGapBatch(
+            vocabulary=self.vocabularies[kind],
+            candidate_levels=cand_levels[ci],
+            required_levels=req_levels[ri],
+            required_mask=req_mask[ri],
+            required_order=[req.order[j] for j in ri.tolist()],
+        )
+
+
+def _pad(matrix: np.ndarray, width: int) -> np.ndarray:
+    """Widen a matrix encoded before the vocabulary grew to the current width."""
+    if matrix.shape[1] == width:
+        return matrix
+    padded = np.zeros((matrix.shape[0], width), dtype=matrix.dtype)
+    padded[:, : matrix.shape[1]] = matrix
+    return padded
+
+
+# Singleton instance
+skill_gap_engine = SkillGapEngine()
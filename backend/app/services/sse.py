@@ -0,0 +1,34 @@
+import json
+from typing import Any, AsyncIterator, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(event: str, data: Any) -> str:
+    """One Server-Sent Events frame with a JSON payload."""
+    payload = json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_response(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """
+    Stream (event, data) pairs as text/event-stream.
+
+    An exception raised by `events` after the response has started is sent
+    as a final `error` event, since the status code can no longer change.
+    """
+
+    async def frames() -> AsyncIterator[str]:
+        try:
+            async for event, data in events:
+                yield sse_event(event, data)
+        except Exception as e:
+            print(f"[sse] stream failed: {e}")
+            yield sse_event("error", {"detail": getattr(e, "detail", None) or str(e)})
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+from app.core.config import settings
+
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+
+
+class StaticAsset:
+    """
+    A JSON data file parsed once and kept in memory.
+
+    `parse` turns the raw JSON into the served value (e.g. validated models);
+    `key` indexes list records by id for O(1) lookups. The file is re-read only
+    when its mtime or size changes, checked at most every
+    `STATIC_ASSET_CHECK_SECONDS`. Values are shared between requests, so
+    callers must copy before mutating.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        parse: Optional[Callable[[Any], Any]] = None,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ):
+        self.path = path
+        self.parse = parse
+        self.key = key
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._value: Any = None
+        self._index: Dict[Hashable, Any] = {}
+
+    def _reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < settings.STATIC_ASSET_CHECK_SECONDS:
+            return
+        with self._lock:
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                self._signature = None
+                raise FileNotFoundError(f"Data file not found: {self.path.name}") from None
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature != self._signature:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                value = self.parse(raw) if self.parse else raw
+                self._index = {self.key(item): item for item in value} if self.key else {}
+                self._value = value
+                self._signature = signature
+            self._checked_at = now
+
+    def value(self) -> Any:
+        self._reload_if_changed()
+        return self._value
+
+    def get(self, record_id: Hashable) -> Optional[Any]:
+        """Record with the given id (requires `key`)."""
+        self._reload_if_changed()
+        return self._index.get(record_id)
+
+
+class StaticAssetRegistry:
+    """Shared registry so each data file is parsed once per process."""
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self._assets: Dict[Path, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def asset(
+        self,
+        filename: Union[str, Path],
+        parse: Optional[Callable[[Any], Any]] = None,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ) -> StaticAsset:
+        """Register (or return the already registered) asset for `filename`."""
+        path = (self.base_dir / filename).resolve()
+        with self._lock:
+            existing = self._assets.get(path)
+            if existing is not None:
+                return existing
+            asset = StaticAsset(path, parse, key)
+            self._assets[path] = asset
+            return asset
+
+
+# Singleton instance
+static_assets = StaticAssetRegistry(DATA_DIR)
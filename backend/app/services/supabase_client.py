@@ -1,12 +1,21 @@
+import asyncio
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+import httpx
+
+from app.core.config import settings
 
 try:
     from supabase import create_client, Client  # type: ignore
+    from supabase import acreate_client, AsyncClient, AsyncClientOptions  # type: ignore
 except ImportError:  # supabase-py not installed
     create_client = None
     Client = None
+    acreate_client = None
+    AsyncClient = None
+    AsyncClientOptions = None
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -14,15 +23,7 @@ except ImportError:
     load_dotenv = None
 
 
-def get_supabase_client() -> Optional["Client"]:
-    """
-    Return a shared Supabase client if supabase-py is installed and env vars are set.
-    Falls back to None so callers can gracefully use mock/file data.
-    """
-    global _client
-    if "_client" in globals():
-        return _client  # type: ignore
-
+def _load_env() -> None:
     # Load .env once if available (project root: ../.. from /back/app/services)
     if load_dotenv:
         env_path = Path(__file__).resolve().parents[3] / ".env"
@@ -32,9 +33,26 @@ def get_supabase_client() -> Optional["Client"]:
             load_dotenv()
 
 
-
+def _credentials() -> tuple[Optional[str], Optional[str]]:
+    _load_env()
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_ANON_KEY")
+    return url, key
+
+
+def get_supabase_client() -> Optional["Client"]:
+    """
+    Return a shared Supabase client if supabase-py is installed and env vars are set.
+    Falls back to None so callers can gracefully use mock/file data.
+
+    Kept for scripts and sync callers; request handlers should use
+    `get_async_supabase_client` so they never block the event loop.
+    """
+    global _client
+    if "_client" in globals():
+        return _client  # type: ignore
+
+    url, key = _credentials()
 
     if not create_client:
         print("[supabase] supabase-py not installed; returning None")
@@ -54,3 +72,92 @@ def get_supabase_client() -> Optional["Client"]:
 
     return _client
 
+
+# -------------------------------------------------------------------
+# Async client (shared by all routers)
+# -------------------------------------------------------------------
+
+_async_client: Optional["AsyncClient"] = None
+_async_client_ready = False
+_async_init_lock: Optional[asyncio.Lock] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """One pooled HTTP/2 connection pool with keep-alive, reused for every PostgREST call."""
+    return httpx.AsyncClient(
+        http2=settings.SUPABASE_HTTP2,
+        timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        follow_redirects=True,
+    )
+
+
+async def get_async_supabase_client() -> Optional["AsyncClient"]:
+    """
+    Return the shared async Supabase client, creating it on first use.
+    Returns None (like `get_supabase_client`) when supabase-py or credentials are missing.
+    """
+    global _async_client, _async_client_ready, _async_init_lock
+    if _async_client_ready:
+        return _async_client
+
+    if _async_init_lock is None:
+        _async_init_lock = asyncio.Lock()
+
+    async with _async_init_lock:
+        if _async_client_ready:
+            return _async_client
+
+        url, key = _credentials()
+        if not acreate_client:
+            print("[supabase] supabase-py (async) not installed; returning None")
+        elif not url or not key:
+            print(f"[supabase] Missing SUPABASE_URL or key (SERVICE_ROLE or ANON); url={bool(url)}, key={bool(key)}")
+        else:
+            try:
+                options = AsyncClientOptions(httpx_client=_build_http_client())  # type: ignore
+                _async_client = await acreate_client(url, key, options=options)  # type: ignore
+            except Exception as exc:  # pragma: no cover - defensive
+                print(f"[supabase] Failed to init async client: {exc}")
+                _async_client = None
+
+        _async_client_ready = True
+
+    return _async_client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.SUPABASE_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def execute(query: Any) -> Any:
+    """
+    Execute a PostgREST query builder (table/rpc) under the shared concurrency limit.
+
+    Usage:
+        resp = await execute(client.table("positions").select("*").eq("position_id", 1))
+    """
+    async with _get_semaphore():
+        return await query.execute()
+
+
+async def close_async_supabase_client() -> None:
+    """Close the pooled HTTP connections (called on application shutdown)."""
+    global _async_client, _async_client_ready
+    client = _async_client
+    _async_client = None
+    _async_client_ready = False
+    if client is None:
+        return
+    try:
+        await client.postgrest.aclose()
+    except Exception as exc:  # pragma: no cover - defensive
+        print(f"[supabase] Failed to close async client: {exc}")
@@ -0,0 +1,109 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.models.StructuredEmployee import StructuredEmployee
+from app.services.supabase_client import execute
+
+# Never returned unless asked for by name: the 1536-float vector and the tsvector
+HEAVY_COLUMNS = frozenset({"embedding", "fulltext"})
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class ListableTable:
+    """
+    A table served by a keyset-paginated list endpoint.
+
+    `key` is the unique, ordered column used as cursor. `columns` whitelists
+    `fields=`; when None (schema not modelled here) any column name is
+    accepted and the default projection is `*`.
+    """
+    name: str
+    key: str
+    columns: Optional[Tuple[str, ...]] = None
+
+    def resolve_fields(self, fields: Optional[str]) -> List[str]:
+        """Columns to select for a `fields=a,b,c` parameter (the cursor key is always included)."""
+        if not fields:
+            if self.columns is None:
+                return ["*"]
+            selected = [c for c in self.columns if c not in HEAVY_COLUMNS]
+        else:
+            selected = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+            allowed = self.columns or ()
+            unknown = [
+                f for f in selected
+                if not _IDENTIFIER.match(f) or (self.columns is not None and f not in allowed)
+            ]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields for {self.name}: {unknown}")
+        if self.key not in selected:
+            selected.insert(0, self.key)
+        return selected
+
+
+STRUCTURED_EMPLOYEES = ListableTable(
+    "structured_employees", "employee_number", tuple(StructuredEmployee.model_fields)
+)
+POSITIONS = ListableTable(
+    "positions", "position_id", ("position_id", "position_name", "description", "category", "embedding", "fulltext")
+)
+EMPLOYEES = ListableTable("employees", "employee_number")
+
+
+async def fetch_page(
+    client: Any, table: ListableTable, fields: List[str], limit: int, after: Optional[Any] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+    """One page ordered by the key, starting after `after`; returns (rows, next cursor or None)."""
+    query = client.table(table.name).select(",".join(fields)).order(table.key).limit(limit)
+    if after is not None:
+        query = query.gt(table.key, after)
+    rows = (await execute(query)).data or []
+    next_cursor = rows[-1].get(table.key) if len(rows) == limit else None
+    return rows, next_cursor
+
+
+async def iter_ndjson(client: Any, table: ListableTable, fields: List[str], page_size: int) -> AsyncIterator[bytes]:
+    """Every row of the table as newline-delimited JSON, fetched one page at a time."""
+    after = None
+    while True:
+        rows, after = await fetch_page(client, table, fields, page_size, after)
+        if rows:
+            yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows).encode("utf-8")
+        if after is None:
+            return
+
+
+async def list_rows(
+    client: Any,
+    table: ListableTable,
+    response: Response,
+    fields: Optional[str],
+    limit: Optional[int],
+    after: Optional[Any],
+    format: str,
+):
+    """
+    Shared body of the list endpoints.
+
+    format=json returns one page and sets `X-Next-Cursor` (pass it back as
+    `after`) when more rows follow. format=ndjson streams the whole table as
+    an export, LIST_EXPORT_PAGE_SIZE rows per query.
+    """
+    selected = table.resolve_fields(fields)
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(client, table, selected, settings.LIST_EXPORT_PAGE_SIZE),
+            media_type="application/x-ndjson",
+        )
+    rows, next_cursor = await fetch_page(client, table, selected, limit or settings.LIST_DEFAULT_PAGE_SIZE, after)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return rows
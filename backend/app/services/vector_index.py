@@ -0,0 +1,518 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.supabase_client import execute, get_async_supabase_client
+from app.vector_db.client import vector_db_client
+
+
+def parse_vector(value: Any) -> Optional[np.ndarray]:
+    """pgvector values arrive from PostgREST as '[0.1,0.2,...]' strings (or lists)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        vec = np.fromstring(text.strip("[]"), dtype=np.float32, sep=",")
+    else:
+        vec = np.asarray(value, dtype=np.float32)
+    return vec if vec.size else None
+
+
+class IVFIndex:
+    """
+    In-process inner-product index over float32 vectors keyed by int ids.
+
+    Below `exact_threshold` vectors it is a brute-force (exact) scan. Above it,
+    a k-means coarse quantizer splits the vectors into `nlist` inverted lists
+    (IVF-Flat) and a query only scans the `nprobe` lists whose centroids score
+    best. The lists are kept as one contiguous matrix ordered by list, so each
+    probe is a plain matrix-vector product over a slice.
+
+    Upserts/removals after training go to a small delta that is scanned
+    exactly and shadows the packed copy; the packed lists are rebuilt once the
+    delta grows past `repack_fraction` of the index.
+    """
+
+    def __init__(
+        self,
+        nlist: int = 0,
+        nprobe: int = 32,
+        exact_threshold: int = 20_000,
+        repack_fraction: float = 0.02,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.exact_threshold = exact_threshold
+        self.repack_fraction = repack_fraction
+        self.dim: Optional[int] = None
+        # Master store (row order is arbitrary; removals swap in the last row)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self._row_of: Dict[int, int] = {}
+        # Trained state
+        self.centroids: Optional[np.ndarray] = None
+        self._packed = np.empty((0, 0), dtype=np.float32)
+        self._packed_ids = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._stale: Set[int] = set()  # ids whose packed copy is outdated or removed
+        self._delta: Set[int] = set()  # ids upserted since the last pack
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, item_id: int) -> bool:
+        return int(item_id) in self._row_of
+
+    def vector(self, item_id: int) -> Optional[np.ndarray]:
+        row = self._row_of.get(int(item_id))
+        return None if row is None else self._vectors[row].copy()
+
+    # ----------------------------------------------------------------
+    # Mutation
+    # ----------------------------------------------------------------
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        capacity = self._ids.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        ids = np.empty(new_capacity, dtype=np.int64)
+        vectors = np.empty((new_capacity, self.dim), dtype=np.float32)
+        ids[: self._size] = self._ids[: self._size]
+        vectors[: self._size] = self._vectors[: self._size]
+        self._ids, self._vectors = ids, vectors
+
+    def upsert(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if not len(ids):
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._vectors = np.empty((0, self.dim), dtype=np.float32)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"vector dimension {vectors.shape[1]} != index dimension {self.dim}")
+
+            self._reserve(len(ids))
+            rows = np.empty(len(ids), dtype=np.intp)
+            for i, item_id in enumerate(ids):
+                item_id = int(item_id)
+                row = self._row_of.get(item_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._row_of[item_id] = row
+                    self._ids[row] = item_id
+                rows[i] = row
+            self._vectors[rows] = vectors
+
+            if self.centroids is None:
+                if self._size >= self.exact_threshold:
+                    self.train()
+                return
+            for item_id in ids:
+                self._stale.add(int(item_id))
+                self._delta.add(int(item_id))
+            self._maybe_repack()
+
+    def remove(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            for item_id in ids:
+                item_id = int(item_id)
+                row = self._row_of.pop(item_id, None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    moved = int(self._ids[last])
+                    self._ids[row] = moved
+                    self._vectors[row] = self._vectors[last]
+                    self._row_of[moved] = row
+                self._size = last
+                if self.centroids is not None:
+                    self._stale.add(item_id)
+                    self._delta.discard(item_id)
+            self._maybe_repack()
+
+    def _maybe_repack(self) -> None:
+        if self.centroids is not None and len(self._stale) > max(1024, self.repack_fraction * self._size):
+            self._pack()
+
+    def _pack(self) -> None:
+        """Lay all vectors out contiguously, grouped by nearest centroid."""
+        n = self._size
+        data = self._vectors[:n]
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65_536):
+            block = data[start:start + 65_536]
+            assign[start:start + block.shape[0]] = np.argmax(block @ self.centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=self.centroids.shape[0])
+        self._packed = data[order]
+        self._packed_ids = self._ids[:n][order]
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._stale.clear()
+        self._delta.clear()
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """(Re)build the coarse quantizer with spherical k-means over a sample, then repack."""
+        with self._lock:
+            n = self._size
+            if n < self.exact_threshold:
+                self.centroids = None
+                self._stale.clear()
+                self._delta.clear()
+                return
+            nlist = self.nlist or int(min(2 * np.sqrt(n), n // 39))
+            nlist = max(1, nlist)
+            rng = np.random.default_rng(seed)
+            data = self._vectors[:n]
+            sample = data[rng.choice(n, size=min(n, nlist * 32), replace=False)]
+
+            centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                counts = np.bincount(labels, minlength=nlist)
+                order = np.argsort(labels, kind="stable")
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                sums = np.zeros_like(centroids)
+                nonempty = counts > 0
+                sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+                empty = ~nonempty
+                if empty.any():
+                    sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                centroids = sums / np.maximum(norms, 1e-12)
+
+            self.centroids = centroids.astype(np.float32)
+            self._pack()
+
+    # ----------------------------------------------------------------
+    # Search
+    # ----------------------------------------------------------------
+
+    def _scan(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, ids) of every vector the query has to look at."""
+        if self.centroids is None:
+            n = self._size
+            return self._vectors[:n] @ query, self._ids[:n]
+
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        scores = [self._packed[self._offsets[c]:self._offsets[c + 1]] @ query for c in probe]
+        ids = [self._packed_ids[self._offsets[c]:self._offsets[c + 1]] for c in probe]
+        if self._stale:
+            ids_all = np.concatenate(ids)
+            keep = ~np.isin(ids_all, np.fromiter(self._stale, dtype=np.int64))
+            scores, ids = [np.concatenate(scores)[keep]], [ids_all[keep]]
+        if self._delta:
+            rows = np.fromiter((self._row_of[i] for i in self._delta), dtype=np.intp)
+            scores.append(self._vectors[rows] @ query)
+            ids.append(self._ids[rows])
+        return np.concatenate(scores), np.concatenate(ids)
+
+    def search(self, query: np.ndarray, k: int, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Top-k (id, inner product) pairs, best first; ids in `exclude` are skipped."""
+        exclude = {int(e) for e in exclude}
+        query = np.asarray(query, dtype=np.float32).ravel()
+        with self._lock:
+            if not self._size or k <= 0:
+                return []
+            scores, ids = self._scan(query)
+
+            take = min(k + len(exclude), scores.shape[0])
+            if not take:
+                return []
+            top = np.argpartition(-scores, take - 1)[:take]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            out: List[Tuple[int, float]] = []
+            for idx in top.tolist():
+                item_id = int(ids[idx])
+                if item_id in exclude:
+                    continue
+                out.append((item_id, float(scores[idx])))
+                if len(out) == k:
+                    break
+            return out
+
+
+def _best_per_group(
+    hits: Iterable[Tuple[int, float, Any]],
+    group_of: Callable[[int], Any],
+) -> Dict[Any, Tuple[int, float, Any]]:
+    """Keep the best-scoring hit per group (like ROW_NUMBER() ... WHERE rn = 1)."""
+    best: Dict[Any, Tuple[int, float, Any]] = {}
+    for item_id, score, source in hits:
+        group = group_of(item_id)
+        current = best.get(group)
+        if current is None or score > current[1]:
+            best[group] = (item_id, score, source)
+    return best
+
+
+class LocalMatchBackend:
+    """
+    In-process replacement for the four match_* RPCs.
+
+    Holds one index over `structured_employees.embedding` and one over
+    `profiles.embedding`, plus the few columns the RPCs return. Scores follow
+    the RPCs: `1 - (a <#> b)`, i.e. 1 + inner product.
+    """
+
+    def __init__(self):
+        self.employees = self._new_index()
+        self.profiles = self._new_index()
+        self.employee_meta: Dict[int, Dict[str, Any]] = {}
+        self.profile_meta: Dict[int, Dict[str, Any]] = {}
+        self.position_profiles: Dict[int, Set[int]] = {}
+        self.loaded = False
+
+    @staticmethod
+    def _new_index() -> IVFIndex:
+        return IVFIndex(
+            nlist=settings.LOCAL_INDEX_NLIST,
+            nprobe=settings.LOCAL_INDEX_NPROBE,
+            exact_threshold=settings.LOCAL_INDEX_EXACT_THRESHOLD,
+        )
+
+    # ----------------------------------------------------------------
+    # Loading / incremental updates
+    # ----------------------------------------------------------------
+
+    async def load(self, page_size: int = 1000) -> None:
+        """Load both embedding tables, replacing the current contents."""
+        client = await get_async_supabase_client()
+        if client is None:
+            print("[vector_index] Supabase client unavailable; local match index stays empty")
+            return
+
+        # Build into a fresh backend and swap at the end so a reload never
+        # serves a half-filled index.
+        fresh = LocalMatchBackend()
+        tables = (
+            ("structured_employees", "employee_number, first_name, last_name", "employee_number", fresh._set_employees),
+            ("profiles", "profile_id, position_id, profile_name, position_name", "profile_id", fresh._set_profiles),
+        )
+        for table, columns, key, store in tables:
+            arrays = await self._fetch_binary(table) if settings.LOCAL_INDEX_BINARY_LOAD else None
+            if arrays is not None:
+                # Vectors came over binary COPY; only the small columns go through PostgREST
+                meta = {int(row[key]): row for row in await self._fetch_rows(client, table, columns, key, page_size)}
+                ids = arrays[0].tolist()
+                store(ids, arrays[1], [meta.get(i, {}) for i in ids])
+                continue
+
+            def on_page(rows: List[Dict[str, Any]], key: str = key, store: Callable = store) -> None:
+                store(*self._vectors(rows, key))
+
+            await self._fetch_rows(client, table, f"{columns}, embedding", key, page_size, on_page)
+
+        fresh.loaded = True
+        self.__dict__.update(fresh.__dict__)
+        print(f"[vector_index] loaded {len(self.employees)} employees, {len(self.profiles)} profiles")
+
+    @staticmethod
+    async def _fetch_binary(table: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(ids, float32 matrix) straight from Postgres, or None to fall back to PostgREST."""
+        try:
+            return await asyncio.to_thread(vector_db_client.fetch_embeddings, table)
+        except Exception as e:
+            print(f"[vector_index] binary load of {table} failed ({e}); falling back to PostgREST")
+            return None
+
+    @staticmethod
+    async def _fetch_rows(
+        client: Any,
+        table: str,
+        columns: str,
+        key: str,
+        page_size: int,
+        on_page: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Rows with an embedding, paged by offset; handed to `on_page` as they arrive, else collected."""
+        collected: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            resp = await execute(
+                client.table(table)
+                .select(columns)
+                .not_.is_("embedding", "null")
+                .order(key)
+                .range(start, start + page_size - 1)
+            )
+            rows = resp.data or []
+            if on_page is not None:
+                on_page(rows)
+            else:
+                collected.extend(rows)
+            if len(rows) < page_size:
+                return collected
+            start += page_size
+
+    @staticmethod
+    def _vectors(rows: Iterable[Dict[str, Any]], key: str) -> Tuple[List[int], Optional[np.ndarray], List[Dict[str, Any]]]:
+        ids: List[int] = []
+        vectors: List[np.ndarray] = []
+        kept: List[Dict[str, Any]] = []
+        for row in rows:
+            vec = parse_vector(row.get("embedding"))
+            if vec is None or row.get(key) is None:
+                continue
+            ids.append(int(row[key]))
+            vectors.append(vec)
+            kept.append(row)
+        return ids, (np.vstack(vectors) if vectors else None), kept
+
+    def upsert_employees(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self._set_employees(*self._vectors(rows, "employee_number"))
+
+    def _set_employees(self, ids: List[int], vectors: Optional[np.ndarray], rows: List[Dict[str, Any]]) -> None:
+        if not ids:
+            return
+        self.employees.upsert(ids, vectors)
+        for item_id, row in zip(ids, rows):
+            self.employee_meta[item_id] = {
+                "first_name": row.get("first_name"),
+                "last_name": row.get("last_name"),
+            }
+
+    def remove_employee(self, employee_number: int) -> None:
+        self.employees.remove([employee_number])
+        self.employee_meta.pop(int(employee_number), None)
+
+    def upsert_profiles(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self._set_profiles(*self._vectors(rows, "profile_id"))
+
+    def _set_profiles(self, ids: List[int], vectors: Optional[np.ndarray], rows: List[Dict[str, Any]]) -> None:
+        if not ids:
+            return
+        self.profiles.upsert(ids, vectors)
+        for item_id, row in zip(ids, rows):
+            previous = self.profile_meta.get(item_id)
+            if previous is not None:
+                self.position_profiles.get(previous["position_id"], set()).discard(item_id)
+            position_id = int(row["position_id"]) if row.get("position_id") is not None else None
+            self.profile_meta[item_id] = {
+                "position_id": position_id,
+                "profile_name": row.get("profile_name"),
+                "position_name": row.get("position_name"),
+            }
+            self.position_profiles.setdefault(position_id, set()).add(item_id)
+
+    def remove_profile(self, profile_id: int) -> None:
+        self.profiles.remove([profile_id])
+        meta = self.profile_meta.pop(int(profile_id), None)
+        if meta is not None:
+            self.position_profiles.get(meta["position_id"], set()).discard(int(profile_id))
+
+    # ----------------------------------------------------------------
+    # RPC equivalents
+    # ----------------------------------------------------------------
+
+    def _position_vectors(self, position_id: int) -> List[Tuple[int, np.ndarray]]:
+        out = []
+        for profile_id in sorted(self.position_profiles.get(int(position_id), ())):
+            vec = self.profiles.vector(profile_id)
+            if vec is not None:
+                out.append((profile_id, vec))
+        return out
+
+    def _employee_row(self, candidate_id: int, score: float) -> Dict[str, Any]:
+        meta = self.employee_meta.get(candidate_id, {})
+        return {
+            "candidate_id": candidate_id,
+            "first_name": meta.get("first_name"),
+            "last_name": meta.get("last_name"),
+            "score": score,
+        }
+
+    def _profile_row(self, profile_id: int, score: float) -> Dict[str, Any]:
+        meta = self.profile_meta.get(profile_id, {})
+        return {
+            "profile_id": profile_id,
+            "position_id": meta.get("position_id"),
+            "profile_name": meta.get("profile_name"),
+            "position_name": meta.get("position_name"),
+            "score": score,
+        }
+
+    def match_candidates_for_position(self, p_position_id: int, p_limit: int) -> List[Dict[str, Any]]:
+        # Any candidate in the overall top-k is in the top-k of its own best profile,
+        # so a top-k search per profile followed by best-per-candidate is exact.
+        hits = []
+        for profile_id, vec in self._position_vectors(p_position_id):
+            hits.extend((cid, score, profile_id) for cid, score in self.employees.search(vec, p_limit))
+        best = _best_per_group(hits, lambda cid: cid)
+        ranked = sorted(best.values(), key=lambda h: -h[1])[:p_limit]
+        rows = []
+        for candidate_id, score, profile_id in ranked:
+            row = self._employee_row(candidate_id, 1.0 + score)
+            profile = self._profile_row(profile_id, 0.0)
+            row.update(
+                profile_id=profile_id,
+                profile_name=profile["profile_name"],
+                position_name=profile["position_name"],
+            )
+            rows.append(row)
+        return rows
+
+    def match_similar_candidates(self, p_candidate_id: int, p_limit: int) -> List[Dict[str, Any]]:
+        vec = self.employees.vector(p_candidate_id)
+        if vec is None:
+            return []
+        hits = self.employees.search(vec, p_limit, exclude=[p_candidate_id])
+        return [self._employee_row(cid, 1.0 + score) for cid, score in hits]
+
+    def _top_positions(
+        self,
+        queries: List[np.ndarray],
+        limit: int,
+        exclude_position: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Best profile per position for the given query vectors, widening k until `limit` positions are found."""
+        def group_of(profile_id: int) -> Optional[int]:
+            return self.profile_meta.get(profile_id, {}).get("position_id")
+
+        k = max(limit * 4, 16)
+        while True:
+            hits = []
+            for vec in queries:
+                hits.extend((pid, score, None) for pid, score in self.profiles.search(vec, k))
+            best = _best_per_group(hits, group_of)
+            best.pop(exclude_position, None)
+            if len(best) >= limit or k >= len(self.profiles):
+                break
+            k *= 4
+        ranked = sorted(best.values(), key=lambda h: -h[1])[:limit]
+        return [self._profile_row(pid, 1.0 + score) for pid, score, _ in ranked]
+
+    def match_positions_for_candidate(self, p_candidate_id: int, p_limit: int) -> List[Dict[str, Any]]:
+        vec = self.employees.vector(p_candidate_id)
+        if vec is None:
+            return []
+        return self._top_positions([vec], p_limit)
+
+    def match_similar_positions(self, p_position_id: int, p_limit: int) -> List[Dict[str, Any]]:
+        queries = [vec for _, vec in self._position_vectors(p_position_id)]
+        if not queries:
+            return []
+        return self._top_positions(queries, p_limit, exclude_position=int(p_position_id))
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Dispatch by RPC name so callers can swap `client.rpc(name, params)` for this."""
+        handler = getattr(self, name, None)
+        if handler is None or not name.startswith("match_"):
+            raise ValueError(f"Unknown match RPC: {name}")
+        return handler(**params)
+
+
+# Singleton instance
+local_match_backend = LocalMatchBackend()
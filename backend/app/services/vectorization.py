@@ -1,4 +1,5 @@
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence
 import numpy as np
 
 # Optional import for sentence_transformers (heavy ML dependency)
@@ -15,6 +16,9 @@ from app.models.Employee import Employee
 from app.models.Position import Position
 from app.models.Skill import HardSkill, SoftSkill
 from app.core.config import settings
+from app.services.embedding_cache import EmbeddingCache
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
 
 
 class VectorizationService:
@@ -22,6 +26,7 @@ class VectorizationService:
 
     def __init__(self):
         self._model = None
+        self._cache: Optional[EmbeddingCache] = None
 
     @property
     def model(self) -> Optional[Any]:
@@ -29,9 +34,16 @@ class VectorizationService:
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             return None
         if self._model is None:
-            self._model = SentenceTransformer('all-MiniLM-L6-v2')
+            self._model = SentenceTransformer(MODEL_NAME)
         return self._model
     
+    @property
+    def cache(self) -> Optional[EmbeddingCache]:
+        """On-disk embedding cache keyed by text hash (None when EMBEDDING_CACHE_DIR is unset)."""
+        if self._cache is None and settings.EMBEDDING_CACHE_DIR:
+            self._cache = EmbeddingCache(settings.EMBEDDING_CACHE_DIR, MODEL_NAME)
+        return self._cache
+
     def is_available(self) -> bool:
         """Check if vectorization is available"""
         return SENTENCE_TRANSFORMERS_AVAILABLE
@@ -176,7 +188,7 @@ This position requires {len(all_hard_skills)} technical skills and {len(all_soft
 
         # 1. Semantic embedding (384 dims)
         text = self._format_employee_text(employee)
-        semantic_embedding = self.model.encode(text, convert_to_numpy=True)
+        semantic_embedding = self._encode_texts([text])[0]
 
         # 2. Structured features (8 dims)
         structured_features = self._create_structured_features(
@@ -205,7 +217,7 @@ This position requires {len(all_hard_skills)} technical skills and {len(all_soft
 
         # 1. Semantic embedding
         text = self._format_position_text(position)
-        semantic_embedding = self.model.encode(text, convert_to_numpy=True)
+        semantic_embedding = self._encode_texts([text])[0]
 
         # 2. Structured features
         all_hard_skills = []
@@ -222,6 +234,95 @@ This position requires {len(all_hard_skills)} technical skills and {len(all_soft
         # 3. Combine (using semantic only for MVP)
         return semantic_embedding.tolist()
 
+    # ---- Batch encoding ----
+
+    def _encode_texts(
+        self,
+        texts: Sequence[str],
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        executor: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Encode many texts at model throughput.
+
+        Texts are sorted by length (longest first) so each batch pads to similar
+        lengths, encoded in `batch_size` chunks, optionally spread over a thread
+        pool or a sentence-transformers process pool, and returned as a
+        (len(texts), dim) float32 array in the original order.
+
+        With the embedding cache enabled, only texts that were never encoded
+        before reach the model.
+        """
+        dim = self.get_vector_dimension()
+        if not texts or not self.is_available():
+            return np.empty((0, dim), dtype=np.float32)
+
+        cache = self.cache
+        if cache is not None:
+            return cache.embed(
+                list(texts),
+                lambda missing: self._encode_uncached(missing, batch_size, workers, executor),
+            )
+        return self._encode_uncached(texts, batch_size, workers, executor)
+
+    def _encode_uncached(
+        self,
+        texts: Sequence[str],
+        batch_size: Optional[int],
+        workers: Optional[int],
+        executor: Optional[str],
+    ) -> np.ndarray:
+
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        workers = settings.EMBEDDING_WORKERS if workers is None else workers
+        executor = executor or settings.EMBEDDING_EXECUTOR
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        sorted_texts = [texts[i] for i in order]
+        model = self.model
+
+        if workers > 1 and executor == "process":
+            pool = model.start_multi_process_pool(target_devices=["cpu"] * workers)
+            try:
+                encoded = model.encode_multi_process(sorted_texts, pool, batch_size=batch_size)
+            finally:
+                model.stop_multi_process_pool(pool)
+        else:
+            chunks = [sorted_texts[i:i + batch_size] for i in range(0, len(sorted_texts), batch_size)]
+
+            def encode(chunk: List[str]) -> np.ndarray:
+                return model.encode(chunk, batch_size=batch_size, convert_to_numpy=True)
+
+            if workers > 1 and len(chunks) > 1:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    parts = list(pool.map(encode, chunks))
+            else:
+                parts = [encode(chunk) for chunk in chunks]
+            encoded = np.vstack(parts)
+
+        out = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        out[order] = encoded
+        return out
+
+    def vectorize_employees(self, employees: Sequence[Employee], **options: Any) -> np.ndarray:
+        """Batch version of `vectorize_employee`: (N, 384) float32, empty if ML features are unavailable."""
+        if not self.is_available():
+            return np.empty((0, self.get_vector_dimension()), dtype=np.float32)
+        return self._encode_texts([self._format_employee_text(e) for e in employees], **options)
+
+    def vectorize_positions(self, positions: Sequence[Position], **options: Any) -> np.ndarray:
+        """Batch version of `vectorize_position`: (N, 384) float32, empty if ML features are unavailable."""
+        if not self.is_available():
+            return np.empty((0, self.get_vector_dimension()), dtype=np.float32)
+        return self._encode_texts([self._format_position_text(p) for p in positions], **options)
+
+    def vectorize_texts(self, texts: Sequence[str], **options: Any) -> np.ndarray:
+        """Embed free texts (e.g. course descriptions): (N, 384) float32, empty if ML features are unavailable."""
+        if not self.is_available():
+            return np.empty((0, self.get_vector_dimension()), dtype=np.float32)
+        return self._encode_texts(list(texts), **options)
+
     def calculate_skill_overlap(
         self,
         employee_hard: List[HardSkill],
@@ -0,0 +1,369 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+try:
+    from psycopg import OperationalError, sql  # type: ignore
+    from psycopg_pool import ConnectionPool, PoolTimeout  # type: ignore
+    from pgvector.psycopg import register_vector  # type: ignore
+except ImportError:  # psycopg 3 / pgvector not installed
+    sql = None
+    ConnectionPool = None
+    register_vector = None
+
+    # Placeholders so the `except` clauses below stay valid
+    class OperationalError(Exception):
+        pass
+
+    class PoolTimeout(Exception):
+        pass
+
+
+@dataclass(frozen=True)
+class VectorTable:
+    """Where a logical entity's embeddings live and how to label a hit."""
+
+    table: str
+    id_column: str
+    name_columns: Tuple[str, ...]
+    embedding_column: str = "embedding"
+
+
+# Only these tables can be searched; identifiers are never taken from callers.
+VECTOR_TABLES: Dict[str, VectorTable] = {
+    "employees": VectorTable("structured_employees", "employee_number", ("first_name", "last_name")),
+    "positions": VectorTable("positions", "position_id", ("position_name",)),
+    "profiles": VectorTable("profiles", "profile_id", ("profile_name",)),
+}
+VECTOR_TABLES.update({spec.table: spec for spec in list(VECTOR_TABLES.values())})
+
+# distance operator and its conversion to a higher-is-better similarity
+_METRICS: Dict[str, Tuple[str, Callable[[float], float]]] = {
+    "cosine": ("<=>", lambda d: 1.0 - d),
+    "ip": ("<#>", lambda d: -d),
+    "l2": ("<->", lambda d: 1.0 / (1.0 + d)),
+}
+
+
+# Binary COPY framing (https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4)
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_COPY_TRAILER = b"\xff\xff"
+_COPY_FLUSH_BYTES = 1 << 20
+
+
+def _embedding_row_dtype(dim: int) -> np.dtype:
+    """One binary COPY row of (id int8, embedding vector(dim)), all big-endian."""
+    return np.dtype([
+        ("fields", ">i2"),
+        ("id_len", ">i4"),
+        ("id", ">i8"),
+        ("vec_len", ">i4"),
+        ("dim", ">i2"),
+        ("unused", ">i2"),
+        ("vec", ">f4", (dim,)),
+    ])
+
+
+class EmbeddingCopyReader:
+    """
+    Incremental decoder for `COPY (SELECT id::int8, embedding ...) TO STDOUT
+    (FORMAT BINARY)`.
+
+    Rows have a fixed size for a fixed dimension, so buffered bytes are
+    decoded in bulk with a structured dtype and written straight into
+    preallocated float32/int64 arrays (grown by doubling if the table grew
+    since it was counted). Nothing is materialized per float.
+    """
+
+    def __init__(self, dim: int, expected_rows: int = 0):
+        self.dim = dim
+        self.dtype = _embedding_row_dtype(dim)
+        self.ids = np.empty(max(1, expected_rows), dtype=np.int64)
+        self.vectors = np.empty((max(1, expected_rows), dim), dtype=np.float32)
+        self.count = 0
+        self._pending = bytearray()
+        self._header_done = False
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        self.ids = np.resize(self.ids, capacity)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[: self.count] = self.vectors[: self.count]
+        self.vectors = vectors
+
+    def _decode(self) -> None:
+        buf = self._pending
+        if not self._header_done:
+            if len(buf) < 19:
+                return
+            if bytes(buf[:11]) != _COPY_SIGNATURE:
+                raise ValueError("not a binary COPY stream")
+            extension = int.from_bytes(buf[15:19], "big")
+            if len(buf) < 19 + extension:
+                return
+            del buf[: 19 + extension]
+            self._header_done = True
+
+        n = len(buf) // self.dtype.itemsize
+        if n:
+            rows = np.frombuffer(buf, dtype=self.dtype, count=n)
+            if (
+                (rows["fields"] != 2).any()
+                or (rows["id_len"] != 8).any()
+                or (rows["vec_len"] != 4 + 4 * self.dim).any()
+                or (rows["dim"] != self.dim).any()
+            ):
+                raise ValueError(f"unexpected row layout (expected id int8 + vector({self.dim}))")
+            self._grow(self.count + n)
+            self.ids[self.count: self.count + n] = rows["id"]
+            self.vectors[self.count: self.count + n] = rows["vec"]
+            self.count += n
+            del rows
+            del buf[: n * self.dtype.itemsize]
+
+    def feed(self, data) -> None:
+        self._pending += data
+        if len(self._pending) >= _COPY_FLUSH_BYTES:
+            self._decode()
+
+    def finish(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode what is left, check the trailer and return (ids, vectors)."""
+        self._decode()
+        if bytes(self._pending) != _COPY_TRAILER:
+            raise ValueError(f"truncated binary COPY stream ({len(self._pending)} stray bytes)")
+        if len(self.ids) == self.count:
+            return self.ids, self.vectors
+        # Over-allocated (rows were deleted, or the buffer doubled): release the slack
+        return self.ids[: self.count].copy(), self.vectors[: self.count].copy()
+
+
+class VectorDBClient:
+    """
+    Pooled pgvector search over `settings.database_url`.
+
+    Queries order by the distance operator of `VECTOR_DB_METRIC` so Postgres
+    can serve them from an HNSW/IVFFlat index built with the matching opclass.
+    Query vectors are sent as binary pgvector parameters, and statements are
+    prepared server-side once a connection has run them `VECTOR_DB_PREPARE_THRESHOLD`
+    times. Hits are returned as {id, similarity, metadata: {name}}.
+    """
+
+    def __init__(self):
+        self._pool: Optional["ConnectionPool"] = None
+        self._lock = threading.Lock()
+        self._dimensions: Dict[str, Optional[int]] = {}
+        self._unavailable_until = 0.0
+
+    # ----------------------------------------------------------------
+    # Pool
+    # ----------------------------------------------------------------
+
+    def _configure(self, conn) -> None:
+        register_vector(conn)
+        with conn.cursor() as cur:
+            if settings.VECTOR_DB_HNSW_EF_SEARCH:
+                cur.execute(sql.SQL("SET hnsw.ef_search = {}").format(sql.Literal(settings.VECTOR_DB_HNSW_EF_SEARCH)))
+            if settings.VECTOR_DB_IVFFLAT_PROBES:
+                cur.execute(sql.SQL("SET ivfflat.probes = {}").format(sql.Literal(settings.VECTOR_DB_IVFFLAT_PROBES)))
+        conn.commit()
+
+    @property
+    def pool(self) -> "ConnectionPool":
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if ConnectionPool is None:
+                        raise RuntimeError("psycopg[pool] and pgvector are required for vector DB search")
+                    pool = ConnectionPool(
+                        settings.database_url,
+                        min_size=settings.VECTOR_DB_POOL_MIN_SIZE,
+                        max_size=settings.VECTOR_DB_POOL_MAX_SIZE,
+                        timeout=settings.VECTOR_DB_POOL_TIMEOUT_SECONDS,
+                        kwargs={"prepare_threshold": settings.VECTOR_DB_PREPARE_THRESHOLD, "autocommit": True},
+                        configure=self._configure,
+                        open=False,
+                        name="vector_db",
+                    )
+                    pool.open(wait=False)
+                    self._pool = pool
+        return self._pool
+
+    @contextmanager
+    def _connection(self) -> Iterator[Any]:
+        """
+        Borrow a pooled connection. After the database could not be reached,
+        calls fail fast for `VECTOR_DB_RETRY_SECONDS` instead of each waiting
+        out the pool timeout.
+        """
+        if time.monotonic() < self._unavailable_until:
+            raise RuntimeError("vector database unavailable; retrying later")
+        try:
+            with self.pool.connection() as conn:
+                yield conn
+        except (PoolTimeout, OperationalError):
+            self._unavailable_until = time.monotonic() + settings.VECTOR_DB_RETRY_SECONDS
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    # ----------------------------------------------------------------
+    # Query building
+    # ----------------------------------------------------------------
+
+    @staticmethod
+    def _spec(table: str) -> VectorTable:
+        spec = VECTOR_TABLES.get(table)
+        if spec is None:
+            raise ValueError(f"Unknown vector table: {table!r}")
+        return spec
+
+    @staticmethod
+    def _metric() -> Tuple[str, Callable[[float], float]]:
+        metric = _METRICS.get(settings.VECTOR_DB_METRIC)
+        if metric is None:
+            raise ValueError(f"Unknown VECTOR_DB_METRIC: {settings.VECTOR_DB_METRIC!r}")
+        return metric
+
+    def _hits_query(self, spec: VectorTable, query_vector: "sql.Composable") -> "sql.Composed":
+        """SELECT of the nearest rows to `query_vector` (a placeholder or column reference)."""
+        operator, _ = self._metric()
+        embedding = sql.Identifier(spec.embedding_column)
+        distance = sql.SQL("{} {} {}").format(embedding, sql.SQL(operator), query_vector)
+        return sql.SQL(
+            "SELECT {id}::text AS id, concat_ws(' ', {name}) AS name, {distance} AS distance"
+            " FROM {table} WHERE {embedding} IS NOT NULL"
+            " ORDER BY distance LIMIT %(limit)s"
+        ).format(
+            id=sql.Identifier(spec.id_column),
+            name=sql.SQL(", ").join(sql.Identifier(c) for c in spec.name_columns),
+            distance=distance,
+            table=sql.Identifier(spec.table),
+            embedding=embedding,
+        )
+
+    def _vector(self, spec: VectorTable, vector: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        dim = self._dimension(spec)
+        if dim is not None and vec.size != dim:
+            raise ValueError(f"{spec.table}.{spec.embedding_column} has {dim} dimensions, query has {vec.size}")
+        return vec
+
+    def embedding_dimension(self, table: str) -> Optional[int]:
+        """Declared dimension of `table`'s embedding column (None if unconstrained)."""
+        return self._dimension(self._spec(table))
+
+    def _dimension(self, spec: VectorTable) -> Optional[int]:
+        """Declared dimension of the embedding column (None if unconstrained)."""
+        if spec.table not in self._dimensions:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT atttypmod FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s",
+                    (spec.table, spec.embedding_column),
+                ).fetchone()
+            self._dimensions[spec.table] = row[0] if row and row[0] > 0 else None
+        return self._dimensions[spec.table]
+
+    def fetch_embeddings(self, table: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every non-null embedding of `table` as (ids int64 (n,), vectors float32 (n, dim)),
+        ordered by id.
+
+        Vectors are streamed with a binary COPY and decoded in bulk into
+        preallocated arrays, so loading costs ~4 bytes per dimension and no
+        per-float Python objects. Requires a dimension-constrained column.
+        """
+        spec = self._spec(table)
+        dim = self._dimension(spec)
+        if dim is None:
+            raise ValueError(f"{spec.table}.{spec.embedding_column} has no declared dimension")
+        embedding = sql.Identifier(spec.embedding_column)
+        source = sql.SQL("FROM {table} WHERE {embedding} IS NOT NULL").format(
+            table=sql.Identifier(spec.table), embedding=embedding
+        )
+        query = sql.SQL("COPY (SELECT {id}::int8, {embedding} {source} ORDER BY {id}) TO STDOUT (FORMAT BINARY)").format(
+            id=sql.Identifier(spec.id_column), embedding=embedding, source=source
+        )
+        with self._connection() as conn:
+            expected = conn.execute(sql.SQL("SELECT count(*) {}").format(source)).fetchone()[0]
+            reader = EmbeddingCopyReader(dim, expected)
+            with conn.cursor() as cur, cur.copy(query) as copy:
+                for data in copy:
+                    reader.feed(data)
+        return reader.finish()
+
+    def _hits(self, rows) -> List[Dict[str, Any]]:
+        _, similarity = self._metric()
+        return [
+            {"id": hit_id, "similarity": similarity(float(distance)), "metadata": {"name": name}}
+            for hit_id, name, distance in rows
+        ]
+
+    # ----------------------------------------------------------------
+    # Search
+    # ----------------------------------------------------------------
+
+    def search_similar(self, table: str, vector: Sequence[float], limit: int) -> List[Dict[str, Any]]:
+        """Nearest `limit` rows of `table` to `vector`, best first."""
+        spec = self._spec(table)
+        vec = self._vector(spec, vector)
+        query = self._hits_query(spec, sql.SQL("%(vector)b"))
+        with self._connection() as conn:
+            rows = conn.execute(query, {"vector": vec, "limit": limit}).fetchall()
+        return self._hits(rows)
+
+    def search_similar_batch(
+        self,
+        table: str,
+        vectors: Sequence[Sequence[float]],
+        limit: int,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run several nearest-neighbour searches in one round trip.
+
+        Each query vector drives its own index-ordered LATERAL subquery, so this
+        costs the same per query as `search_similar` without the per-call latency.
+        Returns one hit list per input vector, in input order.
+        """
+        if not len(vectors):
+            return []
+        spec = self._spec(table)
+        vecs = [self._vector(spec, v) for v in vectors]
+
+        inner = self._hits_query(spec, sql.SQL("q.vector"))
+        values = sql.SQL(", ").join(
+            sql.SQL("({}, {})").format(sql.Literal(i), sql.Placeholder(f"v{i}", format="b"))
+            for i in range(len(vecs))
+        )
+        query = sql.SQL(
+            "SELECT q.ord, h.id, h.name, h.distance"
+            " FROM (VALUES {values}) AS q(ord, vector)"
+            " CROSS JOIN LATERAL ({inner}) AS h"
+            " ORDER BY q.ord, h.distance"
+        ).format(values=values, inner=inner)
+        params: Dict[str, Any] = {f"v{i}": vec for i, vec in enumerate(vecs)}
+        params["limit"] = limit
+
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        grouped: List[list] = [[] for _ in vecs]
+        for ord_, *hit in rows:
+            grouped[ord_].append(hit)
+        return [self._hits(group) for group in grouped]
+
+
+# Singleton instance
+vector_db_client = VectorDBClient()
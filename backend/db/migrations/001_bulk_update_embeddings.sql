@@ -0,0 +1,45 @@
+-- Bulk embedding write-back used by data_generation/reindex_embeddings.py.
+--
+-- Updates the `embedding` column of many rows in one statement instead of one
+-- PostgREST request per row. `rows` is a JSON array of
+-- {"id": <primary key>, "embedding": [float, ...]}.
+
+create or replace function bulk_update_embeddings(
+    target_table text,
+    rows jsonb
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public, extensions
+as $$
+declare
+    id_column text;
+    updated integer;
+begin
+    id_column := case target_table
+        when 'structured_employees' then 'employee_number'
+        when 'positions' then 'position_id'
+        when 'profiles' then 'profile_id'
+    end;
+    if id_column is null then
+        raise exception 'bulk_update_embeddings: unsupported table %', target_table;
+    end if;
+
+    execute format(
+        'update %I as t
+            set embedding = (r->>''embedding'')::vector
+           from jsonb_array_elements($1) as r
+          where t.%I = (r->>''id'')::bigint',
+        target_table, id_column
+    ) using rows;
+
+    get diagnostics updated = row_count;
+    return updated;
+end;
+$$;
+
+-- security definer runs with the owner's rights and new functions are
+-- executable by PUBLIC: keep it to the service role the reindex script uses.
+revoke execute on function bulk_update_embeddings(text, jsonb) from public, anon, authenticated;
+grant execute on function bulk_update_embeddings(text, jsonb) to service_role;
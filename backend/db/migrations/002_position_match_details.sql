@@ -0,0 +1,156 @@
+-- Denormalized companions of match_positions_for_candidate / match_similar_positions,
+-- used by /smart/positions/top and /smart/positions/similar when MATCH_DETAIL_RPCS=true.
+--
+-- Each returns the match rows already joined with the profile, the position
+-- category and the per-skill gaps, so an endpoint needs a single round trip.
+-- Gaps follow app/services/skill_gaps.py: skill names are compared trimmed and
+-- lower-cased, a skill the candidate lacks counts as level 0,
+-- gap = required - candidate, and the status is strength (gap <= -1),
+-- meet (0), upskill (1-2) or missing (> 2). Gap rows keep the requirement's
+-- skill order. The match_* RPCs themselves must already exist.
+
+-- One row per distinct skill of a [{"skill": ..., "level": ...}] array:
+-- position of its first mention, level of its last (like the Python dict build).
+create or replace function smart_skill_levels(skills jsonb)
+returns table (skill text, level integer, ord bigint)
+language sql
+immutable
+as $$
+    select s.skill, (array_agg(s.level order by s.i desc))[1], min(s.i)
+      from (
+            select lower(btrim(e->>'skill', E' \t\r\n')) as skill,
+                   coalesce(trunc(nullif(e->>'level', '')::numeric), 0)::integer as level,
+                   i
+              from jsonb_array_elements(
+                       case when jsonb_typeof(skills) = 'array' then skills else '[]'::jsonb end
+                   ) with ordinality as t(e, i)
+           ) s
+     where s.skill <> ''
+     group by s.skill
+$$;
+
+-- [{skill, candidate_level, required_level, gap, status}] for every required skill
+create or replace function smart_skill_gaps(candidate jsonb, required jsonb)
+returns jsonb
+language sql
+immutable
+as $$
+    select coalesce(
+               jsonb_agg(
+                   jsonb_build_object(
+                       'skill', g.skill,
+                       'candidate_level', g.candidate_level,
+                       'required_level', g.required_level,
+                       'gap', g.gap,
+                       'status', case
+                                     when g.gap <= -1 then 'strength'
+                                     when g.gap = 0 then 'meet'
+                                     when g.gap <= 2 then 'upskill'
+                                     else 'missing'
+                                 end
+                   )
+                   order by g.ord
+               ),
+               '[]'::jsonb
+           )
+      from (
+            select r.skill, r.ord,
+                   coalesce(c.level, 0) as candidate_level,
+                   r.level as required_level,
+                   r.level - coalesce(c.level, 0) as gap
+              from smart_skill_levels(required) r
+              left join smart_skill_levels(candidate) c on c.skill = r.skill
+           ) g
+$$;
+
+-- match_positions_for_candidate + profile, category and candidate-vs-profile gaps.
+-- No rows when the candidate does not exist.
+create or replace function match_positions_for_candidate_detailed(
+    p_candidate_id bigint,
+    p_limit integer
+)
+returns table (
+    profile_id bigint,
+    position_id bigint,
+    score double precision,
+    match_profile_name text,
+    profile_name text,
+    position_name text,
+    profile_description text,
+    category text,
+    candidate_name text,
+    hard_skill_gaps jsonb,
+    soft_skill_gaps jsonb
+)
+language sql
+stable
+set search_path = public, extensions
+as $$
+    select m.profile_id::bigint,
+           m.position_id::bigint,
+           m.score::double precision,
+           m.profile_name::text,
+           p.profile_name::text,
+           m.position_name::text,
+           p.description::text,
+           pos.category::text,
+           nullif(btrim(concat_ws(' ', e.first_name, e.last_name)), ''),
+           case when p.profile_id is not null then smart_skill_gaps(e.hard_skills::jsonb, p.hard_skills::jsonb) end,
+           case when p.profile_id is not null then smart_skill_gaps(e.soft_skills::jsonb, p.soft_skills::jsonb) end
+      from match_positions_for_candidate(p_candidate_id, p_limit) with ordinality as m
+      join structured_employees e on e.employee_number = p_candidate_id
+      left join profiles p on p.profile_id = m.profile_id
+      left join positions pos on pos.position_id = m.position_id
+     order by m.ordinality
+$$;
+
+-- match_similar_positions + profile, category and gaps of each similar profile
+-- against the position's reference profile (its lowest profile_id).
+-- No rows when the position has no profile.
+create or replace function match_similar_positions_detailed(
+    p_position_id bigint,
+    p_limit integer
+)
+returns table (
+    profile_id bigint,
+    position_id bigint,
+    score double precision,
+    match_profile_name text,
+    profile_name text,
+    position_name text,
+    profile_description text,
+    category text,
+    reference_profile_id bigint,
+    reference_profile_name text,
+    hard_skill_gaps jsonb,
+    soft_skill_gaps jsonb
+)
+language sql
+stable
+set search_path = public, extensions
+as $$
+    with base as (
+        select b.profile_id, b.profile_name, b.hard_skills, b.soft_skills
+          from profiles b
+         where b.position_id = p_position_id
+         order by b.profile_id
+         limit 1
+    )
+    select m.profile_id::bigint,
+           m.position_id::bigint,
+           m.score::double precision,
+           m.profile_name::text,
+           p.profile_name::text,
+           m.position_name::text,
+           p.description::text,
+           pos.category::text,
+           base.profile_id::bigint,
+           base.profile_name::text,
+           case when p.profile_id is not null then smart_skill_gaps(p.hard_skills::jsonb, base.hard_skills::jsonb) end,
+           case when p.profile_id is not null then smart_skill_gaps(p.soft_skills::jsonb, base.soft_skills::jsonb) end
+      from match_similar_positions(p_position_id, p_limit) with ordinality as m
+      cross join base
+      left join profiles p on p.profile_id = m.profile_id
+      left join positions pos on pos.position_id = m.position_id
+     order by m.ordinality
+$$;
@@ -0,0 +1,19 @@
+-- HNSW indexes for the match_* RPCs (004_index_aware_match_rpcs.sql).
+--
+-- The RPCs rank by inner-product distance (`<#>`), so the indexes use
+-- vector_ip_ops; an index built with another operator class (e.g. the
+-- vector_cosine_ops IVFFlat from the README example) is never used for `<#>`.
+-- Rows with a NULL embedding are not indexed.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block: apply this
+-- file with `psql -f` (not the Supabase SQL editor's single transaction).
+-- Build time and memory grow with the table; raise maintenance_work_mem for
+-- large tables so the graph is built in memory.
+
+create index concurrently if not exists structured_employees_embedding_hnsw_ip
+    on structured_employees using hnsw (embedding vector_ip_ops)
+    with (m = 16, ef_construction = 64);
+
+create index concurrently if not exists profiles_embedding_hnsw_ip
+    on profiles using hnsw (embedding vector_ip_ops)
+    with (m = 16, ef_construction = 64);
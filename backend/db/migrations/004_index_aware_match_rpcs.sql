@@ -0,0 +1,250 @@
+-- Version 2 of the four match_* RPCs behind /smart (same names, arguments and
+-- result columns as before).
+--
+-- Version 1 scored every (employee, profile) pair (`JOIN profs ON true`) and
+-- ranked with ROW_NUMBER(), a sequential scan of structured_employees per call.
+-- Here every search is an index-ordered sub-query,
+--     ORDER BY embedding <#> <query vector> LIMIT k
+-- run once per query vector through LATERAL and answered by the HNSW indexes
+-- of 003_hnsw_inner_product_indexes.sql; the per-vector hits are then merged.
+-- Scores are unchanged: 1 - (a <#> b), i.e. 1 + inner product.
+--
+-- HNSW scans return at most hnsw.ef_search rows, so each function raises it
+-- (transaction-local) to the number of rows it asks for, capped at 1000.
+
+-- Drop version 1 whatever its argument types were, so no overload is left
+-- behind for PostgREST to choose between.
+do $$
+declare
+    fn regprocedure;
+begin
+    for fn in
+        select p.oid::regprocedure
+          from pg_proc p
+         where p.pronamespace = 'public'::regnamespace
+           and p.proname in (
+               'match_candidates_for_position',
+               'match_similar_candidates',
+               'match_positions_for_candidate',
+               'match_similar_positions'
+           )
+    loop
+        execute format('drop function %s', fn);
+    end loop;
+end;
+$$;
+
+create or replace function _match_set_ef_search(p_rows integer)
+returns void
+language sql
+as $$
+    select set_config('hnsw.ef_search', least(greatest(p_rows, 40), 1000)::text, true);
+$$;
+
+-- Best profile of each position among the k nearest profiles of any query
+-- vector, excluding one position; k grows until `p_limit` positions are found
+-- or the profiles run out.
+create or replace function _match_best_profile_per_position(
+    p_queries vector[],
+    p_limit integer,
+    p_exclude_position_id bigint default null
+)
+returns table (
+    profile_id bigint,
+    position_id bigint,
+    profile_name text,
+    position_name text,
+    score double precision
+)
+language plpgsql
+set search_path = public, extensions
+as $$
+#variable_conflict use_column
+declare
+    k integer := greatest(p_limit * 4, 16);
+    n_hits integer;
+    n_positions integer;
+begin
+    loop
+        perform _match_set_ef_search(k);
+        select count(*), count(distinct h.position_id) filter (
+                   where p_exclude_position_id is null or h.position_id is distinct from p_exclude_position_id
+               )
+          into n_hits, n_positions
+          from unnest(p_queries) as q(embedding)
+          cross join lateral (
+                select pr.position_id
+                  from profiles pr
+                 where pr.embedding is not null
+                 order by pr.embedding <#> q.embedding
+                 limit k
+          ) h;
+        exit when n_positions >= p_limit or n_hits < k * cardinality(p_queries) or k >= 1000;
+        k := k * 4;
+    end loop;
+
+    return query
+    select b.profile_id, b.position_id, b.profile_name, b.position_name, 1 - b.distance
+      from (
+            select distinct on (h.position_id)
+                   h.profile_id, h.position_id, h.profile_name, h.position_name, h.distance
+              from unnest(p_queries) as q(embedding)
+              cross join lateral (
+                    select pr.profile_id::bigint,
+                           pr.position_id::bigint,
+                           pr.profile_name::text,
+                           pr.position_name::text,
+                           (pr.embedding <#> q.embedding)::double precision as distance
+                      from profiles pr
+                     where pr.embedding is not null
+                     order by pr.embedding <#> q.embedding
+                     limit k
+              ) h
+             where p_exclude_position_id is null or h.position_id is distinct from p_exclude_position_id
+             order by h.position_id, h.distance, h.profile_id
+           ) b
+     order by b.distance, b.profile_id
+     limit p_limit;
+end;
+$$;
+
+-- Top candidates for a position, each with its best-matching profile of that
+-- position. Exact w.r.t. the index: a candidate in the overall top p_limit is
+-- in the top p_limit of its own best profile.
+create or replace function match_candidates_for_position(
+    p_position_id bigint,
+    p_limit integer
+)
+returns table (
+    candidate_id bigint,
+    first_name text,
+    last_name text,
+    profile_id bigint,
+    profile_name text,
+    position_name text,
+    score double precision
+)
+language plpgsql
+set search_path = public, extensions
+as $$
+#variable_conflict use_column
+begin
+    perform _match_set_ef_search(p_limit);
+    return query
+    select b.candidate_id, b.first_name, b.last_name, b.profile_id, b.profile_name, b.position_name, 1 - b.distance
+      from (
+            select distinct on (c.candidate_id)
+                   c.candidate_id, c.first_name, c.last_name,
+                   p.profile_id::bigint, p.profile_name::text, p.position_name::text, c.distance
+              from profiles p
+              cross join lateral (
+                    select e.employee_number::bigint as candidate_id,
+                           e.first_name::text,
+                           e.last_name::text,
+                           (e.embedding <#> p.embedding)::double precision as distance
+                      from structured_employees e
+                     where e.embedding is not null
+                     order by e.embedding <#> p.embedding
+                     limit p_limit
+              ) c
+             where p.position_id = p_position_id
+               and p.embedding is not null
+             order by c.candidate_id, c.distance, p.profile_id
+           ) b
+     order by b.distance, b.candidate_id
+     limit p_limit;
+end;
+$$;
+
+-- Nearest candidates to a candidate (the candidate itself excluded).
+create or replace function match_similar_candidates(
+    p_candidate_id bigint,
+    p_limit integer
+)
+returns table (
+    candidate_id bigint,
+    first_name text,
+    last_name text,
+    score double precision
+)
+language plpgsql
+set search_path = public, extensions
+as $$
+#variable_conflict use_column
+begin
+    -- One extra row: the candidate is usually its own nearest neighbour
+    perform _match_set_ef_search(p_limit + 1);
+    return query
+    select c.candidate_id, c.first_name, c.last_name, 1 - c.distance
+      from structured_employees q
+      cross join lateral (
+            select e.employee_number::bigint as candidate_id,
+                   e.first_name::text,
+                   e.last_name::text,
+                   (e.embedding <#> q.embedding)::double precision as distance
+              from structured_employees e
+             where e.embedding is not null
+             order by e.embedding <#> q.embedding
+             limit p_limit + 1
+      ) c
+     where q.employee_number = p_candidate_id
+       and q.embedding is not null
+       and c.candidate_id <> p_candidate_id
+     order by c.distance, c.candidate_id
+     limit p_limit;
+end;
+$$;
+
+-- Top positions for a candidate, each with its best-matching profile.
+create or replace function match_positions_for_candidate(
+    p_candidate_id bigint,
+    p_limit integer
+)
+returns table (
+    profile_id bigint,
+    position_id bigint,
+    profile_name text,
+    position_name text,
+    score double precision
+)
+language sql
+set search_path = public, extensions
+as $$
+    select m.*
+      from structured_employees e
+      cross join lateral _match_best_profile_per_position(array[e.embedding], p_limit) m
+     where e.employee_number = p_candidate_id
+       and e.embedding is not null
+$$;
+
+-- Positions closest to any profile of a position (the position itself excluded),
+-- each with its best-matching profile.
+create or replace function match_similar_positions(
+    p_position_id bigint,
+    p_limit integer
+)
+returns table (
+    profile_id bigint,
+    position_id bigint,
+    profile_name text,
+    position_name text,
+    score double precision
+)
+language sql
+set search_path = public, extensions
+as $$
+    select m.*
+      from (
+            select array_agg(p.embedding order by p.profile_id) as queries
+              from profiles p
+             where p.position_id = p_position_id
+               and p.embedding is not null
+           ) q
+      cross join lateral _match_best_profile_per_position(q.queries, p_limit, p_position_id) m
+     where q.queries is not null
+$$;
+
+comment on function match_candidates_for_position(bigint, integer) is 'v2: per-profile index-ordered ANN, merged (004_index_aware_match_rpcs.sql)';
+comment on function match_similar_candidates(bigint, integer) is 'v2: index-ordered ANN (004_index_aware_match_rpcs.sql)';
+comment on function match_positions_for_candidate(bigint, integer) is 'v2: index-ordered ANN over profiles, best per position (004_index_aware_match_rpcs.sql)';
+comment on function match_similar_positions(bigint, integer) is 'v2: per-profile index-ordered ANN, best per position (004_index_aware_match_rpcs.sql)';
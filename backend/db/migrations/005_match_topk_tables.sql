@@ -0,0 +1,458 @@
+-- Precomputed top-K match lists behind /smart/candidates/top and /smart/positions/top
+-- (MATCH_TOPK_TABLES=true). Requires 003 and 004.
+--
+--   profile_top_candidates  the K nearest employees of every profile
+--   employee_top_profiles   the K nearest profiles of every employee
+--
+-- refresh_match_topk() brings both up to date incrementally from the rows whose
+-- `updated_at` moved past the last refresh (a trigger bumps it whenever an
+-- embedding is written). Run it after embedding updates, e.g. with
+-- data_generation/refresh_match_topk.py or pg_cron:
+--     select cron.schedule('refresh-match-topk', '*/5 * * * *', 'select refresh_match_topk()');
+--
+-- match_candidates_for_position_topk / match_positions_for_candidate_topk take
+-- the same arguments and return the same rows as the live RPCs. They answer
+-- from the lists (an indexed lookup of a few hundred rows) when the lists
+-- those rows depend on are fresh, and call the live RPC otherwise.
+
+-- -----------------------------------------------------------------
+-- Change tracking
+-- -----------------------------------------------------------------
+
+alter table profiles add column if not exists updated_at timestamptz not null default now();
+alter table structured_employees add column if not exists updated_at timestamptz default now();
+update structured_employees set updated_at = now() where updated_at is null;
+
+create index if not exists structured_employees_updated_at_idx on structured_employees (updated_at);
+create index if not exists profiles_updated_at_idx on profiles (updated_at);
+
+create or replace function match_topk_touch()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' or new.embedding is distinct from old.embedding then
+        new.updated_at := greatest(coalesce(new.updated_at, now()), now());
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists structured_employees_match_topk_touch on structured_employees;
+create trigger structured_employees_match_topk_touch
+    before insert or update of embedding on structured_employees
+    for each row execute function match_topk_touch();
+
+drop trigger if exists profiles_match_topk_touch on profiles;
+create trigger profiles_match_topk_touch
+    before insert or update of embedding on profiles
+    for each row execute function match_topk_touch();
+
+-- -----------------------------------------------------------------
+-- Tables
+-- -----------------------------------------------------------------
+
+create table if not exists profile_top_candidates (
+    profile_id bigint not null,
+    candidate_id bigint not null,
+    score double precision not null,  -- 1 - (employee <#> profile), as in the live RPCs
+    primary key (profile_id, candidate_id)
+);
+create index if not exists profile_top_candidates_candidate_idx on profile_top_candidates (candidate_id);
+
+create table if not exists employee_top_profiles (
+    employee_number bigint not null,
+    profile_id bigint not null,
+    score double precision not null,
+    primary key (employee_number, profile_id)
+);
+create index if not exists employee_top_profiles_profile_idx on employee_top_profiles (profile_id);
+
+-- Single row: list size and the `updated_at` both tables are refreshed through
+create table if not exists match_topk_state (
+    id smallint primary key default 1 check (id = 1),
+    k integer not null,
+    employees_through timestamptz not null,
+    profiles_through timestamptz not null,
+    refreshed_at timestamptz not null
+);
+
+-- Written by refresh_match_topk() only. API roles may read the lists (the
+-- *_topk RPCs run with the caller's rights) but not change them.
+alter table profile_top_candidates enable row level security;
+alter table employee_top_profiles enable row level security;
+alter table match_topk_state enable row level security;
+drop policy if exists profile_top_candidates_read on profile_top_candidates;
+create policy profile_top_candidates_read on profile_top_candidates for select using (true);
+drop policy if exists employee_top_profiles_read on employee_top_profiles;
+create policy employee_top_profiles_read on employee_top_profiles for select using (true);
+drop policy if exists match_topk_state_read on match_topk_state;
+create policy match_topk_state_read on match_topk_state for select using (true);
+revoke insert, update, delete, truncate on profile_top_candidates, employee_top_profiles, match_topk_state
+    from public, anon, authenticated;
+
+-- -----------------------------------------------------------------
+-- Refresh
+-- -----------------------------------------------------------------
+
+-- Recomputes only what the changed (or deleted) rows can affect:
+--   * a list that contains a changed row is rebuilt with one index-ordered
+--     ANN search;
+--   * every other list only gains the changed rows that now beat its K-th
+--     score, and is trimmed back to K.
+-- A changed profile is scored against every employee once (profiles change
+-- rarely); a changed employee against every profile. Rows updated less than
+-- `p_overlap` before the previous refresh are re-processed, so updates from
+-- transactions that were still open then are not missed. `p_k` defaults to
+-- the stored list size (100 on the first run); `p_full`, or a `p_k` different
+-- from the stored one, rebuilds everything.
+create or replace function refresh_match_topk(
+    p_k integer default null,
+    p_full boolean default false,
+    p_overlap interval default interval '10 minutes'
+)
+returns jsonb
+language plpgsql
+set search_path = public, extensions
+as $$
+declare
+    st match_topk_state;
+    started timestamptz := now();
+    n_changed_employees integer;
+    n_changed_profiles integer;
+    n_dirty_profiles integer;
+    n_dirty_employees integer;
+begin
+    -- One refresh at a time; readers keep the previous lists until this commits
+    perform pg_advisory_xact_lock(hashtext('refresh_match_topk'));
+    select * into st from match_topk_state where id = 1;
+    p_k := coalesce(p_k, st.k, 100);
+    p_full := p_full or st.id is null or st.k <> p_k;
+
+    create temp table _changed_employees (id bigint primary key) on commit drop;
+    create temp table _changed_profiles (id bigint primary key) on commit drop;
+    if p_full then
+        insert into _changed_employees select employee_number from structured_employees;
+        insert into _changed_profiles select profile_id from profiles;
+        delete from profile_top_candidates;
+        delete from employee_top_profiles;
+    else
+        insert into _changed_employees
+        select e.employee_number from structured_employees e where e.updated_at > st.employees_through - p_overlap
+        union
+        select t.candidate_id from profile_top_candidates t
+         where not exists (select 1 from structured_employees e where e.employee_number = t.candidate_id)
+        union
+        select t.employee_number from employee_top_profiles t
+         where not exists (select 1 from structured_employees e where e.employee_number = t.employee_number);
+
+        insert into _changed_profiles
+        select p.profile_id from profiles p where p.updated_at > st.profiles_through - p_overlap
+        union
+        select t.profile_id from employee_top_profiles t
+         where not exists (select 1 from profiles p where p.profile_id = t.profile_id)
+        union
+        select t.profile_id from profile_top_candidates t
+         where not exists (select 1 from profiles p where p.profile_id = t.profile_id);
+    end if;
+    select count(*) into n_changed_employees from _changed_employees;
+    select count(*) into n_changed_profiles from _changed_profiles;
+    perform _match_set_ef_search(p_k);
+
+    -- 1) Candidate lists of the profiles
+    create temp table _dirty_profiles on commit drop as
+    select id from _changed_profiles
+    union
+    select t.profile_id from profile_top_candidates t join _changed_employees c on c.id = t.candidate_id;
+    select count(*) into n_dirty_profiles from _dirty_profiles;
+    delete from profile_top_candidates t using _dirty_profiles d where t.profile_id = d.id;
+
+    if n_changed_employees > 0 then
+        insert into profile_top_candidates (profile_id, candidate_id, score)
+        select s.profile_id, s.employee_number, s.score
+          from (
+                select p.profile_id, e.employee_number, 1 - (e.embedding <#> p.embedding) as score,
+                       coalesce(l.n, 0) as n, l.kth
+                  from _changed_employees c
+                  join structured_employees e on e.employee_number = c.id
+                 cross join profiles p
+                  left join (
+                        select profile_id, count(*) as n, min(score) as kth
+                          from profile_top_candidates
+                         group by profile_id
+                  ) l on l.profile_id = p.profile_id
+                 where e.embedding is not null
+                   and p.embedding is not null
+                   and not exists (select 1 from _dirty_profiles d where d.id = p.profile_id)
+               ) s
+         where s.n < p_k or s.score > s.kth;
+
+        delete from profile_top_candidates t
+         using (
+                select profile_id, candidate_id,
+                       row_number() over (partition by profile_id order by score desc, candidate_id) as rn
+                  from profile_top_candidates
+                 where profile_id in (
+                       select profile_id from profile_top_candidates group by profile_id having count(*) > p_k
+                 )
+               ) r
+         where t.profile_id = r.profile_id and t.candidate_id = r.candidate_id and r.rn > p_k;
+    end if;
+
+    insert into profile_top_candidates (profile_id, candidate_id, score)
+    select p.profile_id, h.employee_number, 1 - h.distance
+      from _dirty_profiles d
+      join profiles p on p.profile_id = d.id
+     cross join lateral (
+            select e.employee_number, e.embedding <#> p.embedding as distance
+              from structured_employees e
+             where e.embedding is not null
+             order by e.embedding <#> p.embedding
+             limit p_k
+     ) h
+     where p.embedding is not null;
+
+    -- 2) Profile lists of the employees
+    create temp table _dirty_employees on commit drop as
+    select id from _changed_employees
+    union
+    select t.employee_number from employee_top_profiles t join _changed_profiles c on c.id = t.profile_id;
+    select count(*) into n_dirty_employees from _dirty_employees;
+    delete from employee_top_profiles t using _dirty_employees d where t.employee_number = d.id;
+
+    if n_changed_profiles > 0 then
+        insert into employee_top_profiles (employee_number, profile_id, score)
+        select s.employee_number, s.profile_id, s.score
+          from (
+                select e.employee_number, p.profile_id, 1 - (e.embedding <#> p.embedding) as score,
+                       coalesce(l.n, 0) as n, l.kth
+                  from _changed_profiles c
+                  join profiles p on p.profile_id = c.id
+                 cross join structured_employees e
+                  left join (
+                        select employee_number, count(*) as n, min(score) as kth
+                          from employee_top_profiles
+                         group by employee_number
+                  ) l on l.employee_number = e.employee_number
+                 where e.embedding is not null
+                   and p.embedding is not null
+                   and not exists (select 1 from _dirty_employees d where d.id = e.employee_number)
+               ) s
+         where s.n < p_k or s.score > s.kth;
+
+        delete from employee_top_profiles t
+         using (
+                select employee_number, profile_id,
+                       row_number() over (partition by employee_number order by score desc, profile_id) as rn
+                  from employee_top_profiles
+                 where employee_number in (
+                       select employee_number from employee_top_profiles group by employee_number having count(*) > p_k
+                 )
+               ) r
+         where t.employee_number = r.employee_number and t.profile_id = r.profile_id and r.rn > p_k;
+    end if;
+
+    insert into employee_top_profiles (employee_number, profile_id, score)
+    select e.employee_number, h.profile_id, 1 - h.distance
+      from _dirty_employees d
+      join structured_employees e on e.employee_number = d.id
+     cross join lateral (
+            select p.profile_id, p.embedding <#> e.embedding as distance
+              from profiles p
+             where p.embedding is not null
+             order by p.embedding <#> e.embedding
+             limit p_k
+     ) h
+     where e.embedding is not null;
+
+    insert into match_topk_state (id, k, employees_through, profiles_through, refreshed_at)
+    values (1, p_k, started, started, clock_timestamp())
+    on conflict (id) do update
+        set k = excluded.k,
+            employees_through = excluded.employees_through,
+            profiles_through = excluded.profiles_through,
+            refreshed_at = excluded.refreshed_at;
+
+    return jsonb_build_object(
+        'full', p_full,
+        'changed_employees', n_changed_employees,
+        'changed_profiles', n_changed_profiles,
+        'rebuilt_profile_lists', n_dirty_profiles,
+        'rebuilt_employee_lists', n_dirty_employees,
+        'seconds', extract(epoch from clock_timestamp() - started)
+    );
+end;
+$$;
+
+-- A full refresh cross-joins both tables: keep it away from the API roles
+revoke execute on function refresh_match_topk(integer, boolean, interval) from public, anon, authenticated;
+grant execute on function refresh_match_topk(integer, boolean, interval) to service_role;
+
+-- -----------------------------------------------------------------
+-- Read-through RPCs
+-- -----------------------------------------------------------------
+
+-- Fresh when no employee and none of the position's profiles changed since the
+-- refresh, and no listed employee was deleted. Exact for p_limit <= K: a
+-- candidate in the top p_limit is in the top K of its own best profile.
+create or replace function match_candidates_for_position_topk(
+    p_position_id bigint,
+    p_limit integer
+)
+returns table (
+    candidate_id bigint,
+    first_name text,
+    last_name text,
+    profile_id bigint,
+    profile_name text,
+    position_name text,
+    score double precision
+)
+language plpgsql
+set search_path = public, extensions
+as $$
+#variable_conflict use_column
+declare
+    fresh boolean;
+begin
+    select s.k >= p_limit
+           and not exists (select 1 from structured_employees e where e.updated_at > s.employees_through)
+           and not exists (
+                 select 1 from profiles p where p.position_id = p_position_id and p.updated_at > s.profiles_through
+           )
+           and not exists (
+                 select 1
+                   from profiles p
+                   join profile_top_candidates t on t.profile_id = p.profile_id
+                  where p.position_id = p_position_id
+                    and not exists (select 1 from structured_employees e where e.employee_number = t.candidate_id)
+           )
+      into fresh
+      from match_topk_state s
+     where s.id = 1;
+
+    if not coalesce(fresh, false) then
+        return query select * from match_candidates_for_position(p_position_id, p_limit);
+        return;
+    end if;
+
+    return query
+    select b.candidate_id, b.first_name, b.last_name, b.profile_id, b.profile_name, b.position_name, b.score
+      from (
+            select distinct on (t.candidate_id)
+                   t.candidate_id, e.first_name::text, e.last_name::text,
+                   p.profile_id::bigint, p.profile_name::text, p.position_name::text, t.score
+              from profiles p
+              join profile_top_candidates t on t.profile_id = p.profile_id
+              join structured_employees e on e.employee_number = t.candidate_id
+             where p.position_id = p_position_id
+             order by t.candidate_id, t.score desc, p.profile_id
+           ) b
+     order by b.score desc, b.candidate_id
+     limit p_limit;
+end;
+$$;
+
+-- Fresh when the employee and no profile changed since the refresh, and no
+-- listed profile was deleted. Exact when the list covers p_limit positions
+-- (every profile outside it scores lower) or holds every profile.
+create or replace function match_positions_for_candidate_topk(
+    p_candidate_id bigint,
+    p_limit integer
+)
+returns table (
+    profile_id bigint,
+    position_id bigint,
+    profile_name text,
+    position_name text,
+    score double precision
+)
+language plpgsql
+set search_path = public, extensions
+as $$
+#variable_conflict use_column
+declare
+    st match_topk_state;
+    fresh boolean;
+    n_rows integer;
+    n_live integer;
+    n_positions integer;
+begin
+    select * into st from match_topk_state where id = 1;
+    fresh := st.id is not null
+             and st.k >= p_limit
+             and coalesce(
+                   (select e.updated_at <= st.employees_through
+                      from structured_employees e where e.employee_number = p_candidate_id),
+                   false)
+             and not exists (select 1 from profiles p where p.updated_at > st.profiles_through);
+
+    if fresh then
+        select count(*), count(p.profile_id), count(distinct p.position_id)
+          into n_rows, n_live, n_positions
+          from employee_top_profiles t
+          left join profiles p on p.profile_id = t.profile_id
+         where t.employee_number = p_candidate_id;
+        fresh := n_rows = n_live and (n_positions >= p_limit or n_rows < st.k);
+    end if;
+
+    if not fresh then
+        return query select * from match_positions_for_candidate(p_candidate_id, p_limit);
+        return;
+    end if;
+
+    return query
+    select b.profile_id, b.position_id, b.profile_name, b.position_name, b.score
+      from (
+            select distinct on (p.position_id)
+                   p.profile_id::bigint, p.position_id::bigint, p.profile_name::text, p.position_name::text, t.score
+              from employee_top_profiles t
+              join profiles p on p.profile_id = t.profile_id
+             where t.employee_number = p_candidate_id
+             order by p.position_id, t.score desc, p.profile_id
+           ) b
+     order by b.score desc, b.profile_id
+     limit p_limit;
+end;
+$$;
+
+-- match_positions_for_candidate_detailed (002) over the lists, for
+-- /positions/top when MATCH_DETAIL_RPCS is on as well.
+create or replace function match_positions_for_candidate_detailed_topk(
+    p_candidate_id bigint,
+    p_limit integer
+)
+returns table (
+    profile_id bigint,
+    position_id bigint,
+    score double precision,
+    match_profile_name text,
+    profile_name text,
+    position_name text,
+    profile_description text,
+    category text,
+    candidate_name text,
+    hard_skill_gaps jsonb,
+    soft_skill_gaps jsonb
+)
+language sql
+stable
+set search_path = public, extensions
+as $$
+    select m.profile_id::bigint,
+           m.position_id::bigint,
+           m.score::double precision,
+           m.profile_name::text,
+           p.profile_name::text,
+           m.position_name::text,
+           p.description::text,
+           pos.category::text,
+           nullif(btrim(concat_ws(' ', e.first_name, e.last_name)), ''),
+           case when p.profile_id is not null then smart_skill_gaps(e.hard_skills::jsonb, p.hard_skills::jsonb) end,
+           case when p.profile_id is not null then smart_skill_gaps(e.soft_skills::jsonb, p.soft_skills::jsonb) end
+      from match_positions_for_candidate_topk(p_candidate_id, p_limit) with ordinality as m
+      join structured_employees e on e.employee_number = p_candidate_id
+      left join profiles p on p.profile_id = m.profile_id
+      left join positions pos on pos.position_id = m.position_id
+     order by m.ordinality
+$$;
@@ -0,0 +1,91 @@
+"""
+Build backend/data/course_skills.json: which HardSkills/SoftSkills each course
+addresses, used by the fast (non-LLM) learning recommendation mode.
+
+Courses are read from the `courses` table and mapped with the same logic the
+backend uses at runtime for courses that are missing from the index (skill
+names mentioned in the text, plus sentence-transformers similarity when it is
+installed). Re-run after the course catalog changes; courses whose text
+changed since the last build are re-mapped on the fly until then.
+
+Usage:
+    python build_course_skill_index.py
+    python build_course_skill_index.py --output /tmp/course_skills.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from supabase import create_client, Client
+from dotenv import load_dotenv
+load_dotenv()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from app.services.course_skills import (
+    INDEX_FORMAT_VERSION,
+    build_course_skills,
+    course_text,
+    text_hash,
+)
+from app.services.vectorization import MODEL_NAME
+
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent.parent / "backend" / "data" / "course_skills.json"
+
+
+def fetch_courses(supabase: Client, page_size: int) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    last_id = None
+    while True:
+        query = supabase.table("courses").select("id, course_name, course_description").order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = query.execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last_id = page[-1]["id"]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Map every course to the skills it addresses.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--page-size", type=int, default=1000, help="courses fetched per page")
+    args = parser.parse_args(argv)
+
+    supabase: Client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+
+    started = time.perf_counter()
+    courses = fetch_courses(supabase, args.page_size)
+    texts = {
+        int(c["id"]): course_text(str(c.get("course_name") or ""), str(c.get("course_description") or ""))
+        for c in courses
+    }
+    skills = build_course_skills(texts)
+
+    index = {
+        "format": INDEX_FORMAT_VERSION,
+        "model": MODEL_NAME,
+        "courses": {
+            str(cid): {"text_hash": text_hash(texts[cid]), "skills": skills[cid]}
+            for cid in sorted(texts)
+        },
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = args.output.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, args.output)
+
+    unmapped = sum(1 for cid in texts if not skills[cid])
+    print(f"🎉 Indexed {len(texts)} courses in {time.perf_counter() - started:.1f}s "
+          f"({unmapped} without any matching skill) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Shared OpenAI embedding helpers for employees_generation.py,
+update_chosen_employees_embeddings.py and reindex_embeddings.py: the model,
+the on-disk embedding cache, the OpenAI client and the text each table's
+embedding is computed from (the cache is keyed by that exact text).
+
+Rows are embedded a page at a time: the page's texts go through the on-disk
+embedding cache in one call, so the cache misses of a page cost one
+embeddings request (per EMBED_BATCH_SIZE texts) and one cache flush.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from openai import OpenAI
+from dotenv import load_dotenv
+load_dotenv()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from app.services.embedding_cache import EmbeddingCache
+
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+EMBED_MODEL = "text-embedding-3-small"  # 1536 dimensions
+EMBED_BATCH_SIZE = 100
+EMBED_CACHE_DIR = os.environ.get(
+    "EMBEDDING_CACHE_DIR", str(Path(__file__).resolve().parent / ".cache" / "embeddings")
+)
+
+embedding_cache = EmbeddingCache(EMBED_CACHE_DIR, EMBED_MODEL)
+_client: Optional[OpenAI] = None
+
+
+def openai_client(**options: Any) -> OpenAI:
+    """OpenAI client for the embedding scripts; `options` go to OpenAI() (api_key defaults to OPENAI_API_KEY)."""
+    options.setdefault("api_key", os.environ.get("OPENAI_API_KEY"))
+    return OpenAI(**options)
+
+
+# -------------------------------------------------
+# Text embedded for each table
+# -------------------------------------------------
+def employee_text(row: Dict[str, Any]) -> str:
+    return row.get("short_summary") or ""
+
+
+def position_text(row: Dict[str, Any]) -> str:
+    return f"{row.get('position_name') or ''} {row.get('description') or ''}"
+
+
+def profile_text(row: Dict[str, Any]) -> str:
+    return (
+        f"{row.get('profile_name') or ''} "
+        f"{row.get('position_name') or ''} "
+        f"{row.get('description') or ''}"
+    )
+
+
+# -------------------------------------------------
+# Helper: Create embeddings for strings (Hebrew-safe)
+# -------------------------------------------------
+def create_embeddings(texts: List[str]) -> List[list[float]]:
+    global _client
+    if _client is None:
+        _client = openai_client()
+    vectors: List[list[float]] = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        response = _client.embeddings.create(
+            model=EMBED_MODEL,
+            input=texts[start:start + EMBED_BATCH_SIZE],
+        )
+        vectors.extend(item.embedding for item in response.data)
+    return vectors
+
+
+def embedded_rows(
+    rows: Sequence[Dict[str, Any]],
+    text_of: Callable[[Dict[str, Any]], str],
+) -> Iterator[Tuple[Dict[str, Any], list[float]]]:
+    """
+    Yield (row, embedding) for every row with a non-empty text.
+
+    Every such row is yielded, cached or not: a cached text costs no API call,
+    and the caller always writes the vector back, so a row can never keep an
+    embedding of a text it no longer has.
+    """
+    for start in range(0, len(rows), EMBED_BATCH_SIZE):
+        page = []
+        for row in rows[start:start + EMBED_BATCH_SIZE]:
+            text = (text_of(row) or "").strip()
+            if text:
+                page.append((row, text))
+        if not page:
+            continue
+
+        # Unchanged texts are served from the on-disk cache, not the API
+        vectors = embedding_cache.embed([text for _, text in page], create_embeddings)
+        for (row, _), vec in zip(page, vectors):
+            yield row, vec.tolist()
@@ -585,40 +585,22 @@
 #
 
 import os
-from openai import OpenAI
 from supabase import create_client, Client
 from dotenv import load_dotenv
 load_dotenv()
 
+from embedding_batches import embedded_rows, employee_text, position_text, profile_text
+
 
 # -------------------------------------------------
 # CONFIG
 # -------------------------------------------------
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_KEY = os.environ["SUPABASE_SERVICE_ROLE_KEY"]  # must be service role
-OPENAI_KEY = os.environ["OPENAI_API_KEY"]
-
-EMBED_MODEL = "text-embedding-3-small"  # 1536 dimensions
 
-client = OpenAI(api_key=OPENAI_KEY)
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 
-# -------------------------------------------------
-# Helper: Create embedding for a string (Hebrew-safe)
-# -------------------------------------------------
-def embed_text(text: str) -> Optional[list[float]]:
-    text = (text or "").strip()
-    if not text:
-        return None
-
-    response = client.embeddings.create(
-        model=EMBED_MODEL,
-        input=text,
-    )
-    return response.data[0].embedding
-
-
 # -------------------------------------------------
 # 1) structured_employees
 #    Uses: short_summary
@@ -631,12 +613,7 @@ def update_employee_embeddings():
     rows = resp.data or []
     print(f"Found {len(rows)} employees")
 
-    for row in rows:
-        summary = row.get("short_summary") or ""
-        vec = embed_text(summary)
-        if not vec:
-            continue
-
+    for row, vec in embedded_rows(rows, employee_text):
         supabase.table("structured_employees") \
             .update({"embedding": vec}) \
             .eq("employee_number", row["employee_number"]) \
@@ -657,12 +634,7 @@ def update_position_embeddings():
     rows = resp.data or []
     print(f"Found {len(rows)} positions")
 
-    for row in rows:
-        text = f"{row.get('position_name') or ''} {row.get('description') or ''}"
-        vec = embed_text(text)
-        if not vec:
-            continue
-
+    for row, vec in embedded_rows(rows, position_text):
         supabase.table("positions") \
             .update({"embedding": vec}) \
             .eq("position_id", row["position_id"]) \
@@ -683,16 +655,7 @@ def update_profile_embeddings():
     rows = resp.data or []
     print(f"Found {len(rows)} profiles")
 
-    for row in rows:
-        text = (
-            f"{row.get('profile_name') or ''} "
-            f"{row.get('position_name') or ''} "
-            f"{row.get('description') or ''}"
-        )
-        vec = embed_text(text)
-        if not vec:
-            continue
-
+    for row, vec in embedded_rows(rows, profile_text):
         supabase.table("profiles") \
             .update({"embedding": vec}) \
             .eq("profile_id", row["profile_id"]) \
@@ -0,0 +1,48 @@
+"""
+Refresh the precomputed top-k match tables (profile_top_candidates,
+employee_top_profiles) read by the /smart endpoints when MATCH_TOPK_TABLES=true.
+
+Calls the `refresh_match_topk` RPC (see
+backend/db/migrations/005_match_topk_tables.sql), which only recomputes the
+lists affected by rows whose `updated_at` moved since the previous refresh.
+Run it after reindex_embeddings.py / update_chosen_employees_embeddings.py,
+or schedule the RPC itself with pg_cron.
+
+Usage:
+    python refresh_match_topk.py                 # incremental
+    python refresh_match_topk.py --full          # rebuild every list
+    python refresh_match_topk.py --k 200         # new list size (rebuilds every list once)
+"""
+
+import argparse
+import json
+import os
+from typing import List, Optional
+
+from supabase import create_client
+from dotenv import load_dotenv
+load_dotenv()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=None,
+                        help="list size; must cover the largest `limit` served (default: keep the current one, 100 at first)")
+    parser.add_argument("--full", action="store_true", help="rebuild every list instead of the changed ones")
+    parser.add_argument("--overlap-minutes", type=float, default=10.0,
+                        help="re-process rows updated this long before the previous refresh (default 10)")
+    args = parser.parse_args(argv)
+
+    supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    result = supabase.rpc("refresh_match_topk", {
+        "p_k": args.k,
+        "p_full": args.full,
+        "p_overlap": f"{args.overlap_minutes} minutes",
+    }).execute().data
+
+    print(json.dumps(result, indent=2))
+    print("🎉 Top-k match tables refreshed")
+
+
+if __name__ == "__main__":
+    main()
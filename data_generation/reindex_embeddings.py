@@ -0,0 +1,269 @@
+"""
+Bulk embedding refresh for structured_employees, positions and profiles.
+
+Pages through each table by primary key, embeds the texts in large batches
+(several embeddings requests in flight at once, with retry/backoff), and
+writes the vectors back with one `bulk_update_embeddings` RPC per chunk
+(see backend/db/migrations/001_bulk_update_embeddings.sql).
+
+Progress is checkpointed per table after every page, so an interrupted run
+resumes where it stopped. Texts that were already embedded are served from
+the on-disk embedding cache.
+
+Usage:
+    python reindex_embeddings.py                      # all tables, resume
+    python reindex_embeddings.py --tables positions --restart
+    python reindex_embeddings.py --base-url http://localhost:8001/v1   # fake endpoint
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from openai import OpenAI
+from supabase import create_client, Client
+from dotenv import load_dotenv
+load_dotenv()
+
+from embedding_batches import (
+    EMBED_MODEL,
+    EmbeddingCache,
+    embedding_cache,
+    employee_text,
+    openai_client,
+    position_text,
+    profile_text,
+)
+
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+MAX_INPUTS_PER_REQUEST = 2048  # embeddings API limit
+DEFAULT_CHECKPOINT = Path(__file__).resolve().parent / ".cache" / "reindex_checkpoint.json"
+# PostgREST / Postgres codes for "no such function": bulk_update_embeddings is not installed
+MISSING_FUNCTION_CODES = ("PGRST202", "42883")
+
+# table -> (primary key, selected columns, text builder); texts shared with employees_generation.py
+TABLES: Dict[str, tuple] = {
+    "structured_employees": ("employee_number", "employee_number, short_summary", employee_text),
+    "positions": ("position_id", "position_id, position_name, description", position_text),
+    "profiles": ("profile_id", "profile_id, profile_name, position_name, description", profile_text),
+}
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def with_retry(fn: Callable[[], Any], attempts: int, label: str) -> Any:
+    """Call `fn`, retrying with exponential backoff and jitter."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt == attempts:
+                raise
+            delay = min(30.0, 2 ** (attempt - 1)) * (0.5 + random.random())
+            print(f"⚠️  {label} failed ({exc}); retry {attempt}/{attempts - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def load_checkpoint(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: Path, state: Dict[str, Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+class Reindexer:
+    def __init__(
+        self,
+        supabase: Client,
+        client: OpenAI,
+        cache: Optional[EmbeddingCache],
+        batch_size: int,
+        concurrency: int,
+        page_size: int,
+        write_batch_size: int,
+        retries: int,
+    ):
+        self.supabase = supabase
+        self.client = client
+        self.cache = cache
+        self.batch_size = min(batch_size, MAX_INPUTS_PER_REQUEST)
+        self.concurrency = max(1, concurrency)
+        self.page_size = page_size
+        self.write_batch_size = write_batch_size
+        self.retries = retries
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.bulk_rpc: Optional[bool] = None  # probed on first write
+        self.requests = 0
+
+    # ---------------- embeddings ----------------
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        def call():
+            return self.client.embeddings.create(model=EMBED_MODEL, input=texts)
+
+        response = with_retry(call, self.retries, "embeddings request")
+        self.requests += 1
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        vectors: List[List[float]] = []
+        for part in self.pool.map(self._embed_batch, batches):
+            vectors.extend(part)
+        return vectors
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self._embed_uncached(texts)
+        return self.cache.embed(texts, self._embed_uncached).tolist()
+
+    # ---------------- database ----------------
+    def fetch_page(self, table: str, id_column: str, columns: str, after: Optional[Any]) -> List[Dict[str, Any]]:
+        def call():
+            query = self.supabase.table(table).select(columns).order(id_column).limit(self.page_size)
+            if after is not None:
+                query = query.gt(id_column, after)
+            return query.execute()
+
+        return with_retry(call, self.retries, f"fetch {table}").data or []
+
+    def _probe_bulk_rpc(self, table: str) -> bool:
+        def call() -> bool:
+            try:
+                self.supabase.rpc("bulk_update_embeddings", {"target_table": table, "rows": []}).execute()
+                return True
+            except Exception as exc:
+                if getattr(exc, "code", None) not in MISSING_FUNCTION_CODES:
+                    raise  # transient: retried like any other write
+                # Migration not applied: fall back to concurrent per-row updates
+                print(f"⚠️  bulk_update_embeddings not installed ({exc}); using per-row updates")
+                return False
+
+        return with_retry(call, self.retries, "probe bulk_update_embeddings")
+
+    def write(self, table: str, id_column: str, updates: List[Dict[str, Any]]) -> None:
+        if self.bulk_rpc is None:
+            self.bulk_rpc = self._probe_bulk_rpc(table)
+        if self.bulk_rpc:
+            for start in range(0, len(updates), self.write_batch_size):
+                chunk = updates[start:start + self.write_batch_size]
+                with_retry(
+                    lambda: self.supabase.rpc("bulk_update_embeddings", {"target_table": table, "rows": chunk}).execute(),
+                    self.retries,
+                    f"bulk write {table}",
+                )
+            return
+
+        def update_row(item: Dict[str, Any]) -> None:
+            with_retry(
+                lambda: self.supabase.table(table).update({"embedding": item["embedding"]}).eq(id_column, item["id"]).execute(),
+                self.retries,
+                f"update {table} {item['id']}",
+            )
+
+        list(self.pool.map(update_row, updates))
+
+    # ---------------- pipeline ----------------
+    def reindex_table(self, table: str, state: Dict[str, Any], checkpoint: Callable[[], None]) -> None:
+        id_column, columns, build_text = TABLES[table]
+        if state.get("done"):
+            print(f"⏭️  {table}: already done ({state.get('rows', 0)} rows)")
+            return
+
+        started = time.perf_counter()
+        while True:
+            rows = self.fetch_page(table, id_column, columns, state.get("last_id"))
+            if not rows:
+                break
+
+            keyed = [(row[id_column], build_text(row).strip()) for row in rows]
+            keyed = [(row_id, text) for row_id, text in keyed if text]
+            if keyed:
+                vectors = self.embed([text for _, text in keyed])
+                self.write(table, id_column, [
+                    {"id": row_id, "embedding": vec} for (row_id, _), vec in zip(keyed, vectors)
+                ])
+
+            state["last_id"] = rows[-1][id_column]
+            state["rows"] = state.get("rows", 0) + len(keyed)
+            checkpoint()
+            print(f"   {table}: {state['rows']} rows embedded (last {id_column}={state['last_id']})")
+
+            if len(rows) < self.page_size:
+                break
+
+        state["done"] = True
+        checkpoint()
+        print(f"✅ {table}: {state['rows']} rows in {time.perf_counter() - started:.1f}s")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-embed structured_employees, positions and profiles in bulk.")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES))
+    parser.add_argument("--batch-size", type=int, default=512, help="inputs per embeddings request")
+    parser.add_argument("--concurrency", type=int, default=4, help="embeddings requests in flight")
+    parser.add_argument("--page-size", type=int, default=2000, help="rows fetched per page")
+    parser.add_argument("--write-batch-size", type=int, default=200, help="rows per bulk write")
+    parser.add_argument("--retries", type=int, default=6)
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL"), help="e.g. a local fake embeddings server")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk embedding cache")
+    args = parser.parse_args(argv)
+
+    supabase: Client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    # Retries are handled by with_retry so backoff is the same for every call
+    client = openai_client(
+        api_key=os.environ.get("OPENAI_API_KEY", "local"),
+        base_url=args.base_url,
+        max_retries=0,
+        timeout=60.0,
+    )
+    cache = None if args.no_cache else embedding_cache
+
+    state = {} if args.restart else load_checkpoint(args.checkpoint)
+    reindexer = Reindexer(
+        supabase, client, cache,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        page_size=args.page_size,
+        write_batch_size=args.write_batch_size,
+        retries=args.retries,
+    )
+
+    started = time.perf_counter()
+    try:
+        for table in args.tables:
+            table_state = state.setdefault(table, {})
+            reindexer.reindex_table(table, table_state, lambda: save_checkpoint(args.checkpoint, state))
+    finally:
+        reindexer.pool.shutdown(wait=True)
+
+    print(f"🎉 Reindex finished in {time.perf_counter() - started:.1f}s "
+          f"({reindexer.requests} embeddings requests)")
+    # Next run starts a fresh reindex
+    if all(state.get(t, {}).get("done") for t in args.tables):
+        args.checkpoint.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the backend the way it runs: `app` is a top-level package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import TTLCache
+
+
+def _counting_loader(value, delay=0.0, calls=None):
+    async def load():
+        if calls is not None:
+            calls.append(value)
+        await asyncio.sleep(delay)
+        return value
+    return load
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load("k", _counting_loader("v", 0.01, calls)) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["v"] * 5
+    assert calls == ["v"]
+    assert cache.get("k") == "v"
+
+
+def test_cancelled_owner_does_not_cancel_coalesced_waiters():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+
+    async def main():
+        slow = _counting_loader("v", 0.3)
+        return await asyncio.gather(
+            asyncio.wait_for(cache.get_or_load("k", slow), 0.1),
+            cache.get_or_load("k", slow),
+            return_exceptions=True,
+        )
+
+    owner, waiter = asyncio.run(main())
+    assert isinstance(owner, asyncio.TimeoutError)
+    assert waiter == "v"
+    assert cache.get("k") == "v"
+
+
+def test_loader_errors_reach_every_waiter_and_are_not_cached():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            cache.get_or_load("k", failing), cache.get_or_load("k", failing), return_exceptions=True
+        )
+        retry = await cache.get_or_load("k", _counting_loader("v"))
+        return results, retry
+
+    results, retry = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(calls) == 1
+    assert retry == "v"
+
+
+def test_invalidation_during_load_discards_the_stale_result():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+
+    async def main():
+        load = asyncio.ensure_future(cache.get_or_load("k", _counting_loader("old", 0.05)))
+        await asyncio.sleep(0.01)
+        cache.invalidate("k")
+        assert await load == "old"
+        assert cache.get("k") is None
+        # The next caller loads again instead of joining the invalidated load
+        return await cache.get_or_load("k", _counting_loader("new"))
+
+    assert asyncio.run(main()) == "new"
+    assert cache.get("k") == "new"
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache("test", maxsize=2, ttl=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" becomes least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+    now[0] += 10
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_get_many_or_load_loads_only_misses():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    cache.set(1, "one")
+    requested = []
+
+    async def loader(keys):
+        requested.append(list(keys))
+        return {key: str(key) for key in keys if key != 3}
+
+    found = asyncio.run(cache.get_many_or_load([1, 2, 3], loader))
+    assert found == {1: "one", 2: "2"}
+    assert requested == [[2, 3]]
+    assert cache.get(2) == "2" and cache.get(3) is None
+
+
+@pytest.mark.parametrize("generation_bump", [cache_module.TTLCache.invalidate, cache_module.TTLCache.clear])
+def test_set_with_stale_generation_is_ignored(generation_bump):
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    generation = cache._generation
+    if generation_bump is TTLCache.invalidate:
+        generation_bump(cache, "other")
+    else:
+        generation_bump(cache)
+    cache.set("k", "stale", generation)
+    assert cache.get("k") is None
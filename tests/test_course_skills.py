@@ -0,0 +1,72 @@
+from typing import Dict
+
+import pytest
+
+from app.services.course_skills import SKILLS, CourseSkillIndex
+
+X, Y, Z = SKILLS[:3]
+
+
+def _index(coverage: Dict[int, Dict[str, float]]) -> CourseSkillIndex:
+    """Index whose course -> skills mapping is fixed, so only the ranker is exercised."""
+    index = CourseSkillIndex()
+    index.skills_for = lambda texts: {cid: dict(coverage.get(cid, {})) for cid in texts}
+    return index
+
+
+def _texts(*ids: int) -> Dict[int, str]:
+    return {cid: f"course {cid}" for cid in ids}
+
+
+def test_picks_largest_weighted_coverage_first():
+    index = _index({1: {Y: 1.0}, 2: {X: 1.0, Y: 1.0}, 3: {Z: 1.0}})
+    picks = index.rank(_texts(1, 2, 3), [(X, 3), (Y, 1), (Z, 2)], max_courses=5)
+    # Course 2 covers X and Y fully, so course 1 adds nothing afterwards
+    assert picks == [(2, [X, Y]), (3, [Z])]
+
+
+def test_covered_skills_are_discounted_by_strength():
+    index = _index({1: {X: 0.5}, 2: {X: 0.5}, 3: {Y: 1.0}})
+    picks = index.rank(_texts(1, 2, 3), [(X, 3), (Y, 1)], max_courses=5)
+    # After course 1, X has 1.5 left, so course 2 is worth 0.75 < course 3's 1.0
+    assert [cid for cid, _ in picks] == [1, 3, 2]
+
+
+def test_ties_go_to_the_lower_course_id():
+    index = _index({9: {X: 1.0}, 4: {X: 1.0}, 7: {Y: 1.0}})
+    picks = index.rank(_texts(9, 7, 4), [(X, 2), (Y, 2)], max_courses=5)
+    assert [cid for cid, _ in picks] == [4, 7]
+
+
+def test_stops_at_max_courses_and_defaults_to_settings(monkeypatch):
+    from app.services import course_skills
+
+    index = _index({1: {X: 1.0}, 2: {Y: 1.0}, 3: {Z: 1.0}})
+    gaps = [(X, 3), (Y, 2), (Z, 1)]
+    assert [cid for cid, _ in index.rank(_texts(1, 2, 3), gaps, max_courses=2)] == [1, 2]
+
+    monkeypatch.setattr(course_skills.settings, "COURSE_FAST_MAX_COURSES", 1)
+    assert [cid for cid, _ in index.rank(_texts(1, 2, 3), gaps)] == [1]
+
+
+def test_gap_names_are_case_insensitive_and_closed_gaps_ignored():
+    index = _index({1: {X: 1.0, Y: 1.0}})
+    picks = index.rank(_texts(1), [(f"  {X.upper()} ", 1), (Y, 0)], max_courses=3)
+    assert picks == [(1, [X])]
+
+
+def test_covered_skills_are_listed_by_gap_size():
+    index = _index({1: {X: 1.0, Y: 1.0, Z: 1.0}})
+    picks = index.rank(_texts(1), [(X, 1), (Y, 3), (Z, 2)], max_courses=3)
+    assert picks == [(1, [Y, Z, X])]
+
+
+@pytest.mark.parametrize("texts, gaps", [({}, [(X, 1)]), (_texts(1), []), (_texts(1), [(Y, 2)])])
+def test_nothing_to_cover_returns_no_picks(texts, gaps):
+    assert _index({1: {X: 1.0}}).rank(texts, gaps) == []
+
+
+def test_gaps_outside_the_vocabulary_match_course_text():
+    index = _index({1: {}, 2: {}})
+    texts = {1: "Intro to Kubernetes operators", 2: "Team leadership basics"}
+    assert index.rank(texts, [("kubernetes", 2)], max_courses=3) == [(1, ["kubernetes"])]
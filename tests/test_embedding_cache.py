@@ -0,0 +1,120 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+MODEL = "test-model"
+
+
+def _vector(text: str, dim: int = 4) -> np.ndarray:
+    rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+    return rng.standard_normal(dim).astype(np.float32)
+
+
+def _encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.stack([_vector(t) for t in texts])
+    return encode
+
+
+def _run_in_subprocess(directory: Path, body: str) -> None:
+    script = textwrap.dedent(f"""
+        import numpy as np
+        from app.services.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache({str(directory)!r}, {MODEL!r})
+    """) + textwrap.dedent(body)
+    subprocess.run([sys.executable, "-c", script], cwd=BACKEND, check=True)
+
+
+def test_embed_flush_reload_round_trip(tmp_path):
+    calls = []
+    cache = EmbeddingCache(tmp_path, MODEL)
+
+    first = cache.embed(["a", "b", "a"], _encoder(calls))
+    assert calls == [["a", "b"]]  # each distinct text encoded once
+    assert first.shape == (3, 4) and first.dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[2])
+
+    cache.embed(["b", "c"], _encoder(calls))
+    assert calls[-1] == ["c"]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    reloaded = EmbeddingCache(tmp_path, MODEL)
+    assert len(reloaded) == 3
+    again = reloaded.embed(["a", "b", "c"], _encoder(calls))
+    assert len(calls) == 2  # served from disk
+    np.testing.assert_array_equal(again, np.stack([_vector(t) for t in "abc"]))
+
+
+def test_other_model_does_not_share_entries(tmp_path):
+    EmbeddingCache(tmp_path, MODEL).embed(["a"], _encoder([]))
+    assert len(EmbeddingCache(tmp_path, "other-model")) == 0
+
+
+def test_flush_and_compact_across_processes(tmp_path):
+    calls = []
+    cache = EmbeddingCache(tmp_path, MODEL)
+    cache.embed(["a", "b"], _encoder(calls))
+
+    # Another process re-embeds "a", adds "c" and compacts the file under us
+    _run_in_subprocess(tmp_path, """
+        cache.put_many(["a", "c"], np.array([[9, 9, 9, 9], [3, 3, 3, 3]], dtype=np.float32))
+        cache.flush()
+        cache.compact()
+    """)
+
+    # Our next append lands in the compacted file and re-reads its rows
+    cache.embed(["d"], _encoder(calls))
+    np.testing.assert_array_equal(cache.get("c"), np.full(4, 3, dtype=np.float32))
+    np.testing.assert_array_equal(cache.get("a"), np.full(4, 9, dtype=np.float32))
+    np.testing.assert_array_equal(cache.get("d"), _vector("d"))
+
+    # A later compaction here keeps the other process' records
+    cache.compact()
+    fresh = EmbeddingCache(tmp_path, MODEL)
+    assert len(fresh) == 4
+    np.testing.assert_array_equal(fresh.get("a"), np.full(4, 9, dtype=np.float32))
+    np.testing.assert_array_equal(fresh.get("b"), _vector("b"))
+    record_size = fresh._record_dtype().itemsize
+    assert (fresh.path.stat().st_size - fresh._offset) == 4 * record_size
+
+
+def test_appends_from_several_processes_are_all_kept(tmp_path):
+    cache = EmbeddingCache(tmp_path, MODEL)
+    cache.embed(["a"], _encoder([]))
+    for i in range(3):
+        _run_in_subprocess(tmp_path, f"""
+            cache.put_many(["p{i}"], np.full((1, 4), {i}, dtype=np.float32))
+            cache.flush()
+        """)
+    cache.embed(["b"], _encoder([]))
+
+    fresh = EmbeddingCache(tmp_path, MODEL)
+    assert len(fresh) == 5
+    for i in range(3):
+        np.testing.assert_array_equal(fresh.get(f"p{i}"), np.full(4, i, dtype=np.float32))
+
+
+def test_torn_record_is_truncated_on_load(tmp_path):
+    cache = EmbeddingCache(tmp_path, MODEL)
+    cache.embed(["a", "b"], _encoder([]))
+    intact = cache.path.stat().st_size
+
+    # An interrupted append leaves half a record at the end
+    with open(cache.path, "ab") as fh:
+        fh.write(b"\x01" * (cache._record_dtype().itemsize // 2))
+
+    reloaded = EmbeddingCache(tmp_path, MODEL)
+    assert reloaded.path.stat().st_size == intact
+    assert len(reloaded) == 2
+    np.testing.assert_array_equal(reloaded.get("b"), _vector("b"))
+
+    # Appends after the truncation stay aligned
+    reloaded.embed(["c"], _encoder([]))
+    np.testing.assert_array_equal(EmbeddingCache(tmp_path, MODEL).get("c"), _vector("c"))
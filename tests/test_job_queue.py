@@ -0,0 +1,94 @@
+import asyncio
+
+from app.services.job_queue import JobQueue
+
+
+def _job(log, value, delay=0.0, fail=False):
+    async def run():
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(value)
+        log.append(value)
+    return run
+
+
+def test_submit_before_start_is_rejected():
+    queue = JobQueue("test", workers=1)
+    assert queue.submit("k", _job([], "v")) is False
+    assert queue.stats()["workers"] == 0
+
+
+def test_jobs_run_and_are_counted():
+    log = []
+
+    async def main():
+        queue = JobQueue("test", workers=2)
+        queue.start()
+        for i in range(4):
+            assert queue.submit(i, _job(log, i, 0.01))
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert sorted(log) == [0, 1, 2, 3]
+    assert stats == {"workers": 0, "queued": 0, "completed": 4, "failed": 0}
+
+
+def test_resubmitting_a_waiting_key_runs_only_the_latest_job():
+    log = []
+
+    async def main():
+        queue = JobQueue("test", workers=1)
+        queue.start()
+        queue.submit("busy", _job(log, "busy", 0.05))
+        await asyncio.sleep(0)  # the worker picks up "busy"
+        queue.submit("k", _job(log, "first"))
+        queue.submit("k", _job(log, "second"))
+        assert queue.stats()["queued"] == 1
+        await queue.stop()
+
+    asyncio.run(main())
+    assert log == ["busy", "second"]
+
+
+def test_full_queue_rejects_new_keys():
+    async def main():
+        queue = JobQueue("test", workers=1, maxsize=1)
+        queue.start()
+        assert queue.submit("a", _job([], "a"))
+        assert queue.submit("b", _job([], "b")) is False
+        assert queue.submit("a", _job([], "a2"))  # replacing a waiting key needs no slot
+        await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_failing_job_does_not_stop_the_worker():
+    log = []
+
+    async def main():
+        queue = JobQueue("test", workers=1)
+        queue.start()
+        queue.submit("bad", _job(log, "bad", fail=True))
+        queue.submit("good", _job(log, "good"))
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert log == ["good"]
+    assert (stats["completed"], stats["failed"]) == (1, 1)
+
+
+def test_stop_cancels_jobs_still_running_after_the_timeout():
+    log = []
+
+    async def main():
+        queue = JobQueue("test", workers=1)
+        queue.start()
+        queue.submit("slow", _job(log, "slow", 10))
+        await queue.stop(timeout=0.05)
+        return queue
+
+    queue = asyncio.run(main())
+    assert log == []
+    assert not queue.running
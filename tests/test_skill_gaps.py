@@ -0,0 +1,102 @@
+from typing import Dict, List, Tuple
+
+import pytest
+
+from app.services.skill_gaps import SkillGapEngine
+
+
+def _parse_skills(skills_json) -> Dict[str, int]:
+    """Per-row parsing the endpoints used before the gap engine."""
+    result: Dict[str, int] = {}
+    for item in skills_json or []:
+        skill = (item.get("skill") or "").strip().lower()
+        if not skill:
+            continue
+        result[skill] = int(item.get("level") or 0)
+    return result
+
+
+def _analyze_skill_gaps(candidate: Dict[str, int], required: Dict[str, int]) -> List[Tuple[str, int, int, int, str]]:
+    """Per-row gap computation the endpoints used before the gap engine."""
+    gaps = []
+    for skill, req_level in required.items():
+        cand_level = candidate.get(skill, 0)
+        gap = req_level - cand_level
+        if gap <= -1:
+            status = "strength"
+        elif gap == 0:
+            status = "meet"
+        elif 1 <= gap <= 2:
+            status = "upskill"
+        else:
+            status = "missing"
+        gaps.append((skill, cand_level, req_level, gap, status))
+    return gaps
+
+
+def _skills(*pairs):
+    return [{"skill": skill, "level": level} for skill, level in pairs]
+
+
+CASES = {
+    "missing skill": (_skills(("Python", 3)), _skills(("Python", 3), ("Kubernetes", 2))),
+    "gaps -1, 0, 2, 3": (
+        _skills(("Python", 4), ("SQL", 2), ("Docker", 1), ("Leadership", 0)),
+        _skills(("Python", 3), ("SQL", 2), ("Docker", 3), ("Leadership", 3)),
+    ),
+    "duplicate skills": (
+        _skills(("Python", 1), ("python", 4)),
+        _skills(("SQL", 2), ("Python", 2), ("SQL", 5)),
+    ),
+    "case and whitespace": (
+        _skills(("  Machine Learning ", 2), ("DOCKER", 3)),
+        _skills(("machine learning", 3), (" Docker\t", 3)),
+    ),
+    "empty and missing levels": (
+        [{"skill": "Python"}, {"skill": "", "level": 5}, {"skill": None, "level": 1}],
+        [{"skill": "Python", "level": None}, {"skill": "SQL", "level": "2"}],
+    ),
+    "no skills": ([], None),
+}
+
+
+@pytest.mark.parametrize("candidate, required", CASES.values(), ids=CASES.keys())
+def test_compare_matches_per_row_gaps(candidate, required):
+    batch = SkillGapEngine().compare("hard", [candidate], [required])
+
+    expected = _analyze_skill_gaps(_parse_skills(candidate), _parse_skills(required))
+    assert batch.items(0) == expected
+    counts: Dict[str, int] = {}
+    for *_, status in expected:
+        counts[status] = counts.get(status, 0) + 1
+    assert batch.status_counts(0) == counts
+    assert int(batch.total_required[0]) == len(expected)
+
+
+def test_compare_all_pairs_and_selected_pairs():
+    candidates = [c for c, _ in CASES.values()]
+    requirements = [r for _, r in CASES.values()]
+    engine = SkillGapEngine()
+
+    grid = engine.compare("soft", candidates, requirements)
+    for i, candidate in enumerate(candidates):
+        for j, required in enumerate(requirements):
+            expected = _analyze_skill_gaps(_parse_skills(candidate), _parse_skills(required))
+            assert grid.items(i * len(requirements) + j) == expected
+
+    pairs = [(3, 0), (0, 3), (2, 2)]
+    selected = engine.compare("soft", candidates, requirements, pairs)
+    for n, (i, j) in enumerate(pairs):
+        assert selected.items(n) == grid.items(i * len(requirements) + j)
+
+
+def test_vocabulary_growth_between_calls():
+    engine = SkillGapEngine()
+    first = _skills(("Rare Skill A", 1))
+    engine.compare("hard", [first], [first])
+
+    # Skills first seen in a later call widen the matrices of earlier rows
+    candidate = _skills(("Rare Skill A", 2))
+    required = _skills(("Rare Skill A", 1), ("Rare Skill B", 4))
+    batch = engine.compare("hard", [candidate], [required])
+    assert batch.items(0) == _analyze_skill_gaps(_parse_skills(candidate), _parse_skills(required))
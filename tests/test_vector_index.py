@@ -0,0 +1,169 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import IVFIndex, LocalMatchBackend
+
+
+DIM = 16
+N_EMPLOYEES = 300
+N_POSITIONS = 15
+PROFILES_PER_POSITION = 4
+
+
+def _pgvector(vec: np.ndarray) -> str:
+    """The text form PostgREST returns for a vector column."""
+    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(7)
+    employees = {1000 + i: rng.standard_normal(DIM).astype(np.float32) for i in range(N_EMPLOYEES)}
+    profiles = {}
+    profile_position = {}
+    for position_id in range(1, N_POSITIONS + 1):
+        for j in range(PROFILES_PER_POSITION):
+            profile_id = position_id * 10 + j
+            profiles[profile_id] = rng.standard_normal(DIM).astype(np.float32)
+            profile_position[profile_id] = position_id
+    return employees, profiles, profile_position
+
+
+def _backend(data, ivf: bool) -> LocalMatchBackend:
+    employees, profiles, profile_position = data
+    backend = LocalMatchBackend()
+    if ivf:
+        # Probing every list keeps the IVF path exact, so results must match the brute force
+        backend.employees = IVFIndex(nlist=8, nprobe=8, exact_threshold=50)
+        backend.profiles = IVFIndex(nlist=4, nprobe=4, exact_threshold=20)
+    backend.upsert_employees(
+        {"employee_number": eid, "first_name": f"First {eid}", "last_name": f"Last {eid}", "embedding": _pgvector(vec)}
+        for eid, vec in employees.items()
+    )
+    backend.upsert_profiles(
+        {
+            "profile_id": pid,
+            "position_id": profile_position[pid],
+            "profile_name": f"Profile {pid}",
+            "position_name": f"Position {profile_position[pid]}",
+            "embedding": vec.tolist(),
+        }
+        for pid, vec in profiles.items()
+    )
+    if ivf:
+        assert backend.employees.centroids is not None and backend.profiles.centroids is not None
+    return backend
+
+
+# ----------------------------------------------------------------
+# Brute-force versions of the match_* RPCs (score = 1 - (a <#> b))
+# ----------------------------------------------------------------
+
+def _score(a: np.ndarray, b: np.ndarray) -> float:
+    return 1.0 + float(np.dot(a, b))
+
+
+def _best_per_position(scores: Dict[int, float], profile_position, limit, exclude: Optional[int] = None) -> List[int]:
+    best: Dict[int, int] = {}
+    for pid, score in scores.items():
+        position_id = profile_position[pid]
+        if position_id != exclude and (position_id not in best or score > scores[best[position_id]]):
+            best[position_id] = pid
+    return sorted(best.values(), key=lambda pid: -scores[pid])[:limit]
+
+
+def _expected_candidates_for_position(data, position_id, limit):
+    employees, profiles, profile_position = data
+    best = {}
+    for pid in (p for p, pos in profile_position.items() if pos == position_id):
+        for eid, vec in employees.items():
+            score = _score(vec, profiles[pid])
+            if eid not in best or score > best[eid][1]:
+                best[eid] = (pid, score)
+    return sorted(((eid, pid, s) for eid, (pid, s) in best.items()), key=lambda r: -r[2])[:limit]
+
+
+def _expected_similar_candidates(data, candidate_id, limit):
+    employees = data[0]
+    scores = {eid: _score(vec, employees[candidate_id]) for eid, vec in employees.items() if eid != candidate_id}
+    return sorted(scores, key=lambda eid: -scores[eid])[:limit], scores
+
+
+def _expected_positions_for_candidate(data, candidate_id, limit):
+    employees, profiles, profile_position = data
+    scores = {pid: _score(employees[candidate_id], vec) for pid, vec in profiles.items()}
+    return _best_per_position(scores, profile_position, limit), scores
+
+
+def _expected_similar_positions(data, position_id, limit):
+    _, profiles, profile_position = data
+    queries = [profiles[p] for p, pos in profile_position.items() if pos == position_id]
+    scores = {pid: max(_score(q, vec) for q in queries) for pid, vec in profiles.items()}
+    return _best_per_position(scores, profile_position, limit, exclude=position_id), scores
+
+
+@pytest.mark.parametrize("ivf", [False, True], ids=["exact", "ivf"])
+def test_rpcs_match_brute_force(data, ivf):
+    backend = _backend(data, ivf)
+
+    for position_id, limit in ((3, 10), (7, 25)):
+        rows = backend.rpc("match_candidates_for_position", {"p_position_id": position_id, "p_limit": limit})
+        expected = _expected_candidates_for_position(data, position_id, limit)
+        assert [(r["candidate_id"], r["profile_id"]) for r in rows] == [(eid, pid) for eid, pid, _ in expected]
+        assert [r["score"] for r in rows] == pytest.approx([s for *_, s in expected], rel=1e-5)
+        assert rows[0]["position_name"] == f"Position {position_id}"
+
+    candidate_id = 1042
+    rows = backend.rpc("match_similar_candidates", {"p_candidate_id": candidate_id, "p_limit": 12})
+    ids, scores = _expected_similar_candidates(data, candidate_id, 12)
+    assert [r["candidate_id"] for r in rows] == ids
+    assert [r["score"] for r in rows] == pytest.approx([scores[i] for i in ids], rel=1e-5)
+    assert rows[0]["first_name"] == f"First {ids[0]}"
+
+    rows = backend.rpc("match_positions_for_candidate", {"p_candidate_id": candidate_id, "p_limit": 5})
+    ids, scores = _expected_positions_for_candidate(data, candidate_id, 5)
+    assert [r["profile_id"] for r in rows] == ids
+    assert [r["score"] for r in rows] == pytest.approx([scores[i] for i in ids], rel=1e-5)
+    assert len({r["position_id"] for r in rows}) == len(rows)
+
+    rows = backend.rpc("match_similar_positions", {"p_position_id": 4, "p_limit": 6})
+    ids, scores = _expected_similar_positions(data, 4, 6)
+    assert [r["profile_id"] for r in rows] == ids
+    assert [r["score"] for r in rows] == pytest.approx([scores[i] for i in ids], rel=1e-5)
+    assert 4 not in {r["position_id"] for r in rows}
+
+
+@pytest.mark.parametrize("ivf", [False, True], ids=["exact", "ivf"])
+def test_incremental_updates(data, ivf):
+    employees, profiles, profile_position = data
+    backend = _backend(data, ivf)
+
+    # Move a candidate next to a profile, drop another, and move a profile to a new position
+    target = profiles[31]
+    employees[1005] = (target * 10).astype(np.float32)
+    backend.upsert_employees([{"employee_number": 1005, "first_name": "Moved", "last_name": "Candidate", "embedding": employees[1005].tolist()}])
+    del employees[1006]
+    backend.remove_employee(1006)
+    profile_position[12] = 9
+    backend.upsert_profiles([{"profile_id": 12, "position_id": 9, "profile_name": "Profile 12", "position_name": "Position 9", "embedding": profiles[12].tolist()}])
+
+    rows = backend.match_candidates_for_position(3, 5)
+    assert rows[0]["candidate_id"] == 1005 and rows[0]["first_name"] == "Moved"
+    assert [r["candidate_id"] for r in rows] == [eid for eid, *_ in _expected_candidates_for_position(data, 3, 5)]
+    assert all(r["candidate_id"] != 1006 for r in backend.match_similar_candidates(1005, N_EMPLOYEES))
+    assert backend.match_positions_for_candidate(1006, 5) == []
+
+    rows = backend.match_similar_positions(9, 8)
+    assert [r["profile_id"] for r in rows] == _expected_similar_positions(data, 9, 8)[0]
+    assert 12 in {pid for pid, _ in backend._position_vectors(9)}
+    assert 12 not in {pid for pid, _ in backend._position_vectors(1)}
+
+
+def test_rpc_rejects_unknown_names(data):
+    backend = _backend(data, ivf=False)
+    with pytest.raises(ValueError):
+        backend.rpc("upsert_employees", {"rows": []})
+    with pytest.raises(ValueError):
+        backend.rpc("match_nothing", {})